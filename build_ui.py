@@ -0,0 +1,100 @@
+'''Compile .ui forms to Python classes and pack icons into Qt resource module
+
+	python3 build_ui.py            -- compile forms and resources into mp3player/forms
+	python3 build_ui.py --measure  -- compare time of creating forms from .ui files and from compiled classes
+'''
+import io
+import os
+import sys
+import time
+import argparse
+import importlib
+
+from PyQt5 import uic
+from PyQt5.pyrcc_main import processResourceFile
+
+import mp3player.forms as forms
+
+# Output directory of generated modules
+OUTPUT_DIR = os.path.dirname(os.path.abspath(forms.__file__))
+# Resource collection file (icons are available as :/icon/<name>)
+QRC_FILE = os.path.join(forms.UI_DIR, "resources.qrc")
+
+
+def compileForm(name):
+	'''Compile the form, relative icon paths are replaced by resource paths
+
+	Arguments:
+
+		name {str} -- Name of the form (e.g. main_window)
+	'''
+	with open(os.path.join(forms.UI_DIR, name + ".ui"), encoding="utf-8") as f:
+		source = f.read().replace(">icon/", ">:/icon/")
+	with open(os.path.join(OUTPUT_DIR, name + "_ui.py"), "w", encoding="utf-8") as f:
+		uic.compileUi(io.StringIO(source), f)
+
+
+def compileResources():
+	'''Pack icons listed in resources.qrc into resources_rc module
+
+	Raises:
+
+		RuntimeError -- If pyrcc fails
+	'''
+	if not processResourceFile([QRC_FILE], os.path.join(OUTPUT_DIR, "resources_rc.py"), False):
+		raise RuntimeError("Resources {} can't be compiled".format(QRC_FILE))
+
+
+def measure(repeat):
+	'''Print time of creating every form from .ui file and from compiled class
+
+	Arguments:
+
+		repeat {int} -- Number of created instances of every form
+	'''
+	from PyQt5 import QtWidgets
+
+	app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+	bases = {"main_window": QtWidgets.QMainWindow, "group_edit": QtWidgets.QMainWindow}
+	total = [0.0, 0.0]
+	print("{:<16}{:>12}{:>12}".format("form", "ui [ms]", "compiled [ms]"))
+	for name in forms.FORMS:
+		base = bases.get(name, QtWidgets.QDialog)
+		module = importlib.import_module("{}.{}_ui".format(forms.__name__, name))
+		formClass = getattr(module, forms.FORMS[name])
+
+		start = time.perf_counter()
+		for _ in range(repeat):
+			uic.loadUi(os.path.join(forms.UI_DIR, name + ".ui"), base())
+		parsed = (time.perf_counter() - start) * 1000 / repeat
+
+		start = time.perf_counter()
+		for _ in range(repeat):
+			formClass().setupUi(base())
+		compiled = (time.perf_counter() - start) * 1000 / repeat
+
+		total[0] += parsed
+		total[1] += compiled
+		print("{:<16}{:>12.1f}{:>12.1f}".format(name, parsed, compiled))
+	print("{:<16}{:>12.1f}{:>12.1f}".format("total", *total))
+	del app
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Compile forms and icons of mp3player.")
+	parser.add_argument("--measure", action="store_true", help="measure creation of forms (run after the build)")
+	parser.add_argument("--repeat", type=int, default=10, help="number of created instances of every form (default: 10)")
+	args = parser.parse_args()
+
+	if args.measure:
+		measure(args.repeat)
+		return 0
+	for name in forms.FORMS:
+		compileForm(name)
+	compileResources()
+	print("Forms and resources were written to {}".format(OUTPUT_DIR))
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -1,14 +1,61 @@
-from PyQt5 import QtWidgets
+import sys
 
-from mp3player.mp3window import MP3Player
+from mp3player.startup import StartupProfile
+import mp3player.instance as instance
 
 
 def main():
-	app = QtWidgets.QApplication([])
-	player = MP3Player()
+	args = sys.argv[1:]
+
+	# Options of the player (everything else starting with "-" belongs to command line interface)
+	options = {i for i in ("--profile-startup", "--new-instance", "--enqueue", "--trace") if i in args}
+	args = [i for i in args if i not in options]
+
+	# Timing of startup phases is printed when the VLC player is ready
+	profile = StartupProfile() if "--profile-startup" in options else None
+
+	import mp3player.cli as cli
+
+	# Headless commands (e.g. mp3_player.py read music/) run without Qt
+	if len(args) > 0 and (args[0] in cli.COMMANDS or args[0].startswith("-")):
+		return cli.main(args)
+
+	# Files are handed to the running player, so only the first launch pays the startup
+	play = "--enqueue" not in options
+	if "--new-instance" not in options and instance.sendToRunning(args, play):
+		return 0
+
+	# Hot paths are measured from the start (can be switched in the menu too)
+	if "--trace" in options:
+		import mp3player.core.tracing as tracing
+		tracing.TRACER.enable()
+
+	from PyQt5 import QtWidgets
+	if profile is not None:
+		profile.mark("import Qt")
+
+	from mp3player.mp3window import MP3Player
+	import mp3player.instance_server as instance_server
+	if profile is not None:
+		profile.mark("import player")
+
+	app = QtWidgets.QApplication(sys.argv[:1])
+	if profile is not None:
+		profile.mark("QApplication")
+
+	player = MP3Player(profile)
 	player.show()
+	if "--new-instance" not in options:
+		server = instance_server.createServer(player)
+		if server is not None:
+			server.filesReceived.connect(player.openFiles)
+			app.aboutToQuit.connect(server.close)
+		player.startControlServer()
+	player.restoreSession()
+	if args:
+		player.openFiles(args, play)
 	return app.exec()
 
 
 if __name__ == "__main__":
-	main()
\ No newline at end of file
+	sys.exit(main())
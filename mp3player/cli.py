@@ -0,0 +1,319 @@
+import os
+import sys
+import glob
+import json
+import argparse
+import multiprocessing
+from functools import partial
+
+import mp3player.core.patterns as patterns
+import mp3player.core.recipes as recipes
+import mp3player.core.renamer as renamer
+import mp3player.core.tags as tags
+
+__all__ = ["COMMANDS", "main"]
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_NO_FILES = 3
+
+# Commands of the command line interface
+COMMANDS = ["read", "set", "guess-from-name", "rename-from-tags", "export", "recipe"]
+# Number of files sent to one worker process at once
+CHUNK_SIZE = 16
+
+
+def iterPaths(inputs, extension=".mp3"):
+	'''Expand inputs (files, globs and directory trees) to paths of mp3 files, every file is returned once
+
+	Arguments:
+
+		inputs {Iterable[str]} -- Paths, glob patterns or directories
+
+	Keyword Arguments:
+
+		extension {str} -- Extension of files found in directories (default: {".mp3"})
+
+	Yields:
+
+		str -- Path of mp3 file
+	'''
+	seen = set()
+	for pattern in inputs:
+		matches = sorted(glob.iglob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+		for match in matches:
+			if os.path.isdir(match):
+				paths = list()
+				for root, dirs, files in os.walk(match):
+					dirs.sort()
+					paths.extend(os.path.join(root, i) for i in sorted(files) if i.lower().endswith(extension))
+			else:
+				paths = [match]
+			for path in paths:
+				key = os.path.normcase(os.path.abspath(path))
+				if key not in seen:
+					seen.add(key)
+					yield path
+
+
+def readWorker(info, path):
+	'''Read tags of one file (evaluated in worker process)
+
+	Arguments:
+
+		info {bool} -- If audio informations should be included
+		path {str} -- Path of mp3 file
+
+	Returns:
+
+		Dict -- Result line
+	'''
+	try:
+		values, audioInfo = tags.readFile(path)
+	except Exception as e:
+		return {"path": path, "ok": False, "error": str(e)}
+	result = {"path": path, "ok": True, "tags": values}
+	if info:
+		result.update(audioInfo)
+	return result
+
+
+def recipeWorker(recipe, dryRun, task):
+	'''Apply the recipe to one file with one write (evaluated in worker process, renames are done later in batch)
+
+	Arguments:
+
+		recipe {Recipe} -- Recipe
+		dryRun {bool} -- Only compute changes, nothing is written
+		task {Tuple[int, str]} -- Index of the file and its path
+
+	Returns:
+
+		Dict -- Result line
+	'''
+	idx, path = task
+	try:
+		changes, fileName = recipe.changes(tags.readTags(path), idx)
+		if changes and not dryRun:
+			tags.writeTags(path, changes)
+	except Exception as e:
+		return {"path": path, "ok": False, "error": str(e)}
+	result = {"path": path, "ok": True, "changes": changes}
+	if fileName is not None:
+		result["newPath"] = os.path.join(os.path.dirname(path), fileName)
+	return result
+
+
+def mapFiles(function, tasks, jobs):
+	'''Map the function over tasks using all cores (results are streamed in the order of tasks)
+
+	Arguments:
+
+		function {Callable} -- Picklable function
+		tasks {Iterable} -- Tasks
+		jobs {int} -- Number of worker processes (1 means no pool)
+
+	Yields:
+
+		object -- Result of the function
+	'''
+	if jobs <= 1:
+		yield from map(function, tasks)
+		return
+	with multiprocessing.Pool(jobs) as pool:
+		yield from pool.imap(function, tasks, CHUNK_SIZE)
+
+
+def writeLine(output, result):
+	'''Write one result as JSON line (flushed, so it can be consumed while the batch is running)
+
+	Arguments:
+
+		output {TextIO} -- Output stream
+		result {Dict} -- Result
+	'''
+	output.write(json.dumps(result, ensure_ascii=False) + "\n")
+	output.flush()
+
+
+def parseAssignments(assignments):
+	'''Parse tag assignments (property=template)
+
+	Arguments:
+
+		assignments {List[str]} -- Assignments from command line
+
+	Raises:
+
+		ValueError -- If the assignment is not valid
+
+	Returns:
+
+		List[Tuple[str, str]] -- Property names and value templates
+	'''
+	parsed = list()
+	for assignment in assignments:
+		property, separator, template = assignment.partition("=")
+		if separator == "" or property not in tags.TEXT_TAGS:
+			raise ValueError("Invalid assignment \"{}\" (use one of {} as property)".format(assignment, ", ".join(tags.TEXT_TAGS)))
+		parsed.append((property, template))
+	return parsed
+
+
+def createParser():
+	'''Create parser of command line arguments
+
+	Returns:
+
+		argparse.ArgumentParser -- Parser
+	'''
+	parser = argparse.ArgumentParser(prog="mp3_player.py", description="Headless batch tagger, results are written as JSON lines.")
+	parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="number of worker processes (default: number of cores)")
+	commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+	commands.required = True
+
+	def addCommand(name, help, modifies=False):
+		command = commands.add_parser(name, help=help)
+		command.add_argument("inputs", nargs="+", metavar="PATH", help="mp3 files, glob patterns (** is recursive) or directories")
+		if modifies:
+			command.add_argument("-n", "--dry-run", action="store_true", help="only print changes, nothing is written")
+			command.add_argument("--start", type=int, default=1, help="number of the first file for \\kd (default: 1)")
+			command.add_argument("--digits", type=int, default=0, help="minimal count of digits of \\kd (default: 0)")
+		return command
+
+	addCommand("read", "read tags")
+	command = addCommand("set", "set tags from value templates (\\kXX, \\kd)", modifies=True)
+	command.add_argument("-t", "--tag", action="append", required=True, metavar="PROPERTY=TEMPLATE", help="e.g. album=Best of or songName=\\kd. \\ksn")
+	command = addCommand("guess-from-name", "parse tags from file names", modifies=True)
+	command.add_argument("-p", "--pattern", required=True, help="parse pattern, e.g. \\kar(.+?) - \\ksn(.+?)\\.mp3")
+	command = addCommand("rename-from-tags", "rename files using tags", modifies=True)
+	command.add_argument("-p", "--pattern", required=True, help="value template, e.g. \\ktr - \\ksn.mp3")
+	command = addCommand("export", "export tags and audio informations")
+	command.add_argument("-o", "--output", help="output file (default: standard output)")
+	command = addCommand("recipe", "run saved recipe", modifies=True)
+	command.add_argument("-r", "--recipe", required=True, help="name of the recipe")
+	command.add_argument("--store", default=recipes.DEFAULT_STORE, help="file with saved recipes")
+	return parser
+
+
+def createRecipe(args):
+	'''Create recipe for modifying command
+
+	Arguments:
+
+		args {argparse.Namespace} -- Parsed arguments
+
+	Raises:
+
+		ValueError -- If the arguments are not valid (PatternError, RecipeError)
+
+	Returns:
+
+		Recipe -- Recipe (None for commands which don't modify files)
+	'''
+	if args.command == "set":
+		steps = [recipes.TemplateStep(property, template) for (property, template) in parseAssignments(args.tag)]
+	elif args.command == "guess-from-name":
+		steps = [recipes.GuessTagsStep(args.pattern)]
+	elif args.command == "rename-from-tags":
+		steps = [recipes.RenameStep(args.pattern)]
+	elif args.command == "recipe":
+		recipe = recipes.RecipeStore(args.store).get(args.recipe)
+		recipe.startIndex, recipe.digits = args.start, args.digits
+		return recipe
+	else:
+		return None
+	return recipes.Recipe(args.command, steps, args.start, args.digits)
+
+
+def main(argv=None, output=sys.stdout):
+	'''Run command line interface
+
+	Keyword Arguments:
+
+		argv {List[str]} -- Command line arguments (default: {None} - sys.argv)
+		output {TextIO} -- Output of JSON lines (default: {sys.stdout})
+
+	Returns:
+
+		int -- Exit code (EXIT_OK, EXIT_FAILED if any file failed, EXIT_USAGE, EXIT_NO_FILES)
+	'''
+	args = createParser().parse_args(argv)
+	try:
+		recipe = createRecipe(args)
+	except (ValueError, patterns.PatternError) as e:
+		print("Error: {}".format(e), file=sys.stderr)
+		return EXIT_USAGE
+
+	if args.command == "export" and args.output:
+		try:
+			output = open(args.output, "w", encoding="utf-8")
+		except OSError as e:
+			print("Error: {}".format(e), file=sys.stderr)
+			return EXIT_USAGE
+	try:
+		return run(args, recipe, output)
+	finally:
+		if output not in (sys.stdout, sys.stderr):
+			output.close()
+
+
+def run(args, recipe, output):
+	'''Run the command over all files and write results
+
+	Arguments:
+
+		args {argparse.Namespace} -- Parsed arguments
+		recipe {Recipe} -- Recipe of modifying command (None for reading commands)
+		output {TextIO} -- Output of JSON lines
+
+	Returns:
+
+		int -- Exit code
+	'''
+	paths = iterPaths(args.inputs)
+	if recipe is not None and recipe.renames and not args.dry_run:
+		# Conflicts of renames are found by read only pass before anything is written
+		paths = list(paths)
+		moves = [(i["path"], i["newPath"]) for i in mapFiles(partial(recipeWorker, recipe, True), enumerate(paths), args.jobs) if i["ok"] and "newPath" in i]
+		conflicts = renamer.RenamePlan(moves).conflicts
+		if conflicts:
+			message = "Cannot rename files, \"{}\" already exists or is not valid".format(conflicts[0][0])
+			print("Error: {}".format(message), file=sys.stderr)
+			writeLine(output, {"ok": False, "error": message, "renamed": False})
+			return EXIT_FAILED
+	if recipe is None:
+		results = mapFiles(partial(readWorker, args.command == "export"), paths, args.jobs)
+	else:
+		results = mapFiles(partial(recipeWorker, recipe, args.dry_run), enumerate(paths), args.jobs)
+
+	count = 0
+	failed = 0
+	moves = list()
+	for result in results:
+		count += 1
+		if not result["ok"]:
+			failed += 1
+		elif "newPath" in result:
+			moves.append((result["path"], result["newPath"]))
+		writeLine(output, result)
+
+	# Files are renamed at the end as one batch (swaps are allowed, failed batch is rolled back)
+	if moves and not args.dry_run:
+		try:
+			renamer.RenamePlan(moves).execute()
+		except (FileExistsError, renamer.RenameError) as e:
+			print("Error: {}".format(e), file=sys.stderr)
+			writeLine(output, {"ok": False, "error": str(e), "renamed": False})
+			return EXIT_FAILED
+
+	if count == 0:
+		print("Error: no mp3 files found", file=sys.stderr)
+		return EXIT_NO_FILES
+	return EXIT_FAILED if failed else EXIT_OK
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,360 @@
+import os
+import json
+import asyncio
+import threading
+import tempfile
+
+__all__ = ["CONTROL_PATH", "RpcError", "ControlServer"]
+
+# Control socket of the running player (one per user)
+CONTROL_PATH = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), "mp3player-control-{}.sock".format(os.getuid() if hasattr(os, "getuid") else os.getlogin()))
+# Maximal length of one message (batch of thousands of requests fits)
+MESSAGE_LIMIT = 64 * 1024 * 1024
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class RpcError(Exception):
+	'''Error returned to the client
+
+	Arguments:
+
+		code {int} -- JSON-RPC error code
+		message {str} -- Error message
+	'''
+	def __init__(self, code, message):
+		super().__init__(message)
+		self.code = code
+		self.message = message
+
+	def toDict(self):
+		return {"code": self.code, "message": self.message}
+
+
+class Method(object):
+	'''Registered method of the server
+
+	Arguments:
+
+		function {Callable} -- Function of params (list of params if it's bulk), evaluated in worker thread
+		bulk {bool} -- If all calls of the batch are passed to one call of the function
+	'''
+	__slots__ = ["function", "bulk"]
+
+	def __init__(self, function, bulk):
+		self.function = function
+		self.bulk = bulk
+
+
+class ControlServer(object):
+	'''Local control server (JSON-RPC 2.0 over Unix socket, one JSON message per line)
+
+	The server runs its own asyncio loop in background thread, methods are evaluated in worker threads.
+	Requests of the batch are grouped by method, so bulk methods get all their calls at once and the whole
+	batch is answered in one round-trip. Clients subscribed by "subscribe" get events as notifications
+
+	Keyword Arguments:
+
+		path {str} -- Path to the socket (default: {CONTROL_PATH})
+	'''
+	def __init__(self, path=CONTROL_PATH):
+		self.path = path
+		self.methods = dict()
+		self.subscribers = dict()
+		self.clients = set()
+		self.loop = None
+		self.server = None
+		self.thread = None
+		self.register("subscribe", None)
+		self.register("unsubscribe", None)
+
+	def register(self, name, function, bulk=False):
+		'''Register the method
+
+		Arguments:
+
+			name {str} -- Name of the method
+			function {Callable} -- Function of params (params is dict or list), returns result which can be serialized to JSON
+
+		Keyword Arguments:
+
+			bulk {bool} -- If the function gets list of params of all calls of the batch and returns list of results (exception instance for failed call) (default: {False})
+		'''
+		self.methods[name] = Method(function, bulk)
+
+	def start(self):
+		'''Start listening in background thread (stale socket of crashed player is removed)
+
+		Returns:
+
+			bool -- True if the server is listening
+		'''
+		if not hasattr(asyncio, "start_unix_server"):
+			return False
+		ready = threading.Event()
+		self.thread = threading.Thread(target=self.run, args=(ready,), daemon=True)
+		self.thread.start()
+		ready.wait()
+		return self.server is not None
+
+	def run(self, ready):
+		'''Run the loop of the server (evaluated in background thread)
+
+		Arguments:
+
+			ready {threading.Event} -- Set when the server is listening (or failed)
+		'''
+		self.loop = asyncio.new_event_loop()
+		asyncio.set_event_loop(self.loop)
+		try:
+			self.loop.run_until_complete(self.listen())
+		except OSError:
+			self.server = None
+		ready.set()
+		if self.server is not None:
+			self.loop.run_forever()
+		self.loop.close()
+
+	async def listen(self):
+		'''Bind the socket (only the user can connect)
+		'''
+		if os.path.exists(self.path):
+			os.remove(self.path)
+		# Socket is created without permissions of others, so nobody else can connect before it's restricted
+		mask = os.umask(0o177)
+		try:
+			self.server = await asyncio.start_unix_server(self.handleClient, self.path, limit=MESSAGE_LIMIT)
+		finally:
+			os.umask(mask)
+		os.chmod(self.path, 0o600)
+
+	def stop(self):
+		'''Stop the server and remove the socket
+		'''
+		if self.server is None:
+			return
+
+		async def close():
+			self.server.close()
+			# Handlers of closed connections finish at the end of the stream
+			for writer in list(self.clients):
+				writer.close()
+			tasks = [i for i in asyncio.all_tasks() if i is not asyncio.current_task()]
+			if tasks:
+				await asyncio.wait(tasks, timeout=1)
+			self.loop.stop()
+
+		asyncio.run_coroutine_threadsafe(close(), self.loop)
+		self.thread.join(1)
+		self.server = None
+		try:
+			os.remove(self.path)
+		except OSError:
+			pass
+
+	def publish(self, event, data=None):
+		'''Push the event to subscribed clients (can be called from any thread)
+
+		Arguments:
+
+			event {str} -- Name of the event
+
+		Keyword Arguments:
+
+			data {Dict} -- Data of the event (default: {None})
+		'''
+		if self.server is None or not self.subscribers:
+			return
+		line = self.encode({"jsonrpc": "2.0", "method": "event", "params": dict(data or {}, event=event)})
+		self.loop.call_soon_threadsafe(self.sendEvent, event, line)
+
+	def sendEvent(self, event, line):
+		'''Write the event to clients subscribed to it (evaluated in the loop)
+
+		Arguments:
+
+			event {str} -- Name of the event
+			line {bytes} -- Encoded notification
+		'''
+		for writer, events in list(self.subscribers.items()):
+			if events is None or event in events:
+				writer.write(line)
+
+	@staticmethod
+	def encode(message):
+		return (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+
+	async def handleClient(self, reader, writer):
+		'''Serve one connection (requests are answered in order)
+
+		Arguments:
+
+			reader {asyncio.StreamReader} -- Reader
+			writer {asyncio.StreamWriter} -- Writer
+		'''
+		self.clients.add(writer)
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					break
+				if not line.strip():
+					continue
+				response = await self.handleMessage(line, writer)
+				if response is not None:
+					writer.write(self.encode(response))
+					await writer.drain()
+		except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+			pass
+		finally:
+			self.clients.discard(writer)
+			self.subscribers.pop(writer, None)
+			writer.close()
+
+	async def handleMessage(self, line, writer):
+		'''Handle one message (single request or batch)
+
+		Arguments:
+
+			line {bytes} -- Message
+			writer {asyncio.StreamWriter} -- Writer of the client (for subscriptions)
+
+		Returns:
+
+			object -- Response, list of responses or None (notifications are not answered)
+		'''
+		try:
+			message = json.loads(line.decode("utf-8"))
+		except ValueError:
+			return self.errorResponse(None, RpcError(PARSE_ERROR, "Parse error"))
+		if isinstance(message, list):
+			if not message:
+				return self.errorResponse(None, RpcError(INVALID_REQUEST, "Empty batch"))
+			responses = [i for i in await self.handleBatch(message, writer) if i is not None]
+			return responses or None
+		return (await self.handleBatch([message], writer))[0]
+
+	async def handleBatch(self, requests, writer):
+		'''Evaluate requests of the batch (calls of one method are evaluated together)
+
+		Arguments:
+
+			requests {List} -- Requests
+			writer {asyncio.StreamWriter} -- Writer of the client
+
+		Returns:
+
+			List[Dict] -- Response for each request (None for notifications)
+		'''
+		responses = [None] * len(requests)
+		groups = dict()
+		for idx, request in enumerate(requests):
+			if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" or not isinstance(request.get("method"), str):
+				responses[idx] = self.errorResponse(None, RpcError(INVALID_REQUEST, "Invalid request"))
+				continue
+			params = request.get("params", {})
+			if not isinstance(params, (dict, list)):
+				responses[idx] = self.errorResponse(request.get("id"), RpcError(INVALID_PARAMS, "Params must be object or array"))
+				continue
+			method = request["method"]
+			if method not in self.methods:
+				responses[idx] = self.errorResponse(request.get("id"), RpcError(METHOD_NOT_FOUND, "Method \"{}\" not found".format(method)))
+				continue
+			groups.setdefault(method, list()).append((idx, request, params))
+
+		async def evaluate(name, calls):
+			results = await self.call(name, [params for (idx, request, params) in calls], writer)
+			for (idx, request, params), result in zip(calls, results):
+				if "id" not in request:
+					continue
+				if isinstance(result, Exception):
+					responses[idx] = self.errorResponse(request["id"], result)
+				else:
+					responses[idx] = {"jsonrpc": "2.0", "id": request["id"], "result": result}
+
+		await asyncio.gather(*(evaluate(i, j) for (i, j) in groups.items()))
+		return responses
+
+	async def call(self, name, calls, writer):
+		'''Call the method for all its calls of the batch
+
+		Arguments:
+
+			name {str} -- Name of the method
+			calls {List} -- Params of calls
+			writer {asyncio.StreamWriter} -- Writer of the client
+
+		Returns:
+
+			List -- Result (or exception) for each call
+		'''
+		if name in ("subscribe", "unsubscribe"):
+			results = list()
+			for params in calls:
+				try:
+					results.append(self.subscribe(writer, params, name == "subscribe"))
+				except Exception as e:
+					results.append(e)
+			return results
+		method = self.methods[name]
+		if method.bulk:
+			try:
+				return await self.loop.run_in_executor(None, method.function, calls)
+			except Exception as e:
+				return [e] * len(calls)
+
+		def evaluate(params):
+			try:
+				return method.function(params)
+			except Exception as e:
+				return e
+
+		return await asyncio.gather(*(self.loop.run_in_executor(None, evaluate, i) for i in calls))
+
+	def subscribe(self, writer, params, subscribe):
+		'''Subscribe (or unsubscribe) the client to events
+
+		Arguments:
+
+			writer {asyncio.StreamWriter} -- Writer of the client
+			params {Dict} -- Params with optional list of events (all events if it's missing)
+			subscribe {bool} -- Subscribe, otherwise unsubscribe
+
+		Raises:
+
+			RpcError -- If the events are not list of strings
+
+		Returns:
+
+			bool -- True
+		'''
+		if not subscribe:
+			self.subscribers.pop(writer, None)
+			return True
+		events = params.get("events") if isinstance(params, dict) else None
+		if events is not None and (not isinstance(events, list) or not all(isinstance(i, str) for i in events)):
+			raise RpcError(INVALID_PARAMS, "Events must be list of strings")
+		self.subscribers[writer] = None if events is None else set(events)
+		return True
+
+	@staticmethod
+	def errorResponse(id, error):
+		'''Create error response
+
+		Arguments:
+
+			id {object} -- Id of the request
+			error {Exception} -- Error (RpcError keeps its code, other exceptions are internal errors)
+
+		Returns:
+
+			Dict -- Response
+		'''
+		if not isinstance(error, RpcError):
+			code = INVALID_PARAMS if isinstance(error, (KeyError, TypeError, ValueError)) else INTERNAL_ERROR
+			error = RpcError(code, str(error) or type(error).__name__)
+		return {"jsonrpc": "2.0", "id": id, "error": error.toDict()}
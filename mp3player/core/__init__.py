@@ -0,0 +1,16 @@
+'''Core of the tagger without Qt (track record, tag read/write, pattern engine, rename planner)
+
+Widgets in mp3window and edit_window are thin adapters on top of this package, so worker
+processes and the command line interface import only this package
+'''
+from mp3player.core.track import PROPERTIES, Track, loadTracks
+from mp3player.core.tags import TEXT_TAGS, COVER_EXTENSIONS, readFile, readTags, writeTags, readCover, writeCover
+from mp3player.core.patterns import PatternError, ParsePattern, ValueTemplate, compileParsePattern, compileValueTemplate
+from mp3player.core.renamer import RenameError, RenamePlan
+
+__all__ = [
+	"PROPERTIES", "Track", "loadTracks",
+	"TEXT_TAGS", "COVER_EXTENSIONS", "readFile", "readTags", "writeTags", "readCover", "writeCover",
+	"PatternError", "ParsePattern", "ValueTemplate", "compileParsePattern", "compileValueTemplate",
+	"RenameError", "RenamePlan",
+]
@@ -0,0 +1,275 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import mp3player.core.tags as tags
+
+__all__ = ["CoverError", "CoverChange", "FolderCovers", "readCoverImage", "normalizeCovers", "embedFolderCovers"]
+
+# Number of threads writing covers
+WORKERS = 4
+# Base names of folder images in the order of preference (e.g. cover.jpg, folder.png)
+FOLDER_COVER_NAMES = ["cover", "folder", "front", "albumart", "album"]
+
+
+class CoverError(ValueError):
+	'''Raised when the image can't be used as cover
+
+	Arguments:
+
+		path {str} -- Path to image
+		message {str} -- Reason
+	'''
+	def __init__(self, path, message):
+		super().__init__("Image \"{}\" can't be used as cover: {}".format(path, message))
+		self.path = path
+
+
+class CoverChange(object):
+	'''Result of re-processing embedded cover of one file
+
+	Arguments:
+
+		path {str} -- Path to mp3 file
+		before {int} -- Size of the original cover in bytes (0 if there's no cover)
+		after {int} -- Size of the cover after re-processing (same as before if it wasn't replaced)
+
+	Keyword Arguments:
+
+		data {bytes} -- New image data (default: {None} - cover wasn't replaced)
+		error {Exception} -- Error if the file failed (default: {None})
+		original {bytes} -- Replaced image data (default: {None} - there was no cover)
+	'''
+	__slots__ = ["path", "before", "after", "data", "error", "original"]
+
+	def __init__(self, path, before, after, data=None, error=None, original=None):
+		self.path = path
+		self.before = before
+		self.after = after
+		self.data = data
+		self.error = error
+		self.original = original
+
+	@property
+	def saved(self):
+		return self.before - self.after
+
+
+def readCoverImage(path):
+	'''Read and validate cover image once (the bytes are then shared by all files of the batch)
+
+	Arguments:
+
+		path {str} -- Path to image
+
+	Raises:
+
+		CoverError -- If the image has unsupported format or it's empty
+		OSError -- If the image can't be read
+
+	Returns:
+
+		Tuple[bytes, str] -- Image data and its MIME type (detected from the data)
+	'''
+	with open(path, "rb") as f:
+		data = f.read()
+	if not data:
+		raise CoverError(path, "empty file")
+	mime = tags.coverMimeFromBytes(data)
+	if mime is None:
+		raise CoverError(path, "unsupported format")
+	return data, mime
+
+
+def normalizeCovers(paths, transform, workers=WORKERS):
+	'''Re-process embedded covers in parallel, the cover is replaced only if it gets smaller
+
+	Arguments:
+
+		paths {List[str]} -- Paths to mp3 files
+		transform {Callable[[bytes], Tuple[bytes, str]]} -- Function returning new image data and its MIME type (must be thread safe)
+
+	Keyword Arguments:
+
+		workers {int} -- Number of threads (default: {WORKERS})
+
+	Returns:
+
+		List[CoverChange] -- Result for each file
+	'''
+	def process(path):
+		before = 0
+		try:
+			data = tags.readCover(path)
+			if data is None:
+				return CoverChange(path, 0, 0)
+			before = len(data)
+			newData, mime = transform(data)
+			if len(newData) >= before:
+				return CoverChange(path, before, before)
+			tags.writeCover(path, newData, mime)
+		except Exception as e:
+			return CoverChange(path, before, before, error=e)
+		return CoverChange(path, before, len(newData), newData, original=data)
+
+	if len(paths) <= 1 or workers <= 1:
+		return [process(i) for i in paths]
+	with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+		return list(executor.map(process, paths))
+
+
+class FolderCovers(object):
+	'''Cache of folder images (cover.jpg, folder.png, ...) used when the track has no embedded cover
+
+	Every directory is scanned once, the entry is invalidated when the directory or the image changes (by mtime).
+	All tracks of the directory get the same bytes object, so the decoded image can be shared too. It's thread safe.
+	'''
+	def __init__(self):
+		self.entries = dict()
+		# Lock of the entries and locks of directories being scanned
+		self.lock = threading.Lock()
+		self.directoryLocks = dict()
+
+	@staticmethod
+	def findImage(directory):
+		'''Find folder image in the directory
+
+		Arguments:
+
+			directory {str} -- Path to directory
+
+		Returns:
+
+			str -- Path to image (None if there's no folder image)
+		'''
+		found = dict()
+		try:
+			with os.scandir(directory) as entries:
+				for entry in entries:
+					name, extension = os.path.splitext(entry.name.lower())
+					if name in FOLDER_COVER_NAMES and extension[1:] in tags.COVER_EXTENSIONS and entry.is_file():
+						found.setdefault(name, entry.path)
+		except OSError:
+			return None
+		for name in FOLDER_COVER_NAMES:
+			if name in found:
+				return found[name]
+		return None
+
+	def get(self, directory):
+		'''Get folder image of the directory
+
+		Arguments:
+
+			directory {str} -- Path to directory
+
+		Returns:
+
+			Tuple[bytes, str] -- Image data and its MIME type (None if there's no usable folder image)
+		'''
+		key = os.path.abspath(directory)
+		try:
+			mtime = os.stat(key).st_mtime_ns
+		except OSError:
+			return None
+		with self.lock:
+			entry = self.entries.get(key)
+			directoryLock = self.directoryLocks.setdefault(key, threading.Lock())
+		if entry is not None and entry[0] == mtime and self.isFresh(entry):
+			return entry[3]
+
+		# Only threads waiting for the same directory are blocked while it's scanned
+		with directoryLock:
+			with self.lock:
+				entry = self.entries.get(key)
+			if entry is not None and entry[0] == mtime and self.isFresh(entry):
+				return entry[3]
+			path = self.findImage(key)
+			image = None
+			imageMtime = None
+			if path is not None:
+				try:
+					imageMtime = os.stat(path).st_mtime_ns
+					image = readCoverImage(path)
+				except (CoverError, OSError):
+					image = None
+			with self.lock:
+				self.entries[key] = (mtime, path, imageMtime, image)
+			return image
+
+	@staticmethod
+	def isFresh(entry):
+		'''Check if the image of the cached entry wasn't rewritten
+
+		Arguments:
+
+			entry {Tuple} -- Cached entry (directory mtime, image path, image mtime, image)
+
+		Returns:
+
+			bool -- True if the entry can be used
+		'''
+		path, imageMtime = entry[1], entry[2]
+		if path is None:
+			return True
+		try:
+			return os.stat(path).st_mtime_ns == imageMtime
+		except OSError:
+			return False
+
+	def forTrack(self, path):
+		'''Get folder image of the directory containing the track
+
+		Arguments:
+
+			path {str} -- Path to mp3 file
+
+		Returns:
+
+			Tuple[bytes, str] -- Image data and its MIME type (None if there's no usable folder image)
+		'''
+		return self.get(os.path.dirname(path) or ".")
+
+	def clear(self):
+		'''Forget all scanned directories
+		'''
+		with self.lock:
+			self.entries.clear()
+			self.directoryLocks.clear()
+
+
+def embedFolderCovers(paths, folderCovers=None, workers=WORKERS):
+	'''Embed folder images into tracks without embedded cover in parallel (tracks with a cover are kept)
+
+	Arguments:
+
+		paths {List[str]} -- Paths to mp3 files
+
+	Keyword Arguments:
+
+		folderCovers {FolderCovers} -- Cache of folder images (default: {None} - new cache)
+		workers {int} -- Number of threads (default: {WORKERS})
+
+	Returns:
+
+		List[CoverChange] -- Result for each file (data is set if the folder image was embedded)
+	'''
+	folderCovers = FolderCovers() if folderCovers is None else folderCovers
+
+	def embed(path):
+		try:
+			current = tags.readCover(path)
+			if current is not None:
+				return CoverChange(path, len(current), len(current))
+			image = folderCovers.forTrack(path)
+			if image is None:
+				return CoverChange(path, 0, 0)
+			tags.writeCover(path, image[0], image[1])
+		except Exception as e:
+			return CoverChange(path, 0, 0, error=e)
+		return CoverChange(path, 0, len(image[0]), image[0])
+
+	if len(paths) <= 1 or workers <= 1:
+		return [embed(i) for i in paths]
+	with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+		return list(executor.map(embed, paths))
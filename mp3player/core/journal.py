@@ -0,0 +1,508 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import mp3player.core.tags as tags
+import mp3player.core.renamer as renamer
+
+__all__ = ["UNKNOWN", "FileChange", "Operation", "Journal", "coverKey"]
+
+# Parent directory of journals (every running player has its own directory, removed when it's closed)
+DEFAULT_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "mp3player", "undo")
+# Number of operations which can be undone
+LEVELS = 20
+# Number of file changes kept in memory, older operations are spilled to disk
+MEMORY_LIMIT = 50000
+# Default number of threads writing the files
+WORKERS = 4
+# Hash of the old cover which is read when the change is executed
+UNKNOWN = ""
+
+
+def coverKey(data):
+	'''Hash of the cover used as its key in the journal
+
+	Arguments:
+
+		data {bytes} -- Image data (None means no cover)
+
+	Returns:
+
+		str -- Hash of the cover (None if there's no cover)
+	'''
+	if data is None:
+		return None
+	return hashlib.sha1(data).hexdigest()
+
+
+class FileChange(object):
+	'''Field level delta of one file (only changed values are stored, covers are referenced by content hash)
+
+	Arguments:
+
+		path {str} -- Path to mp3 file before the change
+
+	Keyword Arguments:
+
+		values {Dict[str, Tuple[str, str]]} -- Old and new values of changed text tags by property name (default: {None} - none)
+		cover {Tuple[str, str]} -- Hashes of old and new cover (None means no cover, UNKNOWN old hash is filled in when it's executed) (default: {None} - unchanged)
+		newPath {str} -- Path after the change if the file was renamed or moved (default: {None} - not moved)
+	'''
+	__slots__ = ["path", "values", "cover", "newPath"]
+
+	def __init__(self, path, values=None, cover=None, newPath=None):
+		self.path = path
+		self.values = values or dict()
+		self.cover = cover
+		self.newPath = newPath
+
+	def pathBefore(self, forward):
+		'''Path of the file before the change is applied (or reverted)
+
+		Arguments:
+
+			forward {bool} -- If the change is applied, otherwise it's reverted
+
+		Returns:
+
+			str -- Path
+		'''
+		return self.path if forward or self.newPath is None else self.newPath
+
+	def pathAfter(self, forward):
+		'''Path of the file after the change is applied (or reverted)
+
+		Arguments:
+
+			forward {bool} -- If the change is applied, otherwise it's reverted
+
+		Returns:
+
+			str -- Path
+		'''
+		return self.pathBefore(not forward)
+
+	def valuesAfter(self, forward):
+		'''Text tags after the change is applied (or reverted)
+
+		Arguments:
+
+			forward {bool} -- If the change is applied, otherwise it's reverted
+
+		Returns:
+
+			Dict[str, str] -- Property name to value
+		'''
+		return {i: j[1] if forward else j[0] for (i, j) in self.values.items()}
+
+	def coverAfter(self, forward):
+		'''Hash of the cover after the change is applied (or reverted)
+
+		Arguments:
+
+			forward {bool} -- If the change is applied, otherwise it's reverted
+
+		Returns:
+
+			str -- Hash (None if there's no cover)
+		'''
+		return self.cover[1] if forward else self.cover[0]
+
+	def toDict(self):
+		'''Convert the change to dictionary (for spilling to disk)
+
+		Returns:
+
+			Dict -- Serializable dictionary
+		'''
+		return {"path": self.path, "values": self.values, "cover": self.cover, "newPath": self.newPath}
+
+	@classmethod
+	def fromDict(cls, data):
+		'''Create the change from dictionary
+
+		Arguments:
+
+			data {Dict} -- Dictionary from toDict
+
+		Returns:
+
+			FileChange -- Change
+		'''
+		cover = data["cover"]
+		return cls(data["path"], {i: tuple(j) for (i, j) in data["values"].items()}, None if cover is None else tuple(cover), data["newPath"])
+
+
+class Operation(object):
+	'''One undoable batch (e.g. group edit), changes are kept in memory or spilled to disk
+
+	Arguments:
+
+		name {str} -- Name shown to the user
+		changes {List[FileChange]} -- Changes of files
+	'''
+	def __init__(self, name, changes):
+		self.name = name
+		self.changes = changes
+		self.count = len(changes)
+		self.spillPath = None
+		# Referenced covers (the journal counts references to delete unused images)
+		self.covers = {j for i in changes if i.cover is not None for j in i.cover if j}
+
+	@property
+	def spilled(self):
+		return self.changes is None
+
+	def spill(self, path):
+		'''Move changes to disk (one JSON line per file) and free them from memory
+
+		Arguments:
+
+			path {str} -- Path to spill file
+		'''
+		with open(path, "w", encoding="utf-8") as f:
+			for change in self.changes:
+				f.write(json.dumps(change.toDict(), ensure_ascii=False) + "\n")
+		self.spillPath = path
+		self.changes = None
+
+	def load(self):
+		'''Get changes (spilled changes are read from disk, but they stay spilled)
+
+		Returns:
+
+			List[FileChange] -- Changes
+		'''
+		if not self.spilled:
+			return self.changes
+		with open(self.spillPath, encoding="utf-8") as f:
+			return [FileChange.fromDict(json.loads(i)) for i in f]
+
+	def discard(self):
+		'''Delete the spill file
+		'''
+		if self.spillPath is not None:
+			try:
+				os.remove(self.spillPath)
+			except OSError:
+				pass
+
+
+class Journal(object):
+	'''Multi-level undo/redo of batch operations over files
+
+	Only old and new values of changed fields are stored. Covers are stored once per content in the
+	journal directory and changes reference them by hash. When there's more than memoryLimit changes
+	in memory, the oldest operations are spilled to disk
+
+	Keyword Arguments:
+
+		parent {str} -- Parent directory of the journal directory (default: {DEFAULT_DIR})
+		levels {int} -- Number of operations which can be undone (default: {LEVELS})
+		memoryLimit {int} -- Number of changes kept in memory (default: {MEMORY_LIMIT})
+		workers {int} -- Number of threads writing the files (default: {WORKERS})
+	'''
+	def __init__(self, parent=DEFAULT_DIR, levels=LEVELS, memoryLimit=MEMORY_LIMIT, workers=WORKERS):
+		os.makedirs(parent, exist_ok=True)
+		self.directory = tempfile.mkdtemp(dir=parent)
+		self.levels = levels
+		self.memoryLimit = memoryLimit
+		self.workers = workers
+		self.undoStack = list()
+		self.redoStack = list()
+		self.references = dict()
+		self.spills = 0
+
+	def canUndo(self):
+		return len(self.undoStack) > 0
+
+	def canRedo(self):
+		return len(self.redoStack) > 0
+
+	def undoName(self):
+		'''Name of the operation which would be undone (None if there's none)
+		'''
+		return self.undoStack[-1].name if self.undoStack else None
+
+	def redoName(self):
+		'''Name of the operation which would be redone (None if there's none)
+		'''
+		return self.redoStack[-1].name if self.redoStack else None
+
+	def coverPath(self, key):
+		return os.path.join(self.directory, key + ".img")
+
+	def storeCover(self, data):
+		'''Store the cover (every content is stored once)
+
+		Arguments:
+
+			data {bytes} -- Image data (None means no cover)
+
+		Returns:
+
+			str -- Hash of the cover (None if there's no cover)
+		'''
+		key = coverKey(data)
+		if key is None:
+			return None
+		path = self.coverPath(key)
+		if not os.path.exists(path):
+			# Old covers are stored by writing threads
+			temporary = "{}.{}.tmp".format(path, threading.get_ident())
+			with open(temporary, "wb") as f:
+				f.write(data)
+			os.replace(temporary, path)
+		return key
+
+	def readCover(self, key):
+		'''Read the stored cover
+
+		Arguments:
+
+			key {str} -- Hash of the cover (None means no cover)
+
+		Returns:
+
+			bytes -- Image data (None if there's no cover)
+		'''
+		if key is None:
+			return None
+		with open(self.coverPath(key), "rb") as f:
+			return f.read()
+
+	def record(self, name, changes, covers=None):
+		'''Record already executed operation (redo history is dropped)
+
+		Arguments:
+
+			name {str} -- Name shown to the user
+			changes {List[FileChange]} -- Changes of files (without failed files)
+
+		Keyword Arguments:
+
+			covers {Dict[str, bytes]} -- Image data of covers which aren't stored yet by hash (only covers referenced by the changes are stored) (default: {None})
+		'''
+		changes = [i for i in changes if i.values or i.cover is not None or i.newPath is not None]
+		if not changes:
+			return
+		operation = Operation(name, changes)
+		for key in operation.covers:
+			if covers and key in covers:
+				self.storeCover(covers[key])
+		for key in operation.covers:
+			self.references[key] = self.references.get(key, 0) + 1
+		while self.redoStack:
+			self.drop(self.redoStack.pop())
+		self.undoStack.append(operation)
+		while len(self.undoStack) > self.levels:
+			self.drop(self.undoStack.pop(0))
+		self.limitMemory()
+
+	def drop(self, operation):
+		'''Forget the operation (spill file and unreferenced covers are deleted)
+
+		Arguments:
+
+			operation {Operation} -- Operation
+		'''
+		operation.discard()
+		for key in operation.covers:
+			self.references[key] -= 1
+			if self.references[key] == 0:
+				del self.references[key]
+				try:
+					os.remove(self.coverPath(key))
+				except OSError:
+					pass
+
+	def limitMemory(self):
+		'''Spill the oldest operations to disk until the changes in memory fit into the limit
+		'''
+		inMemory = [i for i in self.undoStack + self.redoStack if not i.spilled]
+		count = sum(i.count for i in inMemory)
+		# The farthest operations from the current state are spilled first
+		for operation in sorted(inMemory, key=self.distance, reverse=True):
+			if count <= self.memoryLimit:
+				break
+			self.spills += 1
+			operation.spill(os.path.join(self.directory, "{}.jsonl".format(self.spills)))
+			count -= operation.count
+
+	def distance(self, operation):
+		'''Number of undo or redo steps needed to reach the operation
+		'''
+		if operation in self.undoStack:
+			return len(self.undoStack) - self.undoStack.index(operation)
+		return len(self.redoStack) - self.redoStack.index(operation)
+
+	def execute(self, name, changes, covers=None):
+		'''Apply new changes to the files and record the successful ones (covers are stored only for recorded changes)
+
+		Arguments:
+
+			name {str} -- Name shown to the user
+			changes {List[FileChange]} -- Changes of files
+
+		Keyword Arguments:
+
+			covers {Dict[str, bytes]} -- Image data of new covers which aren't stored yet by hash (default: {None})
+
+		Raises:
+
+			FileExistsError -- If the renames are in conflict (nothing was written)
+			RenameError -- If the batch rename failed (successfully written tags are recorded without renames, errors are in its errors attribute)
+			OSError -- If the operation can't be recorded (files were changed, errors are in its errors attribute)
+
+		Returns:
+
+			List[Exception] -- Error for each change (None if it was successful)
+		'''
+		covers = dict(covers or {})
+		try:
+			errors = self.apply(changes, True, covers)
+		except (FileExistsError, renamer.RenameError) as e:
+			if getattr(e, "errors", None) is not None:
+				for change in changes:
+					change.newPath = None
+				self.recordSuccessful(name, changes, e.errors, covers)
+			raise
+		self.recordSuccessful(name, changes, errors, covers)
+		return errors
+
+	def recordSuccessful(self, name, changes, errors, covers):
+		'''Record successfully applied changes
+
+		Arguments:
+
+			name {str} -- Name shown to the user
+			changes {List[FileChange]} -- Changes of files
+			errors {List[Exception]} -- Error for each change (None if it was successful)
+			covers {Dict[str, bytes]} -- Image data of covers which aren't stored yet by hash
+
+		Raises:
+
+			OSError -- If the covers can't be stored (files were changed, errors are in its errors attribute)
+		'''
+		try:
+			self.record(name, [i for (i, j) in zip(changes, errors) if j is None], covers)
+		except OSError as e:
+			e.errors = errors
+			raise
+
+	def undo(self):
+		'''Revert the last operation
+
+		Raises:
+
+			FileExistsError -- If the renames are in conflict (nothing was changed)
+			RenameError -- If the batch rename failed (nothing was changed)
+
+		Returns:
+
+			Tuple[Operation, List[FileChange], List[Exception]] -- Reverted operation, its changes and error for each change
+		'''
+		operation = self.undoStack[-1]
+		changes = operation.load()
+		errors = self.apply(changes, False)
+		self.redoStack.append(self.undoStack.pop())
+		return operation, changes, errors
+
+	def redo(self):
+		'''Apply the last reverted operation again
+
+		Raises:
+
+			FileExistsError -- If the renames are in conflict (nothing was changed)
+			RenameError -- If the batch rename failed (tags were written)
+
+		Returns:
+
+			Tuple[Operation, List[FileChange], List[Exception]] -- Applied operation, its changes and error for each change
+		'''
+		operation = self.redoStack[-1]
+		changes = operation.load()
+		errors = self.apply(changes, True)
+		self.undoStack.append(self.redoStack.pop())
+		return operation, changes, errors
+
+	def apply(self, changes, forward, covers=None):
+		'''Apply (or revert) changes, tags are written in parallel and renames are done as one batch
+
+		When applying, conflicts of renames are checked and tags are written before the files are moved, when reverting,
+		the files are moved back first
+
+		Arguments:
+
+			changes {List[FileChange]} -- Changes of files
+			forward {bool} -- If the changes are applied, otherwise they're reverted
+
+		Keyword Arguments:
+
+			covers {Dict[str, bytes]} -- Image data of covers which aren't stored by hash, replaced old covers are added to it (default: {None})
+
+		Raises:
+
+			FileExistsError -- If the renames are in conflict (errors attribute is set if tags were written)
+			RenameError -- If the batch rename failed (errors attribute is set if tags were written)
+
+		Returns:
+
+			List[Exception] -- Error for each change (None if it was successful)
+		'''
+		moves = [(i.pathBefore(forward), i.pathAfter(forward)) for i in changes if i.newPath is not None]
+		if moves:
+			plan = renamer.RenamePlan(moves)
+			if plan.conflicts:
+				raise FileExistsError("Cannot rename files, \"{}\" already exists or is not valid".format(plan.conflicts[0][0]))
+			if not forward:
+				plan.execute()
+
+		covers = dict() if covers is None else covers
+
+		def write(change):
+			path = change.path
+			try:
+				if change.values:
+					tags.writeTags(path, change.valuesAfter(forward))
+				if change.cover is not None:
+					if change.cover[0] == UNKNOWN:
+						old = tags.readCover(path)
+						change.cover = (coverKey(old), change.cover[1])
+						covers[change.cover[0]] = old
+					key = change.coverAfter(forward)
+					data = covers[key] if key in covers else self.readCover(key)
+					tags.writeCover(path, data, tags.coverMimeFromBytes(data or b"") or "image/jpeg")
+			# Mutagen errors don't share common base with OSError
+			except Exception as e:
+				return e
+			return None
+
+		writes = [i for i in changes if i.values or i.cover is not None]
+		if len(writes) <= 1 or self.workers <= 1:
+			errors = {id(i): write(i) for i in writes}
+		else:
+			with ThreadPoolExecutor(max_workers=min(self.workers, len(writes))) as executor:
+				errors = dict(zip(map(id, writes), executor.map(write, writes)))
+
+		# Files with failed write are not moved
+		moves = [(i.path, i.newPath) for i in changes if i.newPath is not None and errors.get(id(i)) is None]
+		if moves and forward:
+			try:
+				renamer.RenamePlan(moves).execute()
+			except (FileExistsError, renamer.RenameError) as e:
+				e.errors = [errors.get(id(i)) for i in changes]
+				raise
+		return [errors.get(id(i)) for i in changes]
+
+	def close(self):
+		'''Delete the journal directory (spilled operations and stored covers)
+		'''
+		self.undoStack.clear()
+		self.redoStack.clear()
+		self.references.clear()
+		shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,248 @@
+import multiprocessing
+import os
+import time
+
+import mp3player.core.patterns as patterns
+
+__all__ = ["MatchTimeout", "MatchJob", "MatchPool"]
+
+# Generation of the current job shared with the main process (set in worker process by initWorker)
+currentGeneration = None
+
+
+def initWorker(generation):
+	'''Initialize worker process
+
+	Arguments:
+
+		generation {multiprocessing.Value} -- Generation of the current job
+	'''
+	global currentGeneration
+	currentGeneration = generation
+
+
+def matchStrings(generation, pattern, strings):
+	'''Parse properties from strings using the pattern (evaluated in worker process)
+
+	Arguments:
+
+		generation {int} -- Generation of the job (chunks of cancelled jobs are skipped)
+		pattern {str} -- Parse pattern from user input
+		strings {List[str]} -- Strings to be parsed
+
+	Returns:
+
+		List[Dict[str, str]] -- Parsed properties for every string (None if the job was cancelled)
+	'''
+	if currentGeneration is not None and currentGeneration.value != generation:
+		return None
+	parsePattern = patterns.compileParsePattern(pattern)
+	return [parsePattern.fields(i) for i in strings]
+
+
+class MatchTimeout(Exception):
+	'''Raised when evaluation of the pattern exceeded its time budget
+
+	Arguments:
+
+		pattern {str} -- Parse pattern from user input
+		timeout {float} -- Time budget in seconds
+	'''
+	def __init__(self, pattern, timeout):
+		super().__init__("Evaluation of the pattern exceeded time budget of {} s".format(timeout))
+		self.pattern = pattern
+		self.timeout = timeout
+
+
+class MatchJob(object):
+	'''Evaluation of one pattern over many strings split to chunks evaluated by worker processes
+
+	The time budget is measured from the last finished chunk, so the job is cancelled only when the workers stop making progress
+
+	Arguments:
+
+		pool {MatchPool} -- Pool evaluating the chunks
+		generation {int} -- Generation of the job
+		pattern {str} -- Parse pattern from user input
+		chunks {List[Tuple[List, List[str]]]} -- Chunks of keys (e.g. row indices) and strings to be parsed
+		timeout {float} -- Time budget in seconds
+	'''
+	def __init__(self, pool, generation, pattern, chunks, timeout):
+		self.pool = pool
+		self.generation = generation
+		self.pattern = pattern
+		self.timeout = timeout
+		self.pending = [(keys, pool.submit(generation, pattern, strings)) for (keys, strings) in chunks]
+		self.lastProgress = time.monotonic()
+
+	def isDone(self):
+		'''If all chunks were evaluated
+
+		Returns:
+
+			bool -- True/False
+		'''
+		return len(self.pending) == 0
+
+	def collect(self):
+		'''Collect evaluated chunks without blocking
+
+		Raises:
+
+			MatchTimeout -- If the workers didn't finish any chunk in time budget (the job is cancelled)
+
+		Returns:
+
+			List[Tuple[object, Dict[str, str]]] -- Keys and parsed properties
+		'''
+		results = list()
+		pending = list()
+		for keys, result in self.pending:
+			if result.ready():
+				# Chunk skipped by worker, because newer job was started
+				values = result.get()
+				if values is not None:
+					results.extend(zip(keys, values))
+			else:
+				pending.append((keys, result))
+		self.pending = pending
+
+		if results:
+			self.lastProgress = time.monotonic()
+		elif self.pending and time.monotonic() - self.lastProgress > self.timeout:
+			self.abort()
+			raise MatchTimeout(self.pattern, self.timeout)
+		return results
+
+	def wait(self):
+		'''Block until all chunks are evaluated
+
+		Raises:
+
+			MatchTimeout -- If the workers didn't finish any chunk in time budget (the job is cancelled)
+
+		Returns:
+
+			List[Tuple[object, Dict[str, str]]] -- Keys and parsed properties
+		'''
+		results = list()
+		while self.pending:
+			keys, result = self.pending[0]
+			try:
+				values = result.get(max(0, self.timeout - (time.monotonic() - self.lastProgress)))
+			except multiprocessing.TimeoutError:
+				self.abort()
+				raise MatchTimeout(self.pattern, self.timeout)
+			self.pending.pop(0)
+			self.lastProgress = time.monotonic()
+			if values is not None:
+				results.extend(zip(keys, values))
+		return results
+
+	def cancel(self):
+		'''Cancel the job (its results are ignored and its chunks not started yet are skipped by workers)
+		'''
+		if self.pending:
+			self.pending = list()
+			self.pool.cancel(self.generation)
+
+	def abort(self):
+		'''Cancel the job which exceeded its time budget (workers stuck in the pattern are killed)
+		'''
+		self.pending = list()
+		self.pool.terminate()
+
+
+class MatchPool(object):
+	'''Pool of worker processes evaluating parse patterns (started lazily)
+
+	Workers are spawned (not forked), so they don't inherit state of the main process (e.g. Qt or threads).
+	The pool is kept alive between jobs, cancelled jobs are only marked as stale by the generation counter
+
+	Keyword Arguments:
+
+		processes {int} -- Number of worker processes (default: {None} - number of cores)
+	'''
+	# Time budget of one pattern in seconds
+	TIMEOUT = 2.0
+	# Minimal size of one chunk
+	CHUNK_SIZE = 64
+
+	def __init__(self, processes=None):
+		self.processes = processes or os.cpu_count() or 1
+		self.context = multiprocessing.get_context("spawn")
+		self.pool = None
+		# Generation of the current job (in the main process and shared with workers)
+		self.generation = 0
+		self.sharedGeneration = None
+
+	def submit(self, generation, pattern, strings):
+		'''Submit parsing of strings to worker processes
+
+		Arguments:
+
+			generation {int} -- Generation of the job
+			pattern {str} -- Parse pattern from user input
+			strings {List[str]} -- Strings to be parsed
+
+		Returns:
+
+			multiprocessing.pool.AsyncResult -- Result of matchStrings
+		'''
+		if self.pool is None:
+			self.sharedGeneration = self.context.Value("q", self.generation, lock=False)
+			self.pool = self.context.Pool(self.processes, initializer=initWorker, initargs=(self.sharedGeneration,))
+		return self.pool.apply_async(matchStrings, (generation, pattern, strings))
+
+	def match(self, pattern, keys, strings, priority=0, timeout=None):
+		'''Start evaluation of the pattern over strings
+
+		Arguments:
+
+			pattern {str} -- Parse pattern from user input
+			keys {List} -- Keys of strings (e.g. row indices)
+			strings {List[str]} -- Strings to be parsed
+
+		Keyword Arguments:
+
+			priority {int} -- Number of leading strings which should be evaluated first as a separate chunk (default: {0})
+			timeout {float} -- Time budget in seconds (default: {None} - TIMEOUT)
+
+		Returns:
+
+			MatchJob -- Running job
+		'''
+		chunks = list()
+		if priority > 0:
+			chunks.append((keys[:priority], strings[:priority]))
+		size = max(self.CHUNK_SIZE, -(-(len(strings) - priority) // (self.processes * 4)))
+		for i in range(priority, len(strings), size):
+			chunks.append((keys[i:i + size], strings[i:i + size]))
+		self.nextGeneration()
+		return MatchJob(self, self.generation, pattern, chunks, self.TIMEOUT if timeout is None else timeout)
+
+	def nextGeneration(self):
+		'''Start new generation of jobs (chunks of older jobs are skipped by workers)
+		'''
+		self.generation += 1
+		if self.sharedGeneration is not None:
+			self.sharedGeneration.value = self.generation
+
+	def cancel(self, generation):
+		'''Cancel the job of the generation (workers are kept alive)
+
+		Arguments:
+
+			generation {int} -- Generation of the job
+		'''
+		if generation == self.generation:
+			self.nextGeneration()
+
+	def terminate(self):
+		'''Kill worker processes (new ones are started with the next submit)
+		'''
+		if self.pool is not None:
+			self.pool.terminate()
+			self.pool.join()
+			self.pool = None
+			self.sharedGeneration = None
@@ -0,0 +1,81 @@
+import os
+import re
+from functools import lru_cache
+
+import mp3player.core.patterns as patterns
+
+__all__ = ["DEFAULT_TEMPLATE", "PathTemplate", "compilePathTemplate"]
+
+# Characters which can't be used in names of files on common file systems
+INVALID_CHARACTERS = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+# Replacement of invalid characters and empty path components
+PLACEHOLDER = "_"
+# Template offered when organizer is opened
+DEFAULT_TEMPLATE = "\\kar/\\kal/\\ktr - \\ksn.mp3"
+
+
+def sanitizeComponent(component):
+	'''Make one component of the path valid (no separators, no trailing dots and spaces, not empty)
+
+	Arguments:
+
+		component {str} -- Component of the path
+
+	Returns:
+
+		str -- Valid component
+	'''
+	component = INVALID_CHARACTERS.sub(PLACEHOLDER, component).strip().rstrip(".")
+	return component if component not in ("", ".", "..") else PLACEHOLDER
+
+
+class PathTemplate(object):
+	'''Compiled path template (value template where "/" separates directories, e.g. \\kar/\\kal/\\ktr - \\ksn.mp3)
+
+	Values of tags never create directories, separators inside them are replaced
+
+	Arguments:
+
+		template {str} -- Template from user input
+	'''
+	def __init__(self, template):
+		self.template = template
+		self.components = [patterns.ValueTemplate(i) for i in template.split("/") if i != ""]
+		self.usesIndex = any(i.usesIndex for i in self.components)
+
+	def format(self, getProperty, number=None, digits=0):
+		'''Create relative path from the template
+
+		Arguments:
+
+			getProperty {Callable[[str], str]} -- Getter of property value by property name
+
+		Keyword Arguments:
+
+			number {int} -- Number from interval (default: {None})
+			digits {int} -- Minimal count of digits of the number (default: {0})
+
+		Returns:
+
+			str -- Relative path (empty if the template is empty)
+		'''
+		def getSafeProperty(propertyName):
+			return INVALID_CHARACTERS.sub(PLACEHOLDER, getProperty(propertyName))
+
+		components = [sanitizeComponent(i.format(getSafeProperty, number=number, digits=digits)) for i in self.components]
+		return os.path.join(*components) if components else ""
+
+
+@lru_cache(maxsize=64)
+def compilePathTemplate(template):
+	'''Compile path template (cached, so it's compiled once per edit)
+
+	Arguments:
+
+		template {str} -- Template from user input
+
+	Returns:
+
+		PathTemplate -- Compiled template
+	'''
+	return PathTemplate(template)
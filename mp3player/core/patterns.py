@@ -0,0 +1,225 @@
+import re
+from collections import OrderedDict
+from functools import lru_cache
+
+__all__ = ["ABBREVIATIONS", "PatternError", "ParsePattern", "ValueTemplate", "compileParsePattern", "compileValueTemplate"]
+
+# Abbreviations usable in patterns (\kXX) and properties of MP3File they stand for
+ABBREVIATIONS: OrderedDict = OrderedDict({
+	"fi": "fileName",
+	"sn": "songName",
+	"ar": "artist",
+	"al": "album",
+	"tr": "track",
+	"ye": "year",
+	"ge": "genre",
+	"co": "comment",
+})
+# Abbreviation of the number from interval (only usable in value templates)
+INDEX_ABBREVIATION = "d"
+
+
+def _alternation(keys):
+	'''Create regex alternation of keys (longest first, so the shorter key never shadows the longer one)
+
+	Arguments:
+
+		keys {Iterable[str]} -- Keys for alternation
+
+	Returns:
+
+		str -- Regex alternation
+	'''
+	return "|".join(re.escape(i) for i in sorted(keys, key=len, reverse=True))
+
+
+class PatternError(ValueError):
+	'''Error raised when the pattern from user input can not be compiled
+
+	Arguments:
+
+		pattern {str} -- Pattern from user input
+		error {re.error} -- Error raised by re.compile
+	'''
+	def __init__(self, pattern, error):
+		position = "" if error.pos is None else " at position {}".format(error.pos)
+		super().__init__("{}{}".format(error.msg, position))
+		self.pattern = pattern
+		self.error = error
+
+
+class ParsePattern(object):
+	'''Compiled parse pattern (regular expression with \\kXX(...) named groups)
+
+	Arguments:
+
+		pattern {str} -- Pattern from user input (lineEdit)
+
+	Keyword Arguments:
+
+		abbreviations {OrderedDict} -- Abbreviations and properties they stand for (default: {ABBREVIATIONS})
+
+	Raises:
+
+		PatternError -- If the pattern is not valid regular expression
+	'''
+	def __init__(self, pattern, abbreviations=ABBREVIATIONS):
+		self.pattern = pattern
+		self.abbreviations = abbreviations
+
+		# Translate \kXX(...) to (?P<XX>...) in one pass
+		groupRegex = re.compile(r"\\k({})\((.*?)\)".format(_alternation(abbreviations)))
+		self.source = groupRegex.sub(lambda m: "(?P<{}>{})".format(m.group(1), m.group(2)), pattern)
+		try:
+			self.regex = re.compile(self.source)
+		except re.error as e:
+			raise PatternError(pattern, e) from e
+
+		# Properties which can be filled by this pattern
+		self.keys = [key for key in abbreviations if key in self.regex.groupindex]
+		self.properties = [abbreviations[key] for key in self.keys]
+
+	def search(self, inputString):
+		'''Search input string
+
+		Arguments:
+
+			inputString {str} -- Input string (can be user input or tag)
+
+		Returns:
+
+			SRE_Match -- Object from re.search (None if not found)
+		'''
+		return self.regex.search(inputString)
+
+	def fields(self, inputString):
+		'''Parse properties from input string
+
+		Arguments:
+
+			inputString {str} -- Input string (can be user input or tag)
+
+		Returns:
+
+			Dict[str, str] -- Property name to parsed value (empty if nothing was found)
+		'''
+		found = self.regex.search(inputString)
+		if found is None:
+			return {}
+		return {self.abbreviations[key]: found.group(key) or "" for key in self.keys}
+
+
+class ValueTemplate(object):
+	'''Compiled value template (string with \\kXX, \\N and \\kd substitutions)
+
+	Arguments:
+
+		template {str} -- Template from user input (lineEdit)
+
+	Keyword Arguments:
+
+		abbreviations {OrderedDict} -- Abbreviations and properties they stand for (default: {ABBREVIATIONS})
+	'''
+	LITERAL = 0
+	PROPERTY = 1
+	GROUP = 2
+	INDEX = 3
+
+	def __init__(self, template, abbreviations=ABBREVIATIONS):
+		self.template = template
+		self.tokens = list()
+
+		tokenRegex = re.compile(r"\\k({})|\\([1-9])".format(_alternation(list(abbreviations) + [INDEX_ABBREVIATION])))
+		position = 0
+		for found in tokenRegex.finditer(template):
+			self.addLiteral(template[position:found.start()])
+			if found.group(1) == INDEX_ABBREVIATION:
+				self.tokens.append((self.INDEX, found.group(0)))
+			elif found.group(1) is not None:
+				self.tokens.append((self.PROPERTY, abbreviations[found.group(1)]))
+			else:
+				self.tokens.append((self.GROUP, int(found.group(2))))
+			position = found.end()
+		self.addLiteral(template[position:])
+
+		self.properties = [value for (kind, value) in self.tokens if kind == self.PROPERTY]
+		self.usesIndex = any(kind == self.INDEX for (kind, value) in self.tokens)
+		self.usesGroups = any(kind == self.GROUP for (kind, value) in self.tokens)
+
+	def addLiteral(self, text):
+		'''Add literal text to tokens (merged with previous literal)
+
+		Arguments:
+
+			text {str} -- Literal text
+		'''
+		if text == "":
+			return
+		if self.tokens and self.tokens[-1][0] == self.LITERAL:
+			self.tokens[-1] = (self.LITERAL, self.tokens[-1][1] + text)
+		else:
+			self.tokens.append((self.LITERAL, text))
+
+	def format(self, getProperty, match=None, number=None, digits=0):
+		'''Substitute template with tags, parsed groups and number from interval
+
+		Arguments:
+
+			getProperty {Callable[[str], str]} -- Getter of property value by property name
+
+		Keyword Arguments:
+
+			match {SRE_Match} -- Object from ParsePattern.search (default: {None})
+			number {int} -- Number from interval (default: {None})
+			digits {int} -- Minimal count of digits of the number (default: {0})
+
+		Returns:
+
+			str -- Substituted string
+		'''
+		parts = list()
+		for kind, value in self.tokens:
+			if kind == self.LITERAL:
+				parts.append(value)
+			elif kind == self.PROPERTY:
+				parts.append(getProperty(value))
+			elif kind == self.GROUP:
+				group = match.group(value) if match is not None and value <= match.re.groups else None
+				parts.append("\\{}".format(value) if group is None else group)
+			elif kind == self.INDEX:
+				parts.append(value if number is None else str(number).zfill(digits))
+		return "".join(parts)
+
+
+@lru_cache(maxsize=64)
+def compileParsePattern(pattern):
+	'''Compile parse pattern (cached, so it's compiled once per edit)
+
+	Arguments:
+
+		pattern {str} -- Pattern from user input
+
+	Raises:
+
+		PatternError -- If the pattern is not valid regular expression
+
+	Returns:
+
+		ParsePattern -- Compiled pattern
+	'''
+	return ParsePattern(pattern)
+
+
+@lru_cache(maxsize=64)
+def compileValueTemplate(template):
+	'''Compile value template (cached, so it's compiled once per edit)
+
+	Arguments:
+
+		template {str} -- Template from user input
+
+	Returns:
+
+		ValueTemplate -- Compiled template
+	'''
+	return ValueTemplate(template)
@@ -0,0 +1,253 @@
+import os
+import re
+from urllib.parse import urlparse, unquote
+
+__all__ = ["PLAYLIST_EXTENSIONS", "PlaylistEntry", "iterPlaylist", "writePlaylist"]
+
+# Supported playlist formats
+PLAYLIST_EXTENSIONS = ["m3u", "m3u8", "pls"]
+# Extended M3U information (duration in seconds and title)
+EXTINF = re.compile(r"#EXTINF:\s*(-?\d+)[^,]*,(.*)")
+# Line of PLS playlist (FileN, TitleN, LengthN)
+PLS_LINE = re.compile(r"(File|Title|Length)(\d+)=(.*)", re.IGNORECASE)
+
+
+class PlaylistEntry(object):
+	'''One entry of the playlist
+
+	Arguments:
+
+		path {str} -- Absolute path to the file
+
+	Keyword Arguments:
+
+		duration {int} -- Duration hint in seconds (default: {None} - unknown)
+		title {str} -- Title hint (default: {None} - unknown)
+	'''
+	__slots__ = ["path", "duration", "title"]
+
+	def __init__(self, path, duration=None, title=None):
+		self.path = path
+		self.duration = duration
+		self.title = title
+
+
+def playlistFormat(path):
+	'''Get format of the playlist from its extension
+
+	Arguments:
+
+		path {str} -- Path to playlist
+
+	Raises:
+
+		ValueError -- If the format is not supported
+
+	Returns:
+
+		str -- m3u, m3u8 or pls
+	'''
+	extension = os.path.splitext(path)[1][1:].lower()
+	if extension not in PLAYLIST_EXTENSIONS:
+		raise ValueError("Unsupported playlist format \"{}\" (use one of {})".format(extension, ", ".join(PLAYLIST_EXTENSIONS)))
+	return extension
+
+
+def resolvePath(location, baseDir):
+	'''Resolve location from the playlist to absolute path
+
+	Arguments:
+
+		location {str} -- Path (absolute or relative to the playlist) or file:// URL
+		baseDir {str} -- Directory of the playlist
+
+	Returns:
+
+		str -- Absolute path (None for remote streams)
+	'''
+	if "://" in location:
+		url = urlparse(location)
+		if url.scheme != "file":
+			return None
+		location = unquote(url.path)
+	return os.path.normpath(os.path.join(baseDir, os.path.expanduser(location)))
+
+
+def parseDuration(value):
+	'''Parse duration hint (negative or invalid means unknown)
+
+	Arguments:
+
+		value {str} -- Duration in seconds
+
+	Returns:
+
+		int -- Duration (None if unknown)
+	'''
+	try:
+		duration = int(value)
+	except ValueError:
+		return None
+	return duration if duration >= 0 else None
+
+
+def iterPlaylist(path):
+	'''Read the playlist line by line (big playlists are never loaded at once), remote streams are skipped
+
+	Arguments:
+
+		path {str} -- Path to playlist (.m3u, .m3u8 or .pls)
+
+	Raises:
+
+		ValueError -- If the format is not supported
+		OSError -- If the playlist can't be read
+
+	Yields:
+
+		PlaylistEntry -- Entry with absolute path
+	'''
+	kind = playlistFormat(path)
+	baseDir = os.path.dirname(os.path.abspath(path))
+	# Legacy .m3u files have no defined encoding, undecodable bytes are kept as surrogates (valid file names on POSIX)
+	errors = "strict" if kind == "m3u8" else "surrogateescape"
+	with open(path, encoding="utf-8-sig", errors=errors) as f:
+		if kind == "pls":
+			yield from iterPls(f, baseDir)
+		else:
+			yield from iterM3u(f, baseDir)
+
+
+def iterM3u(lines, baseDir):
+	'''Parse M3U lines (#EXTINF hints belong to the following path)
+
+	Arguments:
+
+		lines {Iterable[str]} -- Lines
+		baseDir {str} -- Directory of the playlist
+
+	Yields:
+
+		PlaylistEntry -- Entry
+	'''
+	duration = title = None
+	for line in lines:
+		line = line.strip()
+		if not line:
+			continue
+		if line.startswith("#"):
+			match = EXTINF.match(line)
+			if match is not None:
+				duration = parseDuration(match.group(1))
+				title = match.group(2).strip() or None
+			continue
+		path = resolvePath(line, baseDir)
+		if path is not None:
+			yield PlaylistEntry(path, duration, title)
+		duration = title = None
+
+
+def iterPls(lines, baseDir):
+	'''Parse PLS lines (entry is complete when the next entry starts, FileN/TitleN/LengthN are grouped)
+
+	Arguments:
+
+		lines {Iterable[str]} -- Lines
+		baseDir {str} -- Directory of the playlist
+
+	Yields:
+
+		PlaylistEntry -- Entry
+	'''
+	index = None
+	entry = dict()
+	for line in lines:
+		match = PLS_LINE.match(line.strip())
+		if match is None:
+			continue
+		key, number, value = match.group(1).lower(), match.group(2), match.group(3).strip()
+		if number != index:
+			yield from plsEntry(entry, baseDir)
+			index = number
+			entry = dict()
+		entry[key] = value
+	yield from plsEntry(entry, baseDir)
+
+
+def plsEntry(entry, baseDir):
+	'''Create entry from collected PLS values
+
+	Arguments:
+
+		entry {Dict[str, str]} -- Values by lowercase key (file, title, length)
+		baseDir {str} -- Directory of the playlist
+
+	Yields:
+
+		PlaylistEntry -- Entry (nothing if there's no local file)
+	'''
+	path = resolvePath(entry["file"], baseDir) if "file" in entry else None
+	if path is not None:
+		yield PlaylistEntry(path, parseDuration(entry.get("length", "")), entry.get("title") or None)
+
+
+def writePlaylist(path, entries, relative=False):
+	'''Write the playlist (entries are streamed to the file, which replaces the old one at the end)
+
+	Line breaks in titles are replaced by spaces, entries with line break in the path are skipped (the format can't store them)
+
+	Arguments:
+
+		path {str} -- Path to playlist (format is given by extension)
+		entries {Iterable[PlaylistEntry]} -- Entries
+
+	Keyword Arguments:
+
+		relative {bool} -- Write paths relative to the playlist directory (default: {False})
+
+	Raises:
+
+		ValueError -- If the format is not supported
+
+	Returns:
+
+		int -- Number of written entries
+	'''
+	kind = playlistFormat(path)
+	baseDir = os.path.dirname(os.path.abspath(path))
+
+	def location(entry):
+		if relative:
+			try:
+				return os.path.relpath(entry.path, baseDir)
+			# Different drive on Windows
+			except ValueError:
+				pass
+		return os.path.abspath(entry.path)
+
+	count = 0
+	temporary = path + ".tmp"
+	with open(temporary, "w", encoding="utf-8", errors="surrogateescape", newline="\n") as f:
+		if kind == "pls":
+			f.write("[playlist]\n")
+		else:
+			f.write("#EXTM3U\n")
+		for entry in entries:
+			entryPath = location(entry)
+			if "\n" in entryPath or "\r" in entryPath:
+				continue
+			count += 1
+			duration = -1 if entry.duration is None else entry.duration
+			title = (entry.title or "").replace("\r\n", " ").replace("\r", " ").replace("\n", " ")
+			if kind == "pls":
+				f.write("File{0}={1}\n".format(count, entryPath))
+				if title:
+					f.write("Title{0}={1}\n".format(count, title))
+				f.write("Length{0}={1}\n".format(count, duration))
+			else:
+				f.write("#EXTINF:{},{}\n".format(duration, title))
+				f.write(entryPath + "\n")
+		if kind == "pls":
+			f.write("NumberOfEntries={}\nVersion=2\n".format(count))
+	os.replace(temporary, path)
+	return count
@@ -0,0 +1,464 @@
+import os
+import json
+from collections import OrderedDict, namedtuple
+
+import mp3player.core.patterns as patterns
+import mp3player.core.renamer as renamer
+
+__all__ = ["RecipeError", "GuessTagsStep", "TemplateStep", "CaseStep", "RenameStep", "Recipe", "RecipeStore", "RecipeResult", "runRecipe"]
+
+# Default file with saved recipes
+DEFAULT_STORE = os.path.join(os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config"), "mp3player", "recipes.json")
+
+
+class RecipeError(ValueError):
+	'''Raised when the recipe (or its step) is not valid
+
+	Arguments:
+
+		message {str} -- Error message
+	'''
+	pass
+
+
+class GuessTagsStep(object):
+	'''Step parsing tags from the file name using parse pattern (only found values are set)
+
+	Arguments:
+
+		pattern {str} -- Parse pattern (e.g. \\kar(.+?) - \\ksn(.+?)\\.mp3)
+	'''
+	TYPE = "guessTags"
+
+	def __init__(self, pattern):
+		self.pattern = pattern
+		self.parsePattern = patterns.compileParsePattern(pattern)
+
+	def apply(self, values, number, digits):
+		'''Apply the step to values of one file (values are changed in place)
+
+		Arguments:
+
+			values {Dict[str, str]} -- Property name to value
+			number {int} -- Number of the file for \\kd
+			digits {int} -- Minimal count of digits of \\kd
+		'''
+		for property, value in self.parsePattern.fields(values["fileName"]).items():
+			if value != "" and property != "fileName":
+				values[property] = value
+
+	def toDict(self):
+		'''Get saved form of the step
+
+		Returns:
+
+			Dict -- Saved step
+		'''
+		return {"type": self.TYPE, "pattern": self.pattern}
+
+
+class TemplateStep(object):
+	'''Step setting the property from value template (\\kXX, \\kd and \\N groups parsed from other property)
+
+	Arguments:
+
+		property {str} -- Property name
+		template {str} -- Value template
+
+	Keyword Arguments:
+
+		parseProperty {str} -- Property parsed by the pattern for \\N groups (default: {None})
+		pattern {str} -- Parse pattern (default: {None})
+	'''
+	TYPE = "template"
+
+	def __init__(self, property, template, parseProperty=None, pattern=None):
+		self.property = property
+		self.template = template
+		self.parseProperty = parseProperty
+		self.pattern = pattern
+		self.valueTemplate = patterns.compileValueTemplate(template)
+		self.parsePattern = patterns.compileParsePattern(pattern) if pattern else None
+
+	def apply(self, values, number, digits):
+		'''Apply the step to values of one file (values are changed in place)
+
+		Arguments:
+
+			values {Dict[str, str]} -- Property name to value
+			number {int} -- Number of the file for \\kd
+			digits {int} -- Minimal count of digits of \\kd
+		'''
+		match = None
+		if self.parsePattern is not None and self.parseProperty is not None:
+			match = self.parsePattern.search(values.get(self.parseProperty, ""))
+		values[self.property] = self.valueTemplate.format(lambda i: values.get(i, ""), match=match, number=number, digits=digits)
+
+	def toDict(self):
+		'''Get saved form of the step
+
+		Returns:
+
+			Dict -- Saved step
+		'''
+		return {"type": self.TYPE, "property": self.property, "template": self.template, "parseProperty": self.parseProperty, "pattern": self.pattern}
+
+
+class CaseStep(object):
+	'''Step changing case of the property value
+
+	Arguments:
+
+		property {str} -- Property name
+		mode {str} -- One of MODES
+	'''
+	TYPE = "case"
+	MODES = OrderedDict({
+		"lower": str.lower,
+		"upper": str.upper,
+		"capitalize": str.capitalize,
+		"title": str.title,
+	})
+
+	def __init__(self, property, mode):
+		if mode not in self.MODES:
+			raise RecipeError("Unknown case mode \"{}\"".format(mode))
+		self.property = property
+		self.mode = mode
+
+	def apply(self, values, number, digits):
+		'''Apply the step to values of one file (values are changed in place)
+
+		Arguments:
+
+			values {Dict[str, str]} -- Property name to value
+			number {int} -- Number of the file for \\kd
+			digits {int} -- Minimal count of digits of \\kd
+		'''
+		values[self.property] = self.MODES[self.mode](values.get(self.property, ""))
+
+	def toDict(self):
+		'''Get saved form of the step
+
+		Returns:
+
+			Dict -- Saved step
+		'''
+		return {"type": self.TYPE, "property": self.property, "mode": self.mode}
+
+
+class RenameStep(object):
+	'''Step creating the file name from tags using value template (the file stays in its directory)
+
+	Arguments:
+
+		template {str} -- Value template (e.g. \\ktr - \\ksn.mp3)
+	'''
+	TYPE = "rename"
+
+	def __init__(self, template):
+		self.template = template
+		self.valueTemplate = patterns.compileValueTemplate(template)
+
+	def apply(self, values, number, digits):
+		'''Apply the step to values of one file (values are changed in place)
+
+		Arguments:
+
+			values {Dict[str, str]} -- Property name to value
+			number {int} -- Number of the file for \\kd
+			digits {int} -- Minimal count of digits of \\kd
+		'''
+		values["fileName"] = self.valueTemplate.format(lambda i: values.get(i, ""), number=number, digits=digits)
+
+	def toDict(self):
+		'''Get saved form of the step
+
+		Returns:
+
+			Dict -- Saved step
+		'''
+		return {"type": self.TYPE, "template": self.template}
+
+
+# Step types by their identifiers in saved recipes
+STEP_TYPES = OrderedDict((i.TYPE, i) for i in [GuessTagsStep, TemplateStep, CaseStep, RenameStep])
+
+
+def stepFromDict(data):
+	'''Create step from its saved form
+
+	Arguments:
+
+		data {Dict} -- Saved step
+
+	Raises:
+
+		RecipeError -- If the step is not valid
+
+	Returns:
+
+		object -- Step
+	'''
+	data = dict(data)
+	stepType = STEP_TYPES.get(data.pop("type", None))
+	if stepType is None:
+		raise RecipeError("Unknown step type")
+	try:
+		return stepType(**data)
+	except (TypeError, patterns.PatternError) as e:
+		raise RecipeError("Step \"{}\" is not valid: {}".format(stepType.TYPE, e)) from e
+
+
+class Recipe(object):
+	'''Named chain of edit steps applied to every file in one pass
+
+	Steps work with values of one file in memory (every step sees the result of the previous one),
+	so the file is written once no matter how many steps the recipe has
+
+	Arguments:
+
+		name {str} -- Name of the recipe
+		steps {List[object]} -- Steps
+
+	Keyword Arguments:
+
+		startIndex {int} -- Number of the first file for \\kd (default: {1})
+		digits {int} -- Minimal count of digits of \\kd (default: {0})
+	'''
+	def __init__(self, name, steps, startIndex=1, digits=0):
+		self.name = name
+		self.steps = list(steps)
+		self.startIndex = startIndex
+		self.digits = digits
+
+	def apply(self, values, idx=0):
+		'''Apply all steps to values of one file
+
+		Arguments:
+
+			values {Dict[str, str]} -- Property name to current value (including fileName)
+
+		Keyword Arguments:
+
+			idx {int} -- Index of the file in the run (default: {0})
+
+		Returns:
+
+			OrderedDict -- Property name to new value
+		'''
+		values = OrderedDict(values)
+		for step in self.steps:
+			step.apply(values, self.startIndex + idx, self.digits)
+		return values
+
+	@property
+	def renames(self):
+		'''If some step can change the file name
+		'''
+		return any(isinstance(i, RenameStep) or getattr(i, "property", None) == "fileName" for i in self.steps)
+
+	def changes(self, values, idx=0):
+		'''Get changed values of one file
+
+		Arguments:
+
+			values {Dict[str, str]} -- Property name to current value (including fileName)
+
+		Keyword Arguments:
+
+			idx {int} -- Index of the file in the run (default: {0})
+
+		Returns:
+
+			Tuple[OrderedDict, str] -- Changed tags and new file name (None if it's not changed)
+		'''
+		new = self.apply(values, idx)
+		changed = OrderedDict((i, j) for (i, j) in new.items() if i != "fileName" and values.get(i, "") != j)
+		fileName = new.get("fileName")
+		return changed, fileName if fileName != values.get("fileName") else None
+
+	def toDict(self):
+		'''Get saved form of the recipe
+
+		Returns:
+
+			Dict -- Saved recipe
+		'''
+		return {"name": self.name, "startIndex": self.startIndex, "digits": self.digits, "steps": [i.toDict() for i in self.steps]}
+
+	@classmethod
+	def fromDict(cls, data):
+		'''Create recipe from its saved form
+
+		Arguments:
+
+			data {Dict} -- Saved recipe
+
+		Raises:
+
+			RecipeError -- If the recipe is not valid
+
+		Returns:
+
+			Recipe -- Recipe
+		'''
+		try:
+			return cls(data["name"], [stepFromDict(i) for i in data["steps"]], int(data.get("startIndex", 1)), int(data.get("digits", 0)))
+		except RecipeError:
+			raise
+		except (KeyError, TypeError, ValueError) as e:
+			raise RecipeError("Recipe is not valid: {}".format(e)) from e
+
+
+class RecipeStore(object):
+	'''Saved recipes (JSON file)
+
+	Keyword Arguments:
+
+		path {str} -- Path of the file (default: {DEFAULT_STORE})
+	'''
+	def __init__(self, path=DEFAULT_STORE):
+		self.path = path
+
+	def load(self):
+		'''Load all saved recipes
+
+		Raises:
+
+			RecipeError -- If the file is not valid
+
+		Returns:
+
+			OrderedDict -- Name to recipe
+		'''
+		try:
+			with open(self.path, encoding="utf-8") as f:
+				data = json.load(f, object_pairs_hook=OrderedDict)
+		except FileNotFoundError:
+			return OrderedDict()
+		except ValueError as e:
+			raise RecipeError("File with recipes is not valid: {}".format(e)) from e
+		return OrderedDict((i["name"], Recipe.fromDict(i)) for i in data.get("recipes", []))
+
+	def names(self):
+		'''Get names of saved recipes
+
+		Returns:
+
+			List[str] -- Names
+		'''
+		return list(self.load())
+
+	def get(self, name):
+		'''Get saved recipe by name
+
+		Arguments:
+
+			name {str} -- Name of the recipe
+
+		Raises:
+
+			RecipeError -- If there's no such recipe
+
+		Returns:
+
+			Recipe -- Recipe
+		'''
+		recipes = self.load()
+		if name not in recipes:
+			raise RecipeError("Recipe \"{}\" doesn't exist".format(name))
+		return recipes[name]
+
+	def save(self, recipe):
+		'''Save (or replace) the recipe (the file is replaced atomically)
+
+		Arguments:
+
+			recipe {Recipe} -- Recipe
+		'''
+		recipes = self.load()
+		recipes[recipe.name] = recipe
+		self.write(recipes)
+
+	def remove(self, name):
+		'''Remove saved recipe
+
+		Arguments:
+
+			name {str} -- Name of the recipe
+		'''
+		recipes = self.load()
+		if recipes.pop(name, None) is not None:
+			self.write(recipes)
+
+	def write(self, recipes):
+		'''Write all recipes to the file
+
+		Arguments:
+
+			recipes {OrderedDict} -- Name to recipe
+		'''
+		os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+		tmp = self.path + ".tmp"
+		with open(tmp, "w", encoding="utf-8") as f:
+			json.dump({"recipes": [i.toDict() for i in recipes.values()]}, f, ensure_ascii=False, indent="\t")
+		os.replace(tmp, self.path)
+
+
+# Result of the recipe for one file (error is None if it was successful)
+RecipeResult = namedtuple("RecipeResult", ["item", "changes", "path", "error"])
+
+
+def runRecipe(recipe, items, read, write, pathOf=lambda item: item, dryRun=False):
+	'''Run the recipe over the items in one streaming pass (one read and at most one write per file)
+
+	Files are renamed at the end as one batch (swaps are allowed, failed batch is rolled back), so new paths
+	in results are valid only after the whole run finished without error. If the recipe renames files,
+	conflicts of the renames are found by read only pass before anything is written
+
+	Arguments:
+
+		recipe {Recipe} -- Recipe
+		items {Iterable} -- Files (paths or e.g. mp3files, they're processed one by one)
+		read {Callable[[object], Dict[str, str]]} -- Reader of current values of the item (including fileName)
+		write {Callable[[object, Dict[str, str]], None]} -- Writer of changed tags of the item (not used in dry run)
+
+	Keyword Arguments:
+
+		pathOf {Callable[[object], str]} -- Getter of the item path (default: {identity})
+		dryRun {bool} -- Only compute changes, nothing is written (default: {False})
+
+	Raises:
+
+		FileExistsError -- If the renames are in conflict (nothing was written)
+		RenameError -- If the batch rename failed
+
+	Yields:
+
+		RecipeResult -- Result for each item (path is the new path)
+	'''
+	if recipe.renames and not dryRun:
+		items = list(items)
+		moves = [(pathOf(i.item), i.path) for i in runRecipe(recipe, items, read, write, pathOf, dryRun=True) if i.error is None and i.path != pathOf(i.item)]
+		conflicts = renamer.RenamePlan(moves).conflicts
+		if conflicts:
+			raise FileExistsError("Cannot rename files, \"{}\" already exists or is not valid".format(conflicts[0][0]))
+
+	moves = list()
+	for idx, item in enumerate(items):
+		path = pathOf(item)
+		try:
+			changes, fileName = recipe.changes(read(item), idx)
+			if changes and not dryRun:
+				write(item, changes)
+		except Exception as e:
+			yield RecipeResult(item, None, path, e)
+			continue
+		newPath = path if fileName is None else os.path.join(os.path.dirname(path), fileName)
+		if newPath != path:
+			moves.append((path, newPath))
+		yield RecipeResult(item, changes, newPath, None)
+
+	if moves and not dryRun:
+		renamer.RenamePlan(moves).execute()
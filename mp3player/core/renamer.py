@@ -0,0 +1,420 @@
+import os
+import errno
+import hashlib
+import shutil
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+__all__ = ["RenameError", "RenamePlan", "copyFile"]
+
+# Size of blocks for copying and verification of files
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+def isCaseInsensitive(directory, names=None):
+	'''Probe if the file system of the directory ignores case of names
+
+	Name of some entry is looked up with swapped case (nearest existing parent is probed if the directory doesn't exist)
+
+	Arguments:
+
+		directory {str} -- Absolute path of the directory
+
+	Keyword Arguments:
+
+		names {List[str]} -- Names of entries of the directory (default: {None} - listed)
+
+	Returns:
+
+		bool -- True/False
+	'''
+	while names is None:
+		try:
+			names = os.listdir(directory)
+		except OSError:
+			parent = os.path.dirname(directory)
+			if parent == directory:
+				names = list()
+			directory = parent
+	for name in names:
+		swapped = name.swapcase()
+		if swapped != name and swapped.swapcase() == name:
+			try:
+				return os.path.samefile(os.path.join(directory, name), os.path.join(directory, swapped))
+			except OSError:
+				return False
+	return os.path.normcase("A") == os.path.normcase("a")
+
+
+def temporaryPath(path):
+	'''Create unique temporary path next to the path
+
+	Arguments:
+
+		path {str} -- Path of the file
+
+	Returns:
+
+		str -- Temporary path
+	'''
+	return os.path.join(os.path.dirname(path), ".{}.{}.renaming".format(os.path.basename(path), uuid.uuid4().hex[:8]))
+
+
+def fileDigest(path):
+	'''Compute digest of file content
+
+	Arguments:
+
+		path {str} -- Path of the file
+
+	Returns:
+
+		bytes -- Digest
+	'''
+	digest = hashlib.blake2b()
+	with open(path, "rb") as f:
+		for block in iter(lambda: f.read(COPY_BLOCK_SIZE), b""):
+			digest.update(block)
+	return digest.digest()
+
+
+def copyFile(src, dst):
+	'''Copy file to other device (copy_file_range if possible), verify the copy and atomically publish it
+
+	Arguments:
+
+		src {str} -- Source path
+		dst {str} -- Destination path
+
+	Raises:
+
+		IOError -- If the copy doesn't match the source
+	'''
+	tmp = temporaryPath(dst)
+	try:
+		with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+			size = os.fstat(fsrc.fileno()).st_size
+			copied = 0
+			if hasattr(os, "copy_file_range"):
+				try:
+					while copied < size:
+						count = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - copied)
+						if count == 0:
+							break
+						copied += count
+				except OSError as e:
+					# Kernel can't copy between these file systems, copy it in user space
+					if copied > 0 or e.errno not in (errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+						raise
+			if copied < size:
+				fsrc.seek(copied)
+				shutil.copyfileobj(fsrc, fdst, COPY_BLOCK_SIZE)
+			fdst.flush()
+			os.fsync(fdst.fileno())
+		shutil.copystat(src, tmp)
+
+		if os.path.getsize(src) != os.path.getsize(tmp) or fileDigest(src) != fileDigest(tmp):
+			raise IOError("Copy of \"{}\" doesn't match the original".format(src))
+		os.rename(tmp, dst)
+	except BaseException:
+		if os.path.exists(tmp):
+			os.remove(tmp)
+		raise
+
+
+class RenameError(Exception):
+	'''Raised when a rename of the batch failed (already done renames are rolled back)
+
+	Arguments:
+
+		src {str} -- Source path of failed rename
+		dst {str} -- Destination path of failed rename
+		error {Exception} -- Original error
+		rolledBack {bool} -- If the rollback of the batch was successful
+	'''
+	def __init__(self, src, dst, error, rolledBack):
+		super().__init__("Cannot rename \"{}\" to \"{}\": {}{}".format(src, dst, error, "" if rolledBack else " (rollback failed)"))
+		self.src = src
+		self.dst = dst
+		self.error = error
+		self.rolledBack = rolledBack
+
+
+class RenamePlan(object):
+	'''Plan of batch rename
+
+	Every destination directory is listed once, conflicts are found using hash sets and renames are
+	ordered so chains and cycles (e.g. swap of two files) are executed through temporary names.
+	Renames within one file system are atomic, moves to other devices are copied in parallel,
+	verified and then the source is deleted
+
+	Arguments:
+
+		moves {Iterable[Tuple[str, str]]} -- Source and destination paths
+
+	Keyword Arguments:
+
+		workers {int} -- Number of threads copying files to other devices (default: {4})
+	'''
+	# Conflict types
+	EMPTY = "empty"
+	DUPLICATE = "duplicate"
+	EXISTS = "exists"
+
+	def __init__(self, moves, workers=4):
+		moves = list(moves)
+		self.workers = workers
+		self.sources = [os.path.abspath(src) for (src, dst) in moves]
+		self.targets = [dst if os.path.basename(dst) == "" else os.path.abspath(dst) for (src, dst) in moves]
+		# Case sensitivity and keys of entries by directory
+		self.snapshots = dict()
+		self.conflicts = self.findConflicts()
+		self.steps = list() if self.conflicts else self.orderSteps()
+		self.createdDirs = list()
+		self.devices = dict()
+
+	def listDir(self, directory):
+		'''List directory once and return keys of its entries (names are case folded only if the file system ignores case)
+
+		Arguments:
+
+			directory {str} -- Directory path
+
+		Returns:
+
+			Tuple[bool, Set[str]] -- If the file system ignores case and keys of entries
+		'''
+		key = os.path.normcase(directory)
+		if key not in self.snapshots:
+			try:
+				names = os.listdir(directory)
+			except (FileNotFoundError, NotADirectoryError):
+				names = None
+			insensitive = isCaseInsensitive(directory, names)
+			names = names or list()
+			self.snapshots[key] = (insensitive, {i.casefold() for i in names} if insensitive else set(names))
+		return self.snapshots[key]
+
+	def pathKey(self, path):
+		'''Key of the path used for conflict detection and ordering
+
+		Base name is case folded on case insensitive file systems, otherwise names differing only by case are different files
+
+		Arguments:
+
+			path {str} -- Absolute path
+
+		Returns:
+
+			Tuple[str, str] -- Normalized directory and key of the base name
+		'''
+		directory, name = os.path.split(path)
+		insensitive = self.listDir(directory)[0]
+		return (os.path.normcase(directory), name.casefold() if insensitive else name)
+
+	def findConflicts(self):
+		'''Find conflicts of the plan (empty names, duplicate destinations and existing files)
+
+		Returns:
+
+			List[Tuple[str, str]] -- Destination path and conflict type
+		'''
+		conflicts = list()
+		moving = {self.pathKey(src) for (src, dst) in zip(self.sources, self.targets) if src != dst}
+		seen = set()
+		for src, dst in zip(self.sources, self.targets):
+			if os.path.basename(dst) == "":
+				conflicts.append((dst, self.EMPTY))
+				continue
+			key = self.pathKey(dst)
+			if key in seen:
+				conflicts.append((dst, self.DUPLICATE))
+			seen.add(key)
+			if src != dst and key not in moving and key[1] in self.listDir(os.path.dirname(dst))[1]:
+				conflicts.append((dst, self.EXISTS))
+		return conflicts
+
+	def orderSteps(self):
+		'''Order renames so no file is overwritten (chains from the end, cycles through temporary name)
+
+		Returns:
+
+			List[Tuple[str, str]] -- Source and destination paths of individual renames
+		'''
+		steps = list()
+		pending = OrderedDict((self.pathKey(src), (src, dst)) for (src, dst) in zip(self.sources, self.targets) if src != dst)
+		while pending:
+			key, (src, dst) = next(iter(pending.items()))
+
+			# Follow the chain of files occupying the destinations (it can only end or return to its start)
+			chain = [key]
+			nextKey = self.pathKey(dst)
+			while nextKey in pending and nextKey != key:
+				chain.append(nextKey)
+				nextKey = self.pathKey(pending[nextKey][1])
+
+			# Cycle, so the first file is moved out of the way
+			if nextKey == key:
+				tmp = temporaryPath(src)
+				steps.append((src, tmp))
+				pending[key] = (tmp, dst)
+
+			for i in reversed(chain):
+				steps.append(pending.pop(i))
+		return steps
+
+	def device(self, directory):
+		'''Get device of the directory (or of its nearest existing parent)
+
+		Arguments:
+
+			directory {str} -- Directory path
+
+		Returns:
+
+			int -- Device identifier
+		'''
+		if directory not in self.devices:
+			parent = directory
+			while parent and not os.path.isdir(parent) and os.path.dirname(parent) != parent:
+				parent = os.path.dirname(parent)
+			self.devices[directory] = os.stat(parent).st_dev
+		return self.devices[directory]
+
+	def isCrossDevice(self, src, dst):
+		'''If the move has to copy the file to other device
+
+		Arguments:
+
+			src {str} -- Source path
+			dst {str} -- Destination path
+
+		Returns:
+
+			bool -- True/False
+		'''
+		return self.device(os.path.dirname(src)) != self.device(os.path.dirname(dst))
+
+	def makeDirs(self, directory):
+		'''Create directory (and parents) if needed, created directories are memorized for rollback
+
+		Arguments:
+
+			directory {str} -- Directory path
+		'''
+		missing = list()
+		while directory and not os.path.isdir(directory):
+			missing.append(directory)
+			directory = os.path.dirname(directory)
+		if missing:
+			os.makedirs(missing[0])
+			self.createdDirs.extend(reversed(missing))
+
+	def transfer(self, src, dst):
+		'''Move one file (atomic rename, or verified copy and delete across devices)
+
+		Arguments:
+
+			src {str} -- Source path
+			dst {str} -- Destination path
+		'''
+		try:
+			os.rename(src, dst)
+		except OSError as e:
+			if e.errno != errno.EXDEV:
+				raise
+			copyFile(src, dst)
+			os.remove(src)
+
+	def execute(self):
+		'''Execute the plan, if any move fails, all done moves are rolled back
+
+		Consecutive moves to other devices which don't depend on each other are copied in parallel
+
+		Raises:
+
+			FileExistsError -- If the plan has conflicts
+			RenameError -- If a move failed
+		'''
+		if self.conflicts:
+			raise FileExistsError("Cannot rename files, \"{}\" already exists or is not valid".format(self.conflicts[0][0]))
+
+		done = list()
+		batch = list()
+		batchSources = set()
+		for src, dst in self.steps:
+			crossDevice = self.isCrossDevice(src, dst)
+			if batch and (not crossDevice or self.pathKey(dst) in batchSources):
+				self.executeBatch(batch, done)
+				batch = list()
+				batchSources = set()
+			if crossDevice:
+				batch.append((src, dst))
+				batchSources.add(self.pathKey(src))
+			else:
+				self.executeBatch([(src, dst)], done)
+		if batch:
+			self.executeBatch(batch, done)
+
+	def executeBatch(self, batch, done):
+		'''Execute independent moves (in parallel if there's more of them)
+
+		Arguments:
+
+			batch {List[Tuple[str, str]]} -- Source and destination paths
+			done {List[Tuple[str, str]]} -- Already done moves (successful moves are appended)
+
+		Raises:
+
+			RenameError -- If a move failed (all done moves are rolled back)
+		'''
+		failed = None
+		try:
+			for src, dst in batch:
+				self.makeDirs(os.path.dirname(dst))
+		except OSError as e:
+			failed = (src, dst, e)
+
+		if failed is None and len(batch) == 1:
+			try:
+				self.transfer(*batch[0])
+				done.append(batch[0])
+			except (OSError, ValueError) as e:
+				failed = batch[0] + (e, )
+		elif failed is None:
+			with ThreadPoolExecutor(max_workers=self.workers) as executor:
+				futures = [(move, executor.submit(self.transfer, *move)) for move in batch]
+			for move, future in futures:
+				if future.exception() is None:
+					done.append(move)
+				elif failed is None:
+					failed = move + (future.exception(), )
+
+		if failed is not None:
+			src, dst, error = failed
+			raise RenameError(src, dst, error, self.rollback(done)) from error
+
+	def rollback(self, done):
+		'''Rollback done moves
+
+		Arguments:
+
+			done {List[Tuple[str, str]]} -- Done moves
+
+		Returns:
+
+			bool -- True if all moves were rolled back
+		'''
+		rolledBack = True
+		for src, dst in reversed(done):
+			try:
+				self.transfer(dst, src)
+			except (OSError, ValueError):
+				rolledBack = False
+		for directory in reversed(self.createdDirs):
+			try:
+				os.rmdir(directory)
+			except OSError:
+				pass
+		return rolledBack
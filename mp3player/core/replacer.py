@@ -0,0 +1,235 @@
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+try:
+	import re._parser as sre_parse
+except ImportError:
+	import sre_parse
+
+import mp3player.core.patterns as patterns
+
+__all__ = ["TextIndex", "FindReplace", "requiredLiteral", "compileFindReplace"]
+
+# Length of indexed substrings
+GRAM_SIZE = 3
+
+
+def grams(text):
+	'''Get all substrings of GRAM_SIZE characters of the case folded text
+
+	Arguments:
+
+		text {str} -- Indexed text
+
+	Returns:
+
+		Set[str] -- Substrings
+	'''
+	text = text.casefold()
+	return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def requiredLiteral(pattern):
+	'''Find the longest literal which must be contained in every string matched by the regex
+
+	Only literals on the top level of the regex (and in groups which aren't repeated) are used, so the
+	literal is safe for pre-filtering, it's never missing in a matching string
+
+	Arguments:
+
+		pattern {str} -- Regular expression
+
+	Returns:
+
+		str -- Literal (empty if there's no such literal)
+	'''
+	try:
+		parsed = sre_parse.parse(pattern)
+	except re.error:
+		return ""
+
+	longest = ""
+	current = list()
+	stack = [iter(parsed)]
+	while stack:
+		item = next(stack[-1], None)
+		if item is None:
+			stack.pop()
+			continue
+		op, value = item
+		if op == sre_parse.LITERAL:
+			current.append(chr(value))
+			continue
+		if len(current) > len(longest):
+			longest = "".join(current)
+		current = list()
+		# Group is matched exactly once, its content is part of the sequence
+		if op == sre_parse.SUBPATTERN:
+			stack.append(iter(value[-1]))
+	if len(current) > len(longest):
+		longest = "".join(current)
+	return longest
+
+
+class TextIndex(object):
+	'''Inverted index of case folded substrings of tag values
+
+	It's used to narrow down files to candidates which can contain the literal, before the regex is run
+
+	Arguments:
+
+		records {Iterable[Tuple[object, Dict[str, str]]]} -- Keys (e.g. mp3files) and their values by property name
+	'''
+	def __init__(self, records=()):
+		self.postings = defaultdict(set)
+		self.keys = dict()
+		for key, values in records:
+			self.add(key, values)
+
+	def __len__(self):
+		return len(self.keys)
+
+	def add(self, key, values):
+		'''Add (or update) indexed values of the key
+
+		Arguments:
+
+			key {object} -- Key of the values (hashable)
+			values {Dict[str, str]} -- Values by property name
+		'''
+		self.remove(key)
+		self.keys[key] = dict(values)
+		for property, value in values.items():
+			for gram in grams(value):
+				self.postings[(property, gram)].add(key)
+
+	def remove(self, key):
+		'''Remove the key from the index
+
+		Arguments:
+
+			key {object} -- Key of the values
+		'''
+		values = self.keys.pop(key, None)
+		if values is not None:
+			for property, value in values.items():
+				for gram in grams(value):
+					self.postings[(property, gram)].discard(key)
+
+	def candidates(self, literal, properties):
+		'''Get keys whose values of the properties can contain the literal
+
+		Arguments:
+
+			literal {str} -- Literal which must be contained (shorter than GRAM_SIZE means every key)
+			properties {Iterable[str]} -- Searched properties
+
+		Returns:
+
+			List[object] -- Keys in the order they were added
+		'''
+		needed = grams(literal)
+		if not needed:
+			return list(self.keys)
+		found = set()
+		for property in properties:
+			keys = None
+			for gram in sorted(needed, key=lambda gram: len(self.postings.get((property, gram), ()))):
+				keys = set(self.postings.get((property, gram), ())) if keys is None else keys & self.postings.get((property, gram), set())
+				if not keys:
+					break
+			found |= keys
+		return [key for key in self.keys if key in found]
+
+
+class FindReplace(object):
+	'''Compiled find and replace over tag values
+
+	Arguments:
+
+		pattern {str} -- Regular expression from user input
+		replacement {str} -- Replacement (\\1 and \\g<name> refer to groups)
+
+	Keyword Arguments:
+
+		ignoreCase {bool} -- Case insensitive search (default: {False})
+
+	Raises:
+
+		PatternError -- If the pattern or the replacement is not valid
+	'''
+	def __init__(self, pattern, replacement, ignoreCase=False):
+		self.pattern = pattern
+		self.replacement = replacement
+		try:
+			self.regex = re.compile(pattern, re.IGNORECASE if ignoreCase else 0)
+			# Validate the replacement before it's used for every value
+			self.regex.sub(replacement, "")
+		except re.error as e:
+			raise patterns.PatternError(pattern, e) from e
+		self.literal = requiredLiteral(pattern)
+
+	def replace(self, value):
+		'''Replace all matches in the value
+
+		Arguments:
+
+			value {str} -- Tag value
+
+		Raises:
+
+			PatternError -- If the replacement refers to a group which doesn't exist
+
+		Returns:
+
+			str -- New value (the same if nothing was found)
+		'''
+		try:
+			return self.regex.sub(self.replacement, value)
+		except re.error as e:
+			raise patterns.PatternError(self.replacement, e) from e
+
+	def changes(self, values, properties):
+		'''Get changed values of the properties
+
+		Arguments:
+
+			values {Callable[[str], str]} -- Getter of property value by property name
+			properties {Iterable[str]} -- Searched properties
+
+		Returns:
+
+			List[Tuple[str, str, str]] -- Property name, old value and new value of every changed property
+		'''
+		found = list()
+		for property in properties:
+			old = values(property)
+			new = self.replace(old)
+			if new != old:
+				found.append((property, old, new))
+		return found
+
+
+@lru_cache(maxsize=64)
+def compileFindReplace(pattern, replacement, ignoreCase=False):
+	'''Compile find and replace (cached, so it's compiled once per edit)
+
+	Arguments:
+
+		pattern {str} -- Regular expression from user input
+		replacement {str} -- Replacement
+
+	Keyword Arguments:
+
+		ignoreCase {bool} -- Case insensitive search (default: {False})
+
+	Raises:
+
+		PatternError -- If the pattern or the replacement is not valid
+
+	Returns:
+
+		FindReplace -- Compiled find and replace
+	'''
+	return FindReplace(pattern, replacement, ignoreCase)
@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+
+import mp3player.core.tags as tags
+from mp3player.core.track import Track
+
+__all__ = ["SnapshotError", "DEFAULT_PATH", "writeSnapshot", "readSnapshot"]
+
+# Default file with the last session
+DEFAULT_PATH = os.path.join(os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share"), "mp3player", "session.snap")
+# Identification and version of the format
+MAGIC = b"MP3S"
+VERSION = 1
+# Header: magic, version, number of rows, number of columns, length of state
+HEADER = struct.Struct("<4sIIII")
+# Column header: kind, length of name, length of data
+COLUMN = struct.Struct("<BHQ")
+# Kinds of columns (strings are stored as offsets and one UTF-8 blob, integers as int64 array)
+STRING = 0
+INTEGER = 1
+# Columns of tracks
+STRING_COLUMNS = ["path"] + list(tags.TEXT_TAGS)
+INTEGER_COLUMNS = ["length", "bitrate", "mtime", "size"]
+
+
+class SnapshotError(ValueError):
+	'''Raised when the snapshot can't be read (missing, damaged or from another version)
+	'''
+	pass
+
+
+def packStrings(values):
+	'''Pack strings to the column data (offsets are uint32, so the column can be sliced without parsing)
+
+	Arguments:
+
+		values {List[str]} -- Values
+
+	Returns:
+
+		bytes -- Column data
+	'''
+	# Paths with bytes which aren't valid UTF-8 are decoded by the file system encoding with surrogateescape
+	blobs = [i.encode("utf-8", "surrogateescape") for i in values]
+	offsets = array("I", [0])
+	for blob in blobs:
+		offsets.append(offsets[-1] + len(blob))
+	if sys.byteorder == "big":
+		offsets.byteswap()
+	return offsets.tobytes() + b"".join(blobs)
+
+
+def unpackStrings(data, rows):
+	'''Unpack strings from the column data
+
+	Arguments:
+
+		data {memoryview} -- Column data
+		rows {int} -- Number of rows
+
+	Returns:
+
+		List[str] -- Values
+	'''
+	offsets = array("I")
+	offsets.frombytes(data[:(rows + 1) * offsets.itemsize])
+	if sys.byteorder == "big":
+		offsets.byteswap()
+	blob = data[(rows + 1) * offsets.itemsize:].tobytes()
+	return [blob[offsets[i]:offsets[i + 1]].decode("utf-8", "surrogateescape") for i in range(rows)]
+
+
+def packIntegers(values):
+	'''Pack integers to the column data (little endian int64)
+
+	Arguments:
+
+		values {List[int]} -- Values
+
+	Returns:
+
+		bytes -- Column data
+	'''
+	packed = array("q", values)
+	if sys.byteorder == "big":
+		packed.byteswap()
+	return packed.tobytes()
+
+
+def unpackIntegers(data, rows):
+	'''Unpack integers from the column data
+
+	Arguments:
+
+		data {memoryview} -- Column data
+		rows {int} -- Number of rows
+
+	Returns:
+
+		List[int] -- Values
+	'''
+	values = array("q")
+	values.frombytes(data[:rows * values.itemsize])
+	if sys.byteorder == "big":
+		values.byteswap()
+	return values.tolist()
+
+
+def writeSnapshot(tracks, state, path=DEFAULT_PATH):
+	'''Write tracks (in the order of the table) and player state to the snapshot (atomically)
+
+	Arguments:
+
+		tracks {List[Track]} -- Tracks
+		state {Dict} -- Player state (must be serializable to JSON)
+
+	Keyword Arguments:
+
+		path {str} -- Path to snapshot (default: {DEFAULT_PATH})
+	'''
+	columns = list()
+	columns.append(("path", STRING, packStrings([i.path for i in tracks])))
+	for name in STRING_COLUMNS[1:]:
+		columns.append((name, STRING, packStrings([i.values[name] for i in tracks])))
+	for name in INTEGER_COLUMNS:
+		columns.append((name, INTEGER, packIntegers([int(getattr(i, name)) for i in tracks])))
+	stateData = json.dumps(state).encode("utf-8")
+
+	os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+	temporary = path + ".tmp"
+	with open(temporary, "wb") as f:
+		f.write(HEADER.pack(MAGIC, VERSION, len(tracks), len(columns), len(stateData)))
+		f.write(stateData)
+		for name, kind, data in columns:
+			nameData = name.encode("utf-8")
+			f.write(COLUMN.pack(kind, len(nameData), len(data)))
+			f.write(nameData)
+			f.write(data)
+	os.replace(temporary, path)
+
+
+def readSnapshot(path=DEFAULT_PATH):
+	'''Read tracks and player state from the snapshot (the file is memory mapped, columns are decoded at once)
+
+	Tracks are not validated, use Track.isModified to find files changed since the snapshot
+
+	Keyword Arguments:
+
+		path {str} -- Path to snapshot (default: {DEFAULT_PATH})
+
+	Raises:
+
+		SnapshotError -- If the snapshot can't be read
+
+	Returns:
+
+		Tuple[List[Track], Dict] -- Tracks and player state
+	'''
+	try:
+		with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as data:
+			return parseSnapshot(data)
+	except (OSError, ValueError, struct.error) as e:
+		raise SnapshotError("Snapshot \"{}\" can't be read: {}".format(path, e)) from e
+
+
+def parseSnapshot(data):
+	'''Parse snapshot data
+
+	Arguments:
+
+		data {memoryview} -- Whole snapshot
+
+	Raises:
+
+		SnapshotError -- If the format is not valid
+
+	Returns:
+
+		Tuple[List[Track], Dict] -- Tracks and player state
+	'''
+	magic, version, rows, count, stateLength = HEADER.unpack_from(data)
+	if magic != MAGIC or version != VERSION:
+		raise SnapshotError("unknown format")
+	position = HEADER.size
+	state = json.loads(str(data[position:position + stateLength], "utf-8"))
+	position += stateLength
+
+	columns = dict()
+	for _ in range(count):
+		kind, nameLength, dataLength = COLUMN.unpack_from(data, position)
+		position += COLUMN.size
+		name = str(data[position:position + nameLength], "utf-8")
+		position += nameLength
+		column = data[position:position + dataLength]
+		position += dataLength
+		columns[name] = unpackStrings(column, rows) if kind == STRING else unpackIntegers(column, rows)
+		# Release the view, so the mapping can be closed
+		column.release()
+
+	missing = [i for i in STRING_COLUMNS + INTEGER_COLUMNS if i not in columns]
+	if missing:
+		raise SnapshotError("missing columns {}".format(", ".join(missing)))
+	tracks = list()
+	names = STRING_COLUMNS[1:]
+	for path, texts, numbers in zip(columns["path"], zip(*(columns[i] for i in names)), zip(*(columns[i] for i in INTEGER_COLUMNS))):
+		track = Track(path, None, None, *numbers)
+		track.values.update(zip(names, texts))
+		tracks.append(track)
+	return tracks, state
@@ -0,0 +1,219 @@
+import os
+import csv
+import json
+from collections import OrderedDict
+
+import mp3player.core.tags as tags
+import mp3player.core.renamer as renamer
+
+__all__ = ["TABLE_FORMATS", "COLUMNS", "EDITABLE_COLUMNS", "TableEdit", "trackRow", "writeTable", "iterTable", "diffTable", "checkRenames"]
+
+# Supported formats of exported tables
+TABLE_FORMATS = ["csv", "jsonl"]
+# Columns which can be changed by the re-import (fileName renames the file)
+EDITABLE_COLUMNS = ["fileName"] + list(tags.TEXT_TAGS)
+# All exported columns (path identifies the file, audio informations are read only)
+COLUMNS = ["path"] + EDITABLE_COLUMNS + ["length", "bitrate"]
+
+
+class TableEdit(object):
+	'''Changed cells of one file found by the re-import
+
+	Arguments:
+
+		path {str} -- Path to mp3 file
+
+	Keyword Arguments:
+
+		changes {Dict[str, str]} -- New values by property name (fileName means rename) (default: {None} - none)
+		before {Dict[str, str]} -- Current values of changed properties (default: {None} - none)
+		error {Exception} -- Error of the row (default: {None})
+	'''
+	__slots__ = ["path", "changes", "before", "error"]
+
+	def __init__(self, path, changes=None, before=None, error=None):
+		self.path = path
+		self.changes = changes or dict()
+		self.before = before or dict()
+		self.error = error
+
+	@property
+	def values(self):
+		'''Changed text tags (without fileName)
+		'''
+		return {i: j for (i, j) in self.changes.items() if i != "fileName"}
+
+	@property
+	def newPath(self):
+		'''Path of the file after the rename (the same path if it isn't renamed)
+		'''
+		if "fileName" not in self.changes:
+			return self.path
+		return os.path.join(os.path.dirname(self.path), self.changes["fileName"])
+
+
+def tableFormat(path):
+	'''Get format of the table from its extension
+
+	Arguments:
+
+		path {str} -- Path to table
+
+	Raises:
+
+		ValueError -- If the format is not supported
+
+	Returns:
+
+		str -- csv or jsonl
+	'''
+	extension = os.path.splitext(path)[1][1:].lower()
+	if extension not in TABLE_FORMATS:
+		raise ValueError("Unsupported table format \"{}\" (use one of {})".format(extension, ", ".join(TABLE_FORMATS)))
+	return extension
+
+
+def trackRow(track):
+	'''Create row of the table from the track
+
+	Arguments:
+
+		track {Track} -- Track
+
+	Returns:
+
+		OrderedDict -- Values by column
+	'''
+	row = OrderedDict(path=track.path, fileName=track.baseName)
+	row.update(track.values)
+	row["length"] = track.length
+	row["bitrate"] = track.bitrate
+	return row
+
+
+def writeTable(path, rows):
+	'''Write rows to the table (rows are streamed to the file, which replaces the old one at the end)
+
+	Arguments:
+
+		path {str} -- Path to table (format is given by extension)
+		rows {Iterable[Dict]} -- Values by column (see COLUMNS)
+
+	Raises:
+
+		ValueError -- If the format is not supported
+
+	Returns:
+
+		int -- Number of written rows
+	'''
+	kind = tableFormat(path)
+	count = 0
+	temporary = path + ".tmp"
+	# Spreadsheets recognize UTF-8 of CSV files by BOM
+	with open(temporary, "w", encoding="utf-8-sig" if kind == "csv" else "utf-8", newline="") as f:
+		if kind == "csv":
+			writer = csv.DictWriter(f, COLUMNS, extrasaction="ignore")
+			writer.writeheader()
+			for row in rows:
+				writer.writerow(row)
+				count += 1
+		else:
+			for row in rows:
+				f.write(json.dumps({i: row[i] for i in COLUMNS}, ensure_ascii=False) + "\n")
+				count += 1
+	os.replace(temporary, path)
+	return count
+
+
+def iterTable(path):
+	'''Read rows of the table one by one
+
+	Arguments:
+
+		path {str} -- Path to table (.csv or .jsonl)
+
+	Raises:
+
+		ValueError -- If the format is not supported, the line is not valid or there's no path column
+		OSError -- If the table can't be read
+
+	Yields:
+
+		Dict[str, str] -- Values by column (only columns present in the table)
+	'''
+	kind = tableFormat(path)
+	with open(path, encoding="utf-8-sig", newline="") as f:
+		if kind == "csv":
+			reader = csv.DictReader(f)
+			if reader.fieldnames is None or "path" not in reader.fieldnames:
+				raise ValueError("Table \"{}\" has no path column".format(path))
+			for row in reader:
+				yield {i: j for (i, j) in row.items() if i is not None and j is not None}
+			return
+		for number, line in enumerate(f, 1):
+			if not line.strip():
+				continue
+			try:
+				row = json.loads(line)
+			except ValueError as e:
+				raise ValueError("Line {} of \"{}\" is not valid: {}".format(number, path, e)) from e
+			if not isinstance(row, dict) or "path" not in row:
+				raise ValueError("Line {} of \"{}\" has no path".format(number, path))
+			yield {i: "" if j is None else str(j) for (i, j) in row.items()}
+
+
+def diffTable(rows, current):
+	'''Compare rows of the edited table with current values, only changed cells are returned
+
+	Columns missing in the table and read only columns are ignored, so the table can be trimmed in a spreadsheet
+
+	Arguments:
+
+		rows {Iterable[Dict[str, str]]} -- Rows of the table
+		current {Callable[[str], Dict[str, str]]} -- Getter of current values of the file (None if the file is unknown)
+
+	Yields:
+
+		TableEdit -- Changes of one file (or error of the row), files without changes are skipped
+	'''
+	seen = set()
+	for row in rows:
+		path = os.path.abspath(row["path"])
+		if path in seen:
+			yield TableEdit(path, error=ValueError("File is in the table more than once"))
+			continue
+		seen.add(path)
+		values = current(path)
+		if values is None:
+			yield TableEdit(path, error=ValueError("File is not loaded"))
+			continue
+
+		changes = dict()
+		before = dict()
+		for column in EDITABLE_COLUMNS:
+			if column in row and row[column] != values[column]:
+				changes[column] = row[column]
+				before[column] = values[column]
+		if changes.get("fileName") == "" or os.sep in changes.get("fileName", ""):
+			yield TableEdit(path, changes, before, ValueError("Invalid file name \"{}\"".format(changes["fileName"])))
+		elif changes:
+			yield TableEdit(path, changes, before)
+
+
+def checkRenames(edits):
+	'''Check renames of the edits before anything is written (edits with error are skipped)
+
+	Arguments:
+
+		edits {List[TableEdit]} -- Edits from diffTable
+
+	Raises:
+
+		FileExistsError -- If the renames are in conflict
+	'''
+	moves = [(i.path, i.newPath) for i in edits if i.error is None and i.newPath != i.path]
+	if moves:
+		conflicts = renamer.RenamePlan(moves).conflicts
+		if conflicts:
+			raise FileExistsError("Cannot rename files, \"{}\" already exists or is not valid".format(conflicts[0][0]))
@@ -0,0 +1,219 @@
+import os
+from collections import OrderedDict
+
+__all__ = ["TEXT_TAGS", "COVER_EXTENSIONS", "readFile", "readTags", "writeTags", "readCover", "writeCover", "coverMimeFromPath", "coverMimeFromBytes"]
+
+# Text tags which can be read and written without Qt (property name to ID3 frame)
+TEXT_TAGS: OrderedDict = OrderedDict({
+	"songName": "TIT2",
+	"artist": "TPE1",
+	"album": "TALB",
+	"track": "TRCK",
+	"year": "TDRC",
+	"genre": "TCON",
+	"comment": "COMM",
+})
+# Frame of cover image
+COVER_TAG = "APIC"
+# Extensions of images which can be used as cover
+COVER_EXTENSIONS = ["jpg", "jpeg", "gif", "png"]
+# Leading bytes of image formats (MIME type is detected from data, the extension can lie)
+COVER_SIGNATURES = [
+	(b"\xff\xd8\xff", "image/jpeg"),
+	(b"\x89PNG\r\n\x1a\n", "image/png"),
+	(b"GIF87a", "image/gif"),
+	(b"GIF89a", "image/gif"),
+]
+
+
+def coverMimeFromPath(path):
+	'''Get MIME type of cover image from its extension
+
+	Arguments:
+
+		path {str} -- Path to image
+
+	Returns:
+
+		str -- MIME type
+	'''
+	extension = path.split(".")[-1].lower()
+	if extension == "jpg":
+		extension = "jpeg"
+	return "image/" + extension
+
+
+def coverMimeFromBytes(data):
+	'''Get MIME type of cover image from its leading bytes
+
+	Arguments:
+
+		data {bytes} -- Image data
+
+	Returns:
+
+		str -- MIME type (None if the format is not supported)
+	'''
+	for signature, mime in COVER_SIGNATURES:
+		if data.startswith(signature):
+			return mime
+	return None
+
+
+def openFile(path):
+	'''Load mp3 file with ID3 tags (mutagen is imported at first use, so the player starts without waiting for it)
+
+	Arguments:
+
+		path {str} -- Path to mp3 file
+
+	Returns:
+
+		MP3 -- Loaded mp3 file
+	'''
+	from mutagen.mp3 import MP3
+	from mutagen.id3 import ID3
+	return MP3(path, ID3=ID3)
+
+
+def createFrame(tag, **kwargs):
+	'''Create UTF-8 ID3 frame
+
+	Arguments:
+
+		tag {str} -- Frame identifier (e.g. TIT2, APIC)
+		**kwargs -- Arguments of the frame (text, data, ...)
+
+	Returns:
+
+		mutagen.id3.Frame -- Frame
+	'''
+	import mutagen.id3
+	return getattr(mutagen.id3, tag)(encoding=3, **kwargs)
+
+
+def readFile(path, cover=False):
+	'''Read text tags and audio informations of mp3 file (the file is loaded once)
+
+	Arguments:
+
+		path {str} -- Path to mp3 file
+
+	Keyword Arguments:
+
+		cover {bool} -- If bytes of the cover image should be included in informations (default: {False})
+
+	Returns:
+
+		Tuple[OrderedDict, Dict] -- Property name to value (including fileName) and audio informations (length, bitrate, cover)
+	'''
+	values = OrderedDict((i, "") for i in TEXT_TAGS)
+	values["fileName"] = os.path.basename(path)
+	audio = openFile(path)
+	if audio.tags is not None:
+		for property, tag in TEXT_TAGS.items():
+			for key in audio.tags.keys():
+				if tag in key:
+					values[property] = str(audio.tags[key].text[0])
+	info = {"length": int(audio.info.length), "bitrate": audio.info.bitrate}
+	if cover:
+		info["cover"] = findCover(audio)
+	del audio
+	return values, info
+
+
+def readTags(path):
+	'''Read text tags of mp3 file (file name is included as fileName property)
+
+	Arguments:
+
+		path {str} -- Path to mp3 file
+
+	Returns:
+
+		OrderedDict -- Property name to value (empty string if the tag is missing)
+	'''
+	return readFile(path)[0]
+
+
+def writeTags(path, values):
+	'''Write text tags to mp3 file at once (the file is loaded and saved only once)
+
+	Arguments:
+
+		path {str} -- Path to mp3 file
+		values {Dict[str, str]} -- Property name to value (empty value removes the tag, other properties are ignored)
+	'''
+	audio = openFile(path)
+	if audio.tags is None:
+		audio.add_tags()
+	for property, value in values.items():
+		tag = TEXT_TAGS.get(property)
+		if tag is None:
+			continue
+		if value == "":
+			if tag in audio:
+				audio.pop(tag)
+		else:
+			audio[tag] = createFrame(tag, text=value)
+	audio.save(v2_version=4)
+	del audio
+
+
+def findCover(audio):
+	'''Find bytes of the cover image in loaded file
+
+	Arguments:
+
+		audio {MP3} -- Loaded mp3 file
+
+	Returns:
+
+		bytes -- Image data (None if there's no cover)
+	'''
+	if audio.tags is not None:
+		for key in audio.tags.keys():
+			if COVER_TAG in key:
+				return audio.tags.get(key).data
+	return None
+
+
+def readCover(path):
+	'''Read bytes of the cover image
+
+	Arguments:
+
+		path {str} -- Path to mp3 file
+
+	Returns:
+
+		bytes -- Image data (None if there's no cover)
+	'''
+	audio = openFile(path)
+	data = findCover(audio)
+	del audio
+	return data
+
+
+def writeCover(path, data, mime="image/jpeg"):
+	'''Replace cover image of mp3 file (all cover frames are removed first)
+
+	Arguments:
+
+		path {str} -- Path to mp3 file
+		data {bytes} -- Image data (None removes the cover)
+
+	Keyword Arguments:
+
+		mime {str} -- MIME type of the image (default: {"image/jpeg"})
+	'''
+	audio = openFile(path)
+	if audio.tags is None:
+		audio.add_tags()
+	for key in list(audio.keys()):
+		if COVER_TAG in key:
+			audio.pop(key, None)
+	if data is not None:
+		audio[COVER_TAG] = createFrame(COVER_TAG, mime=mime, type=3, data=data)
+	audio.save(v2_version=4)
+	del audio
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from functools import wraps
+
+__all__ = ["TRACER", "Tracer", "span", "traced", "count"]
+
+# Number of spans kept for the trace export (the oldest are dropped)
+EVENT_LIMIT = 200000
+
+
+class NullSpan(object):
+	'''Span used when the tracing is disabled (it does nothing)
+	'''
+	__slots__ = []
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span(object):
+	'''Timing of one run of the hot path
+
+	Arguments:
+
+		tracer {Tracer} -- Tracer which records the span
+		name {str} -- Name of the hot path
+	'''
+	__slots__ = ["tracer", "name", "start"]
+
+	def __init__(self, tracer, name):
+		self.tracer = tracer
+		self.name = name
+		self.start = 0
+
+	def __enter__(self):
+		self.start = time.perf_counter_ns()
+		return self
+
+	def __exit__(self, *args):
+		self.tracer.record(self.name, self.start, time.perf_counter_ns() - self.start)
+		return False
+
+
+class Tracer(object):
+	'''Switchable timing spans and counters of the hot paths
+
+	When it's disabled, span returns shared no-op span and count returns at once. When it's enabled,
+	aggregates (count, total and maximal duration) are kept for every name and spans are kept for the
+	trace export (Chrome trace event format, opened by chrome://tracing or ui.perfetto.dev).
+	Spans of worker processes are not recorded
+
+	Keyword Arguments:
+
+		eventLimit {int} -- Number of spans kept for the trace export (default: {EVENT_LIMIT})
+	'''
+	def __init__(self, eventLimit=EVENT_LIMIT):
+		self.enabled = False
+		self.lock = threading.Lock()
+		# Spans (name, start, duration, thread id) and counter changes (name, time, None, value)
+		self.events = deque(maxlen=eventLimit)
+		self.aggregates = dict()
+		self.counters = dict()
+		self.origin = time.perf_counter_ns()
+
+	def enable(self, enabled=True):
+		'''Switch the tracing on (or off), recorded data are kept
+
+		Keyword Arguments:
+
+			enabled {bool} -- If the tracing is on (default: {True})
+		'''
+		self.enabled = enabled
+
+	def clear(self):
+		'''Forget recorded spans and counters
+		'''
+		with self.lock:
+			self.events.clear()
+			self.aggregates.clear()
+			self.counters.clear()
+
+	def span(self, name):
+		'''Create span of the hot path (use it as context manager)
+
+		Arguments:
+
+			name {str} -- Name of the hot path
+
+		Returns:
+
+			Span -- Span (no-op span if the tracing is disabled)
+		'''
+		if not self.enabled:
+			return NULL_SPAN
+		return Span(self, name)
+
+	def record(self, name, start, duration):
+		'''Record finished span
+
+		Arguments:
+
+			name {str} -- Name of the hot path
+			start {int} -- Start in ns (perf_counter_ns)
+			duration {int} -- Duration in ns
+		'''
+		with self.lock:
+			self.events.append((name, start, duration, threading.get_ident()))
+			aggregate = self.aggregates.get(name)
+			if aggregate is None:
+				self.aggregates[name] = [1, duration, duration]
+			else:
+				aggregate[0] += 1
+				aggregate[1] += duration
+				if duration > aggregate[2]:
+					aggregate[2] = duration
+
+	def count(self, name, value=1):
+		'''Increase the counter
+
+		Arguments:
+
+			name {str} -- Name of the counter
+
+		Keyword Arguments:
+
+			value {int} -- Increment (default: {1})
+		'''
+		if not self.enabled:
+			return
+		with self.lock:
+			total = self.counters.get(name, 0) + value
+			self.counters[name] = total
+			self.events.append((name, time.perf_counter_ns(), None, total))
+
+	def summary(self):
+		'''Get aggregates of the spans (sorted by total time) and counters
+
+		Returns:
+
+			Tuple[List[Tuple[str, int, float, float]], Dict[str, int]] -- Name, count, total and maximal duration in ms of spans and values of counters
+		'''
+		with self.lock:
+			spans = [(i, j[0], j[1] / 1e6, j[2] / 1e6) for (i, j) in self.aggregates.items()]
+			counters = dict(self.counters)
+		spans.sort(key=lambda i: i[2], reverse=True)
+		return spans, counters
+
+	def exportTrace(self, path):
+		'''Write recorded spans and counters to the trace file (Chrome trace event format, atomically)
+
+		Arguments:
+
+			path {str} -- Path to trace file (.json)
+
+		Returns:
+
+			int -- Number of written events
+		'''
+		with self.lock:
+			events = list(self.events)
+		pid = os.getpid()
+		threads = dict()
+		traceEvents = list()
+		for name, start, duration, value in events:
+			timestamp = (start - self.origin) / 1000
+			if duration is None:
+				traceEvents.append({"name": name, "ph": "C", "ts": timestamp, "pid": pid, "args": {"value": value}})
+			else:
+				tid = threads.setdefault(value, len(threads) + 1)
+				traceEvents.append({"name": name, "cat": name.split(".")[0], "ph": "X", "ts": timestamp, "dur": duration / 1000, "pid": pid, "tid": tid})
+
+		temporary = path + ".tmp"
+		with open(temporary, "w", encoding="utf-8") as f:
+			json.dump({"traceEvents": traceEvents, "displayTimeUnit": "ms"}, f)
+		os.replace(temporary, path)
+		return len(traceEvents)
+
+
+# Tracer of the application
+TRACER = Tracer()
+
+
+def span(name):
+	'''Create span of the hot path in the application tracer
+
+	Arguments:
+
+		name {str} -- Name of the hot path
+
+	Returns:
+
+		Span -- Span (no-op span if the tracing is disabled)
+	'''
+	return TRACER.span(name)
+
+
+def count(name, value=1):
+	'''Increase the counter of the application tracer
+
+	Arguments:
+
+		name {str} -- Name of the counter
+
+	Keyword Arguments:
+
+		value {int} -- Increment (default: {1})
+	'''
+	TRACER.count(name, value)
+
+
+def traced(name):
+	'''Decorator measuring every call of the function (the function is called directly when the tracing is disabled)
+
+	Arguments:
+
+		name {str} -- Name of the hot path
+
+	Returns:
+
+		Callable -- Decorator
+	'''
+	def decorator(function):
+		@wraps(function)
+		def wrapper(*args, **kwargs):
+			if not TRACER.enabled:
+				return function(*args, **kwargs)
+			with Span(TRACER, name):
+				return function(*args, **kwargs)
+		return wrapper
+	return decorator
@@ -0,0 +1,205 @@
+import os
+import multiprocessing
+from collections import OrderedDict
+
+import mp3player.core.tags as tags
+import mp3player.core.tracing as tracing
+
+__all__ = ["PROPERTIES", "Track", "loadTracks"]
+
+# Properties of the track (fileName is not a tag, it's the base name of the path)
+PROPERTIES = ["fileName"] + list(tags.TEXT_TAGS)
+# Minimal number of files loaded by worker processes (smaller batches are loaded directly)
+PARALLEL_LOAD = 32
+
+
+class Track(object):
+	'''Plain record of one mp3 file (path, text tags, cover bytes and audio informations)
+
+	It doesn't depend on Qt, so it can be created in worker processes and passed between threads
+
+	Arguments:
+
+		path {str} -- Path to mp3 file
+
+	Keyword Arguments:
+
+		values {Dict[str, str]} -- Text tags by property name (default: {None} - empty)
+		cover {bytes} -- Cover image data (default: {None})
+		length {int} -- Length of the song in seconds (default: {0})
+		bitrate {int} -- Bitrate of the song (default: {0})
+		mtime {int} -- Modification time of the file in ns when it was read (default: {0} - unknown)
+		size {int} -- Size of the file when it was read (default: {0})
+	'''
+	__slots__ = ["path", "values", "cover", "length", "bitrate", "mtime", "size"]
+
+	def __init__(self, path, values=None, cover=None, length=0, bitrate=0, mtime=0, size=0):
+		self.path = path
+		self.values = OrderedDict.fromkeys(tags.TEXT_TAGS, "")
+		if values is not None:
+			self.values.update((i, j) for (i, j) in values.items() if i in tags.TEXT_TAGS)
+		self.cover = cover
+		self.length = length
+		self.bitrate = bitrate
+		self.mtime = mtime
+		self.size = size
+
+	@classmethod
+	@tracing.traced("track.load")
+	def load(cls, path, cover=True):
+		'''Load track from mp3 file (the file is read once)
+
+		Arguments:
+
+			path {str} -- Path to mp3 file
+
+		Keyword Arguments:
+
+			cover {bool} -- If the cover image should be loaded (default: {True})
+
+		Returns:
+
+			Track -- Loaded track
+		'''
+		stat = os.stat(path)
+		values, info = tags.readFile(path, cover=cover)
+		return cls(path, values, info.get("cover"), info["length"], info["bitrate"], stat.st_mtime_ns, stat.st_size)
+
+	@property
+	def baseDir(self):
+		return os.path.dirname(self.path)
+
+	@property
+	def baseName(self):
+		return os.path.basename(self.path)
+
+	def getProperty(self, propertyName):
+		'''Get property value by property name
+
+		Arguments:
+
+			propertyName {str} -- Property name
+
+		Returns:
+
+			str -- Property value
+		'''
+		if propertyName == "fileName":
+			return self.baseName
+		return self.values[propertyName]
+
+	def isModified(self):
+		'''Check if the file was changed since it was read (by modification time and size)
+
+		Raises:
+
+			OSError -- If the file doesn't exist any more
+
+		Returns:
+
+			bool -- True if the record is outdated
+		'''
+		stat = os.stat(self.path)
+		return stat.st_mtime_ns != self.mtime or stat.st_size != self.size
+
+	def updateStat(self):
+		'''Remember modification time and size of the file after it was written by this record
+		'''
+		stat = os.stat(self.path)
+		self.mtime = stat.st_mtime_ns
+		self.size = stat.st_size
+
+	def setPath(self, path):
+		'''Set new path of the track (after the file was moved on the disk)
+
+		Arguments:
+
+			path {str} -- New path of a file
+		'''
+		self.path = path
+
+	@tracing.traced("track.save")
+	def save(self, values):
+		'''Save text tags to the file at once and update the record
+
+		Arguments:
+
+			values {Dict[str, str]} -- Property name to value (without fileName)
+		'''
+		tags.writeTags(self.path, values)
+		self.values.update(values)
+		self.updateStat()
+
+	@tracing.traced("track.saveCover")
+	def saveCover(self, data, mime="image/jpeg"):
+		'''Save cover image to the file and update the record
+
+		Arguments:
+
+			data {bytes} -- Image data (None removes the cover)
+
+		Keyword Arguments:
+
+			mime {str} -- MIME type of the image (default: {"image/jpeg"})
+		'''
+		tags.writeCover(self.path, data, mime)
+		self.cover = data
+		self.updateStat()
+
+	def reloadCover(self):
+		'''Reload cover image from the file
+
+		Returns:
+
+			bytes -- Image data (None if there's no cover)
+		'''
+		self.cover = tags.readCover(self.path)
+		return self.cover
+
+	def rename(self, newName):
+		'''Rename the file within its directory
+
+		Arguments:
+
+			newName {str} -- New base name of a file
+		'''
+		if newName != self.baseName:
+			newPath = os.path.join(self.baseDir, newName)
+			os.renames(self.path, newPath)
+			self.path = newPath
+
+
+def loadTrack(path):
+	'''Load track without cover (evaluated in worker process)
+
+	Arguments:
+
+		path {str} -- Path to mp3 file
+
+	Returns:
+
+		Track -- Loaded track
+	'''
+	return Track.load(path, cover=False)
+
+
+def loadTracks(paths, processes=None):
+	'''Load tracks without covers (using worker processes for bigger batches)
+
+	Arguments:
+
+		paths {List[str]} -- Paths to mp3 files
+
+	Keyword Arguments:
+
+		processes {int} -- Number of worker processes (default: {None} - number of cores)
+
+	Returns:
+
+		List[Track] -- Loaded tracks in the order of paths
+	'''
+	if len(paths) < PARALLEL_LOAD:
+		return [loadTrack(i) for i in paths]
+	# Workers are spawned, so they don't inherit threads and Qt state of the player
+	with multiprocessing.get_context("spawn").Pool(processes) as pool:
+		return pool.map(loadTrack, paths, chunksize=8)
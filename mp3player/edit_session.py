@@ -0,0 +1,177 @@
+import math
+import os
+import re
+from collections import OrderedDict
+
+__all__ = ["EditSession", "naturalKey", "numericKey", "mtimeKey"]
+
+
+def naturalKey(value):
+	'''Key for natural sorting (numbers inside the string are compared by value, e.g. "2" < "10")
+
+	Arguments:
+
+		value {str} -- Value to be sorted
+
+	Returns:
+
+		List -- Key (strings on even positions, numbers on odd positions)
+	'''
+	return [int(i) if idx % 2 else i.casefold() for (idx, i) in enumerate(re.split(r"(\d+)", value))]
+
+
+def numericKey(value):
+	'''Key for numeric sorting (leading number of the value, e.g. "3/12" -> 3, values without number are last)
+
+	Arguments:
+
+		value {str} -- Value to be sorted
+
+	Returns:
+
+		float -- Key
+	'''
+	found = re.match(r"\s*([-+]?\d+(?:[.,]\d+)?)", value)
+	return float(found.group(1).replace(",", ".")) if found is not None else math.inf
+
+
+def mtimeKey(mp3file):
+	'''Key for sorting by modification time of the file (missing files are first)
+
+	Arguments:
+
+		mp3file {MP3File} -- mp3file instance
+
+	Returns:
+
+		float -- Modification time
+	'''
+	try:
+		return os.path.getmtime(mp3file.path)
+	except OSError:
+		return 0.0
+
+
+class EditSession(object):
+	'''State of one group edit (files selected for the edit and preview of their new values)
+
+	Preview values are stored by columns (one list per edited property) only for selected files,
+	so everything is freed together with the session when the edit window is closed
+
+	Arguments:
+
+		files {List[MP3File]} -- Files selected for the edit
+		properties {Iterable[str]} -- Properties which are edited
+	'''
+	def __init__(self, files, properties):
+		self.files = list(files)
+		self.values: OrderedDict = OrderedDict((i, [""] * len(self.files)) for i in properties)
+
+	def __len__(self):
+		return len(self.files)
+
+	def hasProperty(self, property):
+		'''If the property is edited in this session
+
+		Arguments:
+
+			property {str} -- Property name
+
+		Returns:
+
+			bool -- True/False
+		'''
+		return property in self.values
+
+	def get(self, property, row):
+		'''Get new value of the property
+
+		Arguments:
+
+			property {str} -- Property name
+			row {int} -- Row index
+
+		Returns:
+
+			str -- New value
+		'''
+		return self.values[property][row]
+
+	def set(self, row, values):
+		'''Set new values of one row
+
+		Arguments:
+
+			row {int} -- Row index
+			values {Dict[str, str]} -- Property name to new value
+		'''
+		for property, value in values.items():
+			self.values[property][row] = value
+
+	def fill(self, property, value):
+		'''Set the same new value of the property to all rows
+
+		Arguments:
+
+			property {str} -- Property name
+			value {str} -- New value
+		'''
+		self.values[property] = [value] * len(self.files)
+
+	def removeRows(self, first, last):
+		'''Remove continuous range of rows (files and their new values)
+
+		Arguments:
+
+			first {int} -- First removed row
+			last {int} -- Last removed row
+		'''
+		del self.files[first:last + 1]
+		for column in self.values.values():
+			del column[first:last + 1]
+
+	def reorder(self, order):
+		'''Reorder rows (files and their new values)
+
+		Arguments:
+
+			order {List[int]} -- Old row indices in the new order
+		'''
+		self.files[:] = [self.files[i] for i in order]
+		for column in self.values.values():
+			column[:] = [column[i] for i in order]
+
+	def sortedOrder(self, key, reverse=False):
+		'''Get order of rows sorted by the key (stable)
+
+		Arguments:
+
+			key {Callable[[int], object]} -- Sort key of row index
+
+		Keyword Arguments:
+
+			reverse {bool} -- Descending order (default: {False})
+
+		Returns:
+
+			List[int] -- Old row indices in the new order
+		'''
+		return sorted(range(len(self.files)), key=key, reverse=reverse)
+
+	def movedOrder(self, rows, target):
+		'''Get order of rows after moving the rows before the target row (as one block)
+
+		Arguments:
+
+			rows {Iterable[int]} -- Moved rows
+			target {int} -- Row before which the rows are inserted (row count to move them to the end)
+
+		Returns:
+
+			List[int] -- Old row indices in the new order
+		'''
+		moved = sorted(set(rows))
+		movedSet = set(moved)
+		rest = [i for i in range(len(self.files)) if i not in movedSet]
+		position = target - sum(1 for i in moved if i < target)
+		return rest[:position] + moved + rest[position:]
@@ -1,11 +1,22 @@
-from PyQt5 import QtWidgets, uic, Qt, QtGui
-from collections import OrderedDict
+from PyQt5 import QtWidgets, Qt, QtGui, QtCore
+from collections import OrderedDict, deque
 import os
-import re
+import time
 
-import mp3player
+import mp3player.core.patterns as patterns
+import mp3player.core.matcher as matcher
+import mp3player.core.renamer as renamer
+import mp3player.core.organizer as organizer
+import mp3player.edit_session as edit_session
+import mp3player.core.replacer as replacer
+import mp3player.core.recipes as recipes
+import mp3player.core.covers as covers
+import mp3player.core.journal as journal
+import mp3player.core.tracing as tracing
+import mp3player.images as images
+import mp3player.forms as forms
 
-__all__ = ["TagDialog", "SortTable", "EditWindow"]
+__all__ = ["TagDialog", "SortTable", "EditWindow", "ReplaceWindow"]
 
 
 class TagDialog(QtWidgets.QDialog):
@@ -15,9 +26,7 @@ class TagDialog(QtWidgets.QDialog):
 		super(QtWidgets.QDialog, self).__init__(*args)
 
 		# Load UI
-		uiFile = "ui/tag_dialog.ui"
-		with open(uiFile) as f:
-			uic.loadUi(f, self)
+		forms.setupUi(self, "tag_dialog")
 
 	def clear(self):
 		"""Clear selection
@@ -95,12 +104,110 @@ class TagDialog(QtWidgets.QDialog):
 			return self.items[self.comboBox.currentIndex()]
 
 
-class SortTable(QtWidgets.QTableWidget):
+class EditModel(QtCore.QAbstractTableModel):
+	'''Lightweight model rendering EditSession into SortTable
+
+	Columns are pairs of header label and getter of the displayed value by row index
+
+	Arguments:
+
+		QtCore {QAbstractTableModel} -- Base class
+	'''
+
+	def __init__(self, *args):
+		'''Initializer of EditModel
+		'''
+		super().__init__(*args)
+		self.session = None
+		self.columns = list()
+
+	def setSession(self, session, columns=None):
+		"""Set session and its columns (the model is reset)
+
+		Arguments:
+			session {EditSession} -- Edit session (None to free the previous one)
+
+		Keyword Arguments:
+			columns {List[Tuple[str, Callable[[int], str]]]} -- Header labels and value getters (default: {None})
+		"""
+		self.beginResetModel()
+		self.session = session
+		self.columns = list() if columns is None else columns
+		self.endResetModel()
+
+	def rowCount(self, parent=QtCore.QModelIndex()):
+		return 0 if self.session is None or parent.isValid() else len(self.session)
+
+	def columnCount(self, parent=QtCore.QModelIndex()):
+		return 0 if parent.isValid() else len(self.columns)
+
+	def data(self, index, role=Qt.Qt.DisplayRole):
+		if role == Qt.Qt.DisplayRole and index.isValid():
+			return self.columns[index.column()][1](index.row())
+		return None
+
+	def headerData(self, section, orientation, role=Qt.Qt.DisplayRole):
+		if role == Qt.Qt.DisplayRole:
+			if orientation == Qt.Qt.Horizontal:
+				return self.columns[section][0]
+			return str(section + 1)
+		return None
+
+	def rowsChanged(self, first, last):
+		"""Notify the view that values of rows were changed
+
+		Arguments:
+			first {int} -- First changed row
+			last {int} -- Last changed row
+		"""
+		if self.columns and first <= last:
+			self.dataChanged.emit(self.index(first, 0), self.index(last, len(self.columns) - 1))
+
+	def flags(self, index):
+		if index.isValid():
+			return super().flags(index) | Qt.Qt.ItemIsDragEnabled
+		return super().flags(index) | Qt.Qt.ItemIsDropEnabled
+
+	def supportedDropActions(self):
+		return Qt.Qt.MoveAction
+
+	def removeSessionRows(self, rows):
+		"""Remove rows from the session (continuous ranges are removed at once, from the last one)
+
+		Arguments:
+			rows {Iterable[int]} -- Row indices
+		"""
+		rows = sorted(set(rows), reverse=True)
+		while rows:
+			last = first = rows.pop(0)
+			while rows and rows[0] == first - 1:
+				first = rows.pop(0)
+			self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+			self.session.removeRows(first, last)
+			self.endRemoveRows()
+
+	def reorderSessionRows(self, order):
+		"""Reorder rows of the session (one layout change for the whole operation)
+
+		Arguments:
+			order {List[int]} -- Old row indices in the new order
+		"""
+		self.layoutAboutToBeChanged.emit()
+		newRows = [0] * len(order)
+		for new, old in enumerate(order):
+			newRows[old] = new
+		persistent = self.persistentIndexList()
+		self.changePersistentIndexList(persistent, [self.index(newRows[i.row()], i.column()) for i in persistent])
+		self.session.reorder(order)
+		self.layoutChanged.emit()
+
+
+class SortTable(QtWidgets.QTableView):
 	'''Custom SortTable for managing group editation
 
 	Arguments:
 
-		QtWidgets {QTableWidget} -- Base class
+		QtWidgets {QTableView} -- Base class
 
 	Returns:
 
@@ -110,56 +217,65 @@ class SortTable(QtWidgets.QTableWidget):
 	def __init__(self, *args):
 		'''Initializer of SortTable
 		'''
-		super(QtWidgets.QTableWidget, self).__init__(*args)
+		super().__init__(*args)
 
-		# Setup handlers
-		self.setupHandlers()
-
-	def setup(self, editWindow):
+	def setup(self, editWindow, model):
 		"""Setup SortTable
 
 		Arguments:
 			editWindow {QtWidgets.QMainWindow} -- parent window
+			model {EditModel} -- model rendering edit session
 		"""
 		self.editWindow = editWindow
+		self.setModel(model)
+		self.setFocusPolicy(Qt.Qt.NoFocus)
+
+		# Setup handlers
+		self.setupHandlers()
 
 	def setupHandlers(self):
 		"""Setup handlers for SortTable
 		"""
-		self.itemSelectionChanged.connect(self.handleRowSelection)
-
-	def handleRowSelection(self):
-		"""Handle if a row is selected
-		"""
-		row = self.getSelectedRowFromRanges()
-		# If row selected, enable/disable accordingly
-		if row is not None:
-			# Disable clicking up button
-			if row == 0:
-				self.editWindow.upButton.setEnabled(False)
-				self.editWindow.downButton.setEnabled(True)
-			# Disable clikcing down button
-			elif row == self.rowCount() - 1:
-				self.editWindow.upButton.setEnabled(True)
-				self.editWindow.downButton.setEnabled(False)
-			# Enable clicking anything
-			else:
-				self.editWindow.upButton.setEnabled(True)
-				self.editWindow.downButton.setEnabled(True)
+		self.selectionModel().selectionChanged.connect(self.handleRowSelection)
+
+	def handleRowSelection(self, *args):
+		"""Handle if rows are selected
+		"""
+		rows = self.getSelectedRows()
+		# If rows selected, enable/disable accordingly (first row can't go up, last row can't go down)
+		if rows:
+			self.editWindow.upButton.setEnabled(rows[0] > 0)
+			self.editWindow.downButton.setEnabled(rows[-1] < self.rowCount() - 1)
 			self.editWindow.removeButton.setEnabled(True)
-		# Ig no row selected, disable all buttons
+		# If no row selected, disable all buttons
 		else:
 			self.editWindow.upButton.setEnabled(False)
 			self.editWindow.downButton.setEnabled(False)
 			self.editWindow.removeButton.setEnabled(False)
 
+	def rowCount(self):
+		"""Count of rows in SortTable
+
+		Returns:
+			int -- count of rows
+		"""
+		return self.model().rowCount()
+
+	def columnCount(self):
+		"""Count of columns in SortTable
+
+		Returns:
+			int -- count of columns
+		"""
+		return self.model().columnCount()
+
 	def isEmpty(self):
 		"""If the SortTable is empty
 
 		Returns:
-			int -- count of rows
+			bool -- True/False
 		"""
-		return self.rowCount() > 0
+		return self.rowCount() == 0
 
 	def getMP3File(self, row):
 		'''Get mp3 file wrapper from this table
@@ -172,104 +288,100 @@ class SortTable(QtWidgets.QTableWidget):
 
 			MP3File -- MP3File
 		'''
-		return self.data[row]
+		return self.model().session.files[row]
 
-	def getSelectedRowFromRanges(self):
-		'''Get selected row of TableWdiget using selected ranges
+	def getSelectedRows(self):
+		'''Get selected rows of SortTable
 
 		Returns:
 
-			int -- Row index
+			List[int] -- Sorted row indices
 		'''
-		rows = [i.topRow() for i in self.selectedRanges() if i.rightColumn() - i.leftColumn() > 0]
-		if len(rows) == 1:
-			return rows[0]
-		else:
-			return None
+		return sorted(i.row() for i in self.selectionModel().selectedRows())
 
-	def setRangeSelectionByRow(self, row):
-		'''Set RangeSelected according to the single row given (if not given set it by actual selected row)
+	def setRangeSelection(self, first, last):
+		'''Set selection to the continuous range of rows
 
-		Keyword Arguments:
+		Arguments:
 
-			row {int} -- Row index which range should be selected (default: {None})
+			first {int} -- First selected row
+			last {int} -- Last selected row
 		'''
-		self.setRangeSelected(QtWidgets.QTableWidgetSelectionRange(0, 0, self.rowCount() - 1, self.columnCount() - 1), False)
-		if row is not None:
-			self.setRangeSelected(QtWidgets.QTableWidgetSelectionRange(row, 0, row, self.columnCount() - 1), True)
-			self.handleRowSelection()
+		self.clearSelection()
+		if first <= last:
+			selection = QtCore.QItemSelection(self.model().index(first, 0), self.model().index(last, 0))
+			self.selectionModel().select(selection, QtCore.QItemSelectionModel.Select | QtCore.QItemSelectionModel.Rows)
+		self.handleRowSelection()
 
-	def switchRows(self, row1, row2):
-		"""Switch rows in SortTable
+	def getVisibleRows(self):
+		"""Get rows which are currently visible in the viewport
+
+		Returns:
+			range -- Range of visible row indices
+		"""
+		if self.rowCount() == 0:
+			return range(0)
+		first = self.rowAt(0)
+		last = self.rowAt(self.viewport().height() - 1)
+		first = 0 if first < 0 else first
+		last = self.rowCount() - 1 if last < 0 else last
+		return range(first, last + 1)
+
+	def moveRows(self, rows, target):
+		"""Move rows as one block before the target row and keep them selected
 
 		Arguments:
-			row1 {int} -- first row index
-			row2 {int} -- second row index
+			rows {List[int]} -- Row indices
+			target {int} -- Row before which the rows are inserted (row count to move them to the end)
 		"""
-		for i in range(self.columnCount()):
-			item1 = self.takeItem(row1, i)
-			item2 = self.takeItem(row2, i)
-			self.setItem(row2, i, item1)
-			self.setItem(row1, i, item2)
+		if rows:
+			first = self.editWindow.moveRows(rows, target)
+			self.setRangeSelection(first, first + len(rows) - 1)
 
 	def moveRowUp(self):
-		"""Move row up in SortTable
+		"""Move selected rows up in SortTable
 		"""
-		row = self.getSelectedRowFromRanges()
-		if row is not None:
-			self.switchRows(row, row - 1)
-			self.editWindow.switchRows(row, row - 1)
-			self.setRangeSelectionByRow(row - 1)
+		rows = self.getSelectedRows()
+		if rows and rows[0] > 0:
+			self.moveRows(rows, rows[0] - 1)
 
 	def moveRowDown(self):
-		"""Move row down in SortTable
+		"""Move selected rows down in SortTable
 		"""
-		row = self.getSelectedRowFromRanges()
-		if row is not None:
-			self.switchRows(row, row + 1)
-			self.editWindow.switchRows(row, row + 1)
-			self.setRangeSelectionByRow(row + 1)
+		rows = self.getSelectedRows()
+		if rows and rows[-1] < self.rowCount() - 1:
+			self.moveRows(rows, rows[-1] + 2)
 
 	def handleRemoveRow(self):
-		"""Handle removing currently selected row
+		"""Handle removing currently selected rows
 		"""
-		row = self.getSelectedRowFromRanges()
-		if row is not None:
-			self.removeRow(row)
-			self.editWindow.removeRow(row)
+		rows = self.getSelectedRows()
+		if rows:
+			self.editWindow.removeRows(rows)
 
-	def createHeaders(self, header_labels):
-		"""Create headers of the table
+	def dropEvent(self, event):
+		"""Move dragged rows to the drop position (the model isn't asked to insert and remove rows)
 
 		Arguments:
-			header_labels {List[str]} -- list of header names
+			event {QDropEvent} -- Drop event
 		"""
-		self.setColumnCount(len(header_labels))
-		self.setHorizontalHeaderLabels(header_labels)
-		self.setFocusPolicy(Qt.Qt.NoFocus)
-
-	def addRow(self, mp3file):
-		'''Add MP3 file to table
-
-		Arguments:
-
-			mp3file {MP3File} -- MP3File object which should be inserted to table
-		'''
-		# Get current number of rows and insert new row
-		rowCount = self.rowCount()
-		self.insertRow(rowCount)
+		if event.source() is not self:
+			event.ignore()
+			return
 
-		# Create checkbox item and insert it
-		checkBoxHeader = QtWidgets.QTableWidgetItem()
-		checkBoxHeader.setFlags(Qt.Qt.ItemIsUserCheckable | Qt.Qt.ItemIsEnabled)
-		checkBoxHeader.setCheckState(Qt.Qt.Unchecked)
-		checkBoxHeader.setTextAlignment(Qt.Qt.AlignCenter)
-		self.setItem(rowCount, 0, checkBoxHeader)
+		index = self.indexAt(event.pos())
+		position = self.dropIndicatorPosition()
+		if not index.isValid() or position == QtWidgets.QAbstractItemView.OnViewport:
+			target = self.rowCount()
+		elif position == QtWidgets.QAbstractItemView.BelowItem:
+			target = index.row() + 1
+		else:
+			target = index.row()
+		self.moveRows(self.getSelectedRows(), target)
 
-		# insert all other tags to table
-		for idx, key in enumerate(mp3file.property_2_tag):
-			if key != "cover":
-				self.setItem(rowCount, idx + 1, mp3file.__getattribute__(key))
+		# Rows are already moved, so the drag must not remove the source rows
+		event.setDropAction(Qt.Qt.IgnoreAction)
+		event.accept()
 
 
 class EditWindow(QtWidgets.QMainWindow):
@@ -282,14 +394,19 @@ class EditWindow(QtWidgets.QMainWindow):
 	COMMON_EDIT = 1
 	GUESS_TAG_EDIT = 2
 	GUESS_NAME_EDIT = 3
+	ORGANIZE_EDIT = 4
+
+	# Preview computation (debounce after the last change in ms, time slice of idle work in s)
+	REFRESH_DELAY = 150
+	REFRESH_SLICE = 0.01
+	# Polling interval of results from worker processes in ms
+	MATCH_POLL = 20
 
 	def __init__(self, *args):
 		super(QtWidgets.QMainWindow, self).__init__()
 
 		# Load UI
-		uiFile = "ui/group_edit.ui"
-		with open(uiFile) as f:
-			uic.loadUi(f, self)
+		forms.setupUi(self, "group_edit")
 
 	def setup(self, mainWindow, property_2_name, property_2_tag, coverExtensions):
 		'''Setup function for connecting parent widgets with child widgets
@@ -304,25 +421,54 @@ class EditWindow(QtWidgets.QMainWindow):
 		self.property = None
 		self.guess_tag = None
 		self.editType = None
-		self.image = None
 		self.imagePath = None
+		self.imageBytes = None
+		self.session = None
+		self.model = EditModel(self)
 		self.setWindowModality(Qt.Qt.ApplicationModal)
-		self.tableWidget.setup(self)
+		self.tableWidget.setup(self, self.model)
+
+		# Preview computation (debounced, visible rows first, the rest during idle time)
+		self.pendingRows = deque()
+		self.pendingRowsSet = set()
+		self.refreshContext = None
+		self.refreshTimer = QtCore.QTimer(self)
+		self.refreshTimer.setSingleShot(True)
+		self.refreshTimer.setInterval(self.REFRESH_DELAY)
+		self.refreshTimer.timeout.connect(self.refreshDataInTable)
+		self.idleTimer = QtCore.QTimer(self)
+		self.idleTimer.setInterval(0)
+		self.idleTimer.timeout.connect(self.processPendingRows)
+
+		# Guess tag patterns are evaluated by worker processes with time budget
+		self.matchPool = matcher.MatchPool()
+		self.matchJob = None
+		self.matchTimer = QtCore.QTimer(self)
+		self.matchTimer.setInterval(self.MATCH_POLL)
+		self.matchTimer.timeout.connect(self.processMatchResults)
+
+		# Saved recipes (chains of edits)
+		self.recipeStore = recipes.RecipeStore()
 
 		# Connect
 		self.upButton.clicked.connect(self.tableWidget.moveRowUp)
 		self.downButton.clicked.connect(self.tableWidget.moveRowDown)
 		self.removeButton.clicked.connect(self.tableWidget.handleRemoveRow)
+		self.sortBox.activated.connect(self.handleSortBox)
+		self.reverseButton.clicked.connect(self.handleReverseButton)
+		self.tableWidget.horizontalHeader().sectionClicked.connect(self.handleHeaderClicked)
 		self.finishButton.clicked.connect(self.handleFinishButton)
 		self.cancelButton.clicked.connect(self.handleCancelButton)
+		self.recipeButton.clicked.connect(self.handleRecipeButton)
 		self.parseBox.currentIndexChanged.connect(self.handleParseBox)
 		self.valueBox.currentIndexChanged.connect(self.handleValueBox)
 		self.parseAbrBox.currentIndexChanged.connect(self.handleParseAbrBoxPicked)
 		self.valueAbrBox.currentIndexChanged.connect(self.handleValueAbrBoxPicked)
 		self.parseLine.textChanged.connect(self.parseLineChanged)
 		self.valueLine.textChanged.connect(self.valueLineChanged)
-		self.digitsSpinBox.valueChanged.connect(self.refreshDataInTable)
-		self.startIndexSpinBox.valueChanged.connect(self.refreshDataInTable)
+		self.digitsSpinBox.valueChanged.connect(self.scheduleRefresh)
+		self.startIndexSpinBox.valueChanged.connect(self.scheduleRefresh)
+		self.tableWidget.verticalScrollBar().valueChanged.connect(self.prioritizeVisibleRows)
 		self.chooseImageButton.clicked.connect(self.handleChooseImageButton)
 		self.removeImageButton.clicked.connect(self.handleRemoveImageButton)
 
@@ -331,6 +477,8 @@ class EditWindow(QtWidgets.QMainWindow):
 			self.imageLabel,
 			self.chooseImageButton,
 			self.removeImageButton,
+			self.normalizeCheckBox,
+			self.qualitySpinBox,
 		]
 		self.commonTagsWidgets = [
 			self.valueLabel,
@@ -352,6 +500,9 @@ class EditWindow(QtWidgets.QMainWindow):
 			self.sideWidget,
 			self.tableWidget,
 		]
+		# Column sorted by clicking the header (clicking it again reverses the order)
+		self.sortColumn = None
+		self.sortReverse = False
 		# Items for combo box
 		self.abbreviations = OrderedDict({
 			"fi": "Jméno souboru",
@@ -364,30 +515,26 @@ class EditWindow(QtWidgets.QMainWindow):
 			"co": "Komentář",
 			"d": "Číslice z widgetu",
 		})
-		# Items for funcionality
-		self.abbrevationsDict: OrderedDict = OrderedDict({
-			"fi": "fileName",
-			"sn": "songName",
-			"ar": "artist",
-			"al": "album",
-			"tr": "track",
-			"ye": "year",
-			"ge": "genre",
-			"co": "comment",
-		})
+		# Items for funcionality (shared with pattern engine)
+		self.abbrevationsDict: OrderedDict = patterns.ABBREVIATIONS
 		# Lists for further usage injected by parent
 		self.property_2_name = property_2_name
 		self.property_2_tag = property_2_tag
 		self.coverExtensions = coverExtensions
 		self.tags = [i for i in self.property_2_name if i != "cover"]
 		self.parseBoxItemsKeys = [key for key in self.property_2_name if key != "cover"]
+		# Sort keys of files for sort box (tags are sorted naturally)
+		self.sortBoxItems = [(self.property_2_name[i], self.getTagSortKey(i)) for i in self.tags]
+		self.sortBoxItems.append(("Stopa (číselně)", lambda mp3file: edit_session.numericKey(mp3file.getProperty("track"))))
+		self.sortBoxItems.append(("Datum změny souboru", edit_session.mtimeKey))
 
 		# Add items for combo boxes
 		self.parseBox.addItems([self.property_2_name[i] for i in self.parseBoxItemsKeys])
 		self.parseAbrBox.addItems(["\\k" + key + "() - " + val for key, val in self.abbreviations.items()][:-1])
 		self.valueAbrBox.addItems(["\\k" + key + " - " + val for key, val in self.abbreviations.items()])
+		self.sortBox.addItems([label for (label, key) in self.sortBoxItems])
 
-	def exec(self, data, property=None, guess_tag=False, guess_name=False):
+	def exec(self, data, property=None, guess_tag=False, guess_name=False, organize_root=None):
 		"""Start of the EditWindow (called from parent - MP3Player)
 
 		Arguments:
@@ -399,14 +546,16 @@ class EditWindow(QtWidgets.QMainWindow):
 			property {str} -- Property which ve should group edit (default: {None})
 			guess_tag {bool} -- If we should guess tags from file (or parse is more precise description) (default: {False})
 			guess_name {bool} -- If we should set file name from file (default: {False})
+			organize_root {str} -- Library directory to which files should be moved using path template (default: {None})
 		"""
 		self.data = data
 		self.property = property
 		self.guess_tag = guess_tag
 		self.guess_name = guess_name
+		self.organize_root = organize_root
 
 		# Get the choice for editing
-		self.setEditType(self.property, self.guess_tag, self.guess_name)
+		self.setEditType(self.property, self.guess_tag, self.guess_name, self.organize_root)
 
 		# Initialize window (Set visibility, clear lines, etc.)
 		self.init()
@@ -414,7 +563,7 @@ class EditWindow(QtWidgets.QMainWindow):
 		self.mainWindow.setEnabled(False)
 		super().show()
 
-	def setEditType(self, property, guess_tag, guess_name):
+	def setEditType(self, property, guess_tag, guess_name, organize_root=None):
 		"""Set edit type based on the input values
 
 		Arguments:
@@ -422,11 +571,17 @@ class EditWindow(QtWidgets.QMainWindow):
 			property {str} -- Property which ve should group edit
 			guess_tag {bool} -- If we should guess tags from file (or parse is more precise description)
 			guess_name {bool} -- If we should set file name from file
+
+		Keyword Arguments:
+
+			organize_root {str} -- Library directory to which files should be moved (default: {None})
 		"""
 		if guess_tag:
 			self.editType = self.GUESS_TAG_EDIT
 		elif guess_name:
 			self.editType = self.GUESS_NAME_EDIT
+		elif organize_root is not None:
+			self.editType = self.ORGANIZE_EDIT
 		elif property == "cover":
 			self.editType = self.COVER_EDIT
 		elif property in self.property_2_name:
@@ -450,6 +605,15 @@ class EditWindow(QtWidgets.QMainWindow):
 		"""
 		return self.editType == self.GUESS_NAME_EDIT
 
+	def isOrganizeEdit(self):
+		"""Is edit window in organize mode
+
+		Returns:
+
+			bool -- True/False
+		"""
+		return self.editType == self.ORGANIZE_EDIT
+
 	def isCommonEdit(self):
 		"""Is edit window in common edit mode
 
@@ -500,6 +664,17 @@ class EditWindow(QtWidgets.QMainWindow):
 		self.parseLine.setEnabled(True)
 		self.parseAbrBox.setEnabled(True)
 
+	def initEditOrganizeWidgets(self):
+		"""Initializer for setting widget states for organizing files to directories
+		"""
+		self.titleLabel.setText("Uspořádání souborů do složek: " + self.organize_root)
+
+		[i.setVisible(False) for i in self.commonTagsWidgets + self.coverWidgets]
+		[i.setVisible(True) for i in self.guessTagsWidgets]
+
+		self.parseLine.setEnabled(True)
+		self.parseAbrBox.setEnabled(True)
+
 	def initEditCommonTagsWidgets(self):
 		"""Initializer for setting widget states for common edit
 		"""
@@ -525,6 +700,9 @@ class EditWindow(QtWidgets.QMainWindow):
 		self.downButton.setEnabled(False)
 		self.removeButton.setEnabled(False)
 		self.finishButton.setEnabled(False)
+		self.recipeButton.setEnabled(not self.isCoverEdit() and not self.isOrganizeEdit())
+		self.sortBox.setCurrentIndex(-1)
+		self.setSortIndicator(None)
 
 		if self.isCoverEdit():
 			self.initEditCoverWidgets()
@@ -534,14 +712,17 @@ class EditWindow(QtWidgets.QMainWindow):
 			self.initEditGuessTagsWidgets()
 		elif self.isGuessNameEdit():
 			self.initEditGuessNameWidgets()
+		elif self.isOrganizeEdit():
+			self.initEditOrganizeWidgets()
 		else:
 			raise ValueError("Wrong property type")
 
-		# Fill data to table
-		self.image = None
-		self.tableWidget.setRowCount(0)
+		# Create edit session (only for selected files) and show it in table
+		self.imagePath = None
+		self.imageBytes = None
+		self.session = edit_session.EditSession(self.data, self.getEditedProperties())
+		self.data = self.session.files
 		self.createHeaders()
-		self.fillRows(self.data)
 		self.refreshDataInTable()
 
 		# Setup input widgets
@@ -550,7 +731,7 @@ class EditWindow(QtWidgets.QMainWindow):
 		self.parseAbrBox.setCurrentIndex(-1)
 		self.valueAbrBox.setCurrentIndex(-1)
 		self.valueLine.setText("")
-		self.parseLine.setText("")
+		self.parseLine.setText(organizer.DEFAULT_TEMPLATE if self.isOrganizeEdit() else "")
 
 	def parseLineChanged(self, text):
 		"""If parse lineEdit changed handle it (Used for parsing the string)
@@ -559,7 +740,7 @@ class EditWindow(QtWidgets.QMainWindow):
 
 			text {str} -- parseLine text
 		"""
-		self.refreshDataInTable()
+		self.scheduleRefresh()
 
 	def getParseProperty(self):
 		"""Get parse property from parseBox to work with parseLine
@@ -577,15 +758,7 @@ class EditWindow(QtWidgets.QMainWindow):
 
 			text {str} -- valueLine text
 		"""
-		self.refreshDataInTable()
-
-	def addThirdItemToTable(self):
-		"""Add 3rd item to table as a helper item for better understading of parsing lines
-		"""
-		if self.data is not None:
-			for idx, mp3file in enumerate(self.data):
-				mp3file.tmpProperties["tmp"] = mp3player.mp3window.MP3Tag(mp3file, "tmp", mp3file.getProperty(self.getParseProperty()))
-				self.tableWidget.setItem(idx, 2, mp3file.tmpProperties["tmp"])
+		self.scheduleRefresh()
 
 	def handleParseBox(self, index):
 		"""Handle parseBox change (for common edit handle change of combox box for parsing another line)
@@ -596,7 +769,6 @@ class EditWindow(QtWidgets.QMainWindow):
 		"""
 		if index >= 0:
 			self.createHeaders()
-			self.addThirdItemToTable()
 			self.parseLine.setEnabled(True)
 			self.parseAbrBox.setEnabled(True)
 		self.refreshDataInTable()
@@ -627,7 +799,7 @@ class EditWindow(QtWidgets.QMainWindow):
 		"""
 		if index >= 0:
 			self.parseAbrBox.setCurrentIndex(-1)
-			if self.isGuessNameEdit():
+			if self.isGuessNameEdit() or self.isOrganizeEdit():
 				self.parseLine.setText(self.parseLine.text() + "\\k" + list(self.abbreviations.items())[index][0])
 			else:
 				self.parseLine.setText(self.parseLine.text() + "\\k" + list(self.abbreviations.items())[index][0] + "(.+?)")
@@ -644,203 +816,472 @@ class EditWindow(QtWidgets.QMainWindow):
 			self.valueAbrBox.setCurrentIndex(-1)
 			self.valueLine.setText(self.valueLine.text() + "\\k" + list(self.abbreviations.items())[index][0])
 
+	def getEditedProperties(self):
+		"""Get properties which are edited with respect to the edit type
+
+		Returns:
+			List[str] -- Property names
+		"""
+		if self.isGuessTagEdit():
+			return [i for i in self.tags if i != "fileName"]
+		elif self.isGuessNameEdit() or self.isOrganizeEdit():
+			return ["fileName"]
+		return [self.property]
+
+	def getColumnGetter(self, property, original=False):
+		"""Get getter of values displayed in SortTable column
+
+		Arguments:
+			property {str} -- Property name
+
+		Keyword Arguments:
+			original {bool} -- If original value of file should be displayed instead of new one (default: {False})
+
+		Returns:
+			Callable[[int], str] -- Getter of value by row index
+		"""
+		if not original and self.session.hasProperty(property):
+			return lambda row: self.session.get(property, row)
+		return lambda row: self.session.files[row].getProperty(property)
+
 	def createHeaders(self):
 		"""Create headers in SortTable with respect to the edit type
 		"""
-		# If guess tag or guess name eidt show all tags
-		if self.isGuessTagEdit() or self.isGuessNameEdit():
-			header_labels = [j for (i, j) in self.property_2_name.items() if i != "cover"]
-			self.tableWidget.horizontalHeader().setMinimumSectionSize(70)
-			self.tableWidget.horizontalHeader().setDefaultSectionSize(70)
-			[self.tableWidget.setColumnWidth(i, 70) for i in range(len(header_labels))]
+		# If guess tag, guess name or organize eidt show all tags
+		if self.isGuessTagEdit() or self.isGuessNameEdit() or self.isOrganizeEdit():
+			columns = [(self.property_2_name[i], self.getColumnGetter(i)) for i in self.tags]
+			size = 70
 		# Otherwise set header columns for original and new tag name and helper tag values if selected
 		else:
-			header_labels = ["Originální", "Nový"]
+			columns = [("Originální", self.getColumnGetter(self.property, original=True)), ("Nový", self.getColumnGetter(self.property))]
 			size = 200
 			if self.parseBox.currentIndex() >= 0:
 				size = 150
-				header_labels.append(self.property_2_name[self.parseBoxItemsKeys[self.parseBox.currentIndex()]])
-			self.tableWidget.horizontalHeader().setMinimumSectionSize(size)
-			self.tableWidget.horizontalHeader().setDefaultSectionSize(size)
-			[self.tableWidget.setColumnWidth(i, size) for i in range(len(header_labels))]
-		self.tableWidget.createHeaders(header_labels)
+				columns.append((self.property_2_name[self.getParseProperty()], self.getColumnGetter(self.getParseProperty(), original=True)))
+		self.model.setSession(self.session, columns)
+		self.tableWidget.horizontalHeader().setMinimumSectionSize(size)
+		self.tableWidget.horizontalHeader().setDefaultSectionSize(size)
+		[self.tableWidget.setColumnWidth(i, size) for i in range(len(columns))]
 
-	def fillRows(self, data):
-		"""Fill rows in SortTable
+	def removeRows(self, rows):
+		"""Remove rows from SortTable (the preview is refreshed once)
 
 		Arguments:
-			data {List} -- List of mp3files
+			rows {List[int]} -- Row indices
 		"""
-		for mp3file in self.data:
-			self.addRow(mp3file)
+		self.model.removeSessionRows(rows)
+		self.tableWidget.handleRowSelection()
+		self.refreshDataInTable()
 
-	def addRow(self, mp3file):
-		"""Add row to SortTable
+	def reorderRows(self, order):
+		"""Reorder rows in SortTable (the preview is refreshed once, numbers from interval follow the new order)
 
 		Arguments:
-			mp3file {MP3File} -- mp3file class
+			order {List[int]} -- Old row indices in the new order
 		"""
-		# Get current number of rows and insert new row
-		rowCount = self.tableWidget.rowCount()
-		self.tableWidget.insertRow(rowCount)
+		self.model.reorderSessionRows(order)
+		self.tableWidget.handleRowSelection()
+		self.refreshDataInTable()
 
-		if self.isGuessTagEdit():
-			# insert all other tags to table
-			for idx, key in enumerate(mp3file.property_2_tag):
-				if key == "fileName":
-					mp3file.tmpProperties[key] = mp3player.mp3window.MP3Tag(mp3file, key, mp3file.fileName)
-					self.tableWidget.setItem(rowCount, idx, mp3file.tmpProperties[key])
-				elif key != "cover":
-					mp3file.tmpProperties[key] = mp3player.mp3window.MP3Tag(mp3file, key, "")
-					self.tableWidget.setItem(rowCount, idx, mp3file.tmpProperties[key])
-		elif self.isGuessNameEdit():
-			# insert all other tags to table
-			for idx, key in enumerate(mp3file.property_2_tag):
-				if key == "fileName":
-					mp3file.tmpProperties[key] = mp3player.mp3window.MP3Tag(mp3file, key, mp3file.fileName)
-					self.tableWidget.setItem(rowCount, idx, mp3file.tmpProperties[key])
-				elif key != "cover":
-					mp3file.tmpProperties[key] = mp3player.mp3window.MP3Tag(mp3file, key, mp3file.__getattribute__(key).text())
-					self.tableWidget.setItem(rowCount, idx, mp3file.tmpProperties[key])
-		else:
-			self.tableWidget.setItem(rowCount, 0, mp3player.mp3window.MP3Tag(mp3file, self.property, mp3file.__getattribute__(self.property).text()))
-			mp3file.tmpProperties[self.property] = mp3player.mp3window.MP3Tag(mp3file, self.property, "")
-			self.tableWidget.setItem(rowCount, 1, mp3file.tmpProperties[self.property])
+	def moveRows(self, rows, target):
+		"""Move rows as one block before the target row
 
-	def removeRow(self, row):
-		"""Remove row from SortTable
+		Arguments:
+			rows {List[int]} -- Row indices
+			target {int} -- Row before which the rows are inserted (row count to move them to the end)
+
+		Returns:
+			int -- New index of the first moved row
+		"""
+		self.setSortIndicator(None)
+		self.reorderRows(self.session.movedOrder(rows, target))
+		return target - sum(1 for i in rows if i < target)
+
+	def sortRows(self, key, reverse=False):
+		"""Sort rows in SortTable (stable, so rows with equal keys keep their order)
 
 		Arguments:
-			row {MP3File} -- mp3file class
+			key {Callable[[int], object]} -- Sort key of row index
+
+		Keyword Arguments:
+			reverse {bool} -- Descending order (default: {False})
 		"""
-		self.data.pop(row)
-		self.refreshDataInTable()
+		self.reorderRows(self.session.sortedOrder(key, reverse))
 
-	def switchRows(self, row1, row2):
-		"""Switch two ros in SortTable
+	def getTagSortKey(self, property):
+		"""Get natural sort key of files by the tag
 
 		Arguments:
-			row1 {int} -- Index of first row
-			row2 {int} -- Index of second row
+			property {str} -- Property name
+
+		Returns:
+			Callable[[MP3File], List] -- Sort key of mp3file
 		"""
-		tmp = self.data[row1]
-		self.data[row1] = self.data[row2]
-		self.data[row2] = tmp
+		return lambda mp3file: edit_session.naturalKey(mp3file.getProperty(property))
 
-		self.refreshDataInTable()
+	def setSortIndicator(self, column, reverse=False):
+		"""Show which column is SortTable sorted by (None to hide it after manual reordering)
 
-	def searchString(self, pattern, inputString):
-		"""Search string using patterna nd regular expressions, it returns SRE_Match object
+		Arguments:
+			column {int} -- Column index
+
+		Keyword Arguments:
+			reverse {bool} -- Descending order (default: {False})
+		"""
+		self.sortColumn = column
+		self.sortReverse = reverse
+		header = self.tableWidget.horizontalHeader()
+		header.setSortIndicatorShown(column is not None)
+		if column is not None:
+			header.setSortIndicator(column, Qt.Qt.DescendingOrder if reverse else Qt.Qt.AscendingOrder)
+
+	def handleHeaderClicked(self, column):
+		"""Sort rows naturally by displayed values of the column (clicking it again reverses the order)
 
 		Arguments:
-			pattern {str} -- Pattern from user input (lineEdit)
-			inputString {str} -- Input string (can be user input or tag)
+			column {int} -- Column index
+		"""
+		if self.session is None or column >= len(self.model.columns):
+			return
+		reverse = not self.sortReverse if column == self.sortColumn else False
+		getter = self.model.columns[column][1]
+		values = [getter(row) or "" for row in range(len(self.session))]
+		self.sortRows(lambda row: edit_session.naturalKey(values[row]), reverse)
+		self.sortBox.setCurrentIndex(-1)
+		self.setSortIndicator(column, reverse)
+
+	def handleSortBox(self, index):
+		"""Sort rows by the key picked in sort box
+
+		Arguments:
+			index {int} -- Index of selected item
+		"""
+		if index >= 0 and self.session is not None:
+			key = self.sortBoxItems[index][1]
+			keys = [key(mp3file) for mp3file in self.session.files]
+			self.sortRows(lambda row: keys[row])
+			self.setSortIndicator(None)
+
+	def handleReverseButton(self):
+		"""Reverse order of all rows
+		"""
+		if self.session is not None:
+			self.reorderRows(list(reversed(range(len(self.session)))))
+			if self.sortColumn is not None:
+				self.setSortIndicator(self.sortColumn, not self.sortReverse)
+
+	def compilePatterns(self):
+		"""Compile parse pattern and value template from lineEdits (compiled once per edit, not per file)
+
+		Compile error is shown inline (status bar and red parseLine), the pattern is then ignored
 
 		Returns:
-			SRE_Match -- Object from re.search
+			Tuple[ParsePattern, ValueTemplate] -- Parse pattern and value template (None if not used or not valid)
 		"""
-		for key in self.abbrevationsDict:
-			prefix = re.escape("\\k{}(".format(key))
-			suffix = re.escape(")")
-			pattern = re.sub("{}(.*?){}".format(prefix, suffix), r"(?P<{}>\1)".format(key), pattern)
-		return re.search(pattern, inputString)
+		parsePattern = None
+		valueTemplate = None
+		error = None
+
+		if self.isGuessNameEdit():
+			valueTemplate = patterns.compileValueTemplate(self.parseLine.text())
+		elif self.isOrganizeEdit():
+			valueTemplate = organizer.compilePathTemplate(self.parseLine.text())
+		elif self.isGuessTagEdit() or (self.isCommonEdit() and self.valueBox.currentIndex() == 4):
+			if (self.isGuessTagEdit() or self.parseBox.currentIndex() >= 0) and self.parseLine.text() != "":
+				try:
+					parsePattern = patterns.compileParsePattern(self.parseLine.text())
+				except patterns.PatternError as e:
+					error = e
+			if self.isCommonEdit():
+				valueTemplate = patterns.compileValueTemplate(self.valueLine.text())
 
-	def subString(self, mp3file, inputString, regexSearch=None, idx=None):
-		"""Substitute string with tags or interval of numbers or custom substitutions
+		self.showPatternError(None if error is None else "Chybný vzor: {}".format(error))
+		return parsePattern, valueTemplate
 
-		Arguments:
-			mp3file {MP3File} -- mp3file instance
-			inputString {str} -- Input string for substitution
+	def showPatternError(self, message=None):
+		"""Show (or hide if there's no error) pattern error inline
 
 		Keyword Arguments:
-			regexSearch {SRE_Match} -- objetc from re.search from customly parsed tag (default: {None})
-			idx {int} -- number from interval (default: {None})
+			message {str} -- Error message (default: {None})
+		"""
+		if message is None:
+			self.parseLine.setStyleSheet("")
+			self.parseLine.setToolTip("")
+			self.statusbar.clearMessage()
+		else:
+			self.parseLine.setStyleSheet("QLineEdit { color: #c00000; }")
+			self.parseLine.setToolTip(message)
+			self.statusbar.showMessage(message)
+
+	def guessedTagValues(self, fields):
+		"""Get values of all guessed tags from parsed properties
+
+		Arguments:
+			fields {Dict[str, str]} -- Parsed properties
 
 		Returns:
-			str -- Substitued string
+			Dict[str, str] -- Property name to new value
 		"""
-		for key in self.abbrevationsDict:
-			prefix = re.escape("\\k{}".format(key))
-			inputString = re.sub(prefix, mp3file.getProperty(self.abbrevationsDict[key]), inputString)
+		return {i: fields.get(i, "") for i in self.abbrevationsDict.values() if i != "fileName"}
 
-		if regexSearch is not None:
-			for i in range(1, len(regexSearch.groups()) + 1):
-				try:
-					inputString = re.sub(r"\\{}".format(i), regexSearch.group(i), inputString)
-				except Exception:
-					pass
+	def computeRow(self, idx, mp3file, parsePattern, valueTemplate, digits, startIndex):
+		"""Compute new values of one row
+
+		Arguments:
+			idx {int} -- Row index
+			mp3file {MP3File} -- mp3file instance
+			parsePattern {ParsePattern} -- Compiled parse pattern (or None)
+			valueTemplate {ValueTemplate} -- Compiled value template (or None)
+			digits {int} -- Minimal count of digits of \\kd
+			startIndex {int} -- Start of interval of \\kd
 
-		if idx is not None and isinstance(idx, int):
-			inputString = re.sub(re.escape("\\kd"), str(self.startIndexSpinBox.value() + idx).zfill(self.digitsSpinBox.value()), inputString)
-		return inputString
+		Returns:
+			Dict[str, str] -- Property name to new value
+		"""
+		if self.isGuessTagEdit():
+			return self.guessedTagValues(parsePattern.fields(mp3file.baseName) if parsePattern is not None else {})
+		elif self.isGuessNameEdit() or self.isOrganizeEdit():
+			return {"fileName": valueTemplate.format(mp3file.getProperty, number=startIndex + idx, digits=digits)}
+
+		value = mp3file.getProperty(self.property)
+		if self.valueBox.currentIndex() == 1:
+			value = value.lower()
+		elif self.valueBox.currentIndex() == 2:
+			value = value.upper()
+		elif self.valueBox.currentIndex() == 3:
+			value = value.capitalize()
+		elif self.valueBox.currentIndex() == 4:
+			regexSearch = None
+			if parsePattern is not None:
+				regexSearch = parsePattern.search(mp3file.getProperty(self.getParseProperty()))
+			value = valueTemplate.format(mp3file.getProperty, match=regexSearch, number=startIndex + idx, digits=digits)
+		return {self.property: value}
+
+	def scheduleRefresh(self, *args):
+		"""Schedule refresh of data in SortTable (debounced, stale work is cancelled immediately)
+		"""
+		self.cancelRefresh()
+		self.refreshTimer.start()
 
+	def cancelRefresh(self):
+		"""Cancel scheduled refresh and all rows which are still waiting for computation
+		"""
+		self.refreshTimer.stop()
+		self.idleTimer.stop()
+		self.pendingRows.clear()
+		self.pendingRowsSet.clear()
+		self.matchTimer.stop()
+		if self.matchJob is not None:
+			self.matchJob.cancel()
+			self.matchJob = None
+
+	@tracing.traced("edit.refresh")
 	def refreshDataInTable(self):
 		"""Refresh data in SortTable (updating values or clearing columns when not regex not parsed properly)
+
+		Visible rows are computed immediately, the rest is computed incrementally during idle time
 		"""
+		self.cancelRefresh()
 		if self.data is None:
 			return
 
-		for idx, mp3file in enumerate(self.data):
-			if self.isGuessTagEdit():
-				found = None
-				try:
-					found = self.searchString(self.parseLine.text(), mp3file.baseName)
-				except Exception:
-					pass
-				for key in self.abbrevationsDict:
-					if self.abbrevationsDict[key] != "fileName":
-						try:
-							mp3file.tmpProperties[self.abbrevationsDict[key]].setText(found.group(key))
-						except (IndexError, AttributeError):
-							mp3file.tmpProperties[self.abbrevationsDict[key]].setText("")
-			elif self.isGuessNameEdit():
-				try:
-					fileName = self.subString(mp3file, self.parseLine.text(), idx=idx)
-					mp3file.tmpProperties["fileName"].setText(fileName)
-				except Exception:
-					mp3file.tmpProperties["fileName"].setText("")
-			else:
-				if self.valueBox.currentIndex() == 0:
-					mp3file.tmpProperties[self.property].setText(mp3file.getProperty(self.property))
-				elif self.valueBox.currentIndex() == 1:
-					mp3file.tmpProperties[self.property].setText(mp3file.getProperty(self.property).lower())
-				elif self.valueBox.currentIndex() == 2:
-					mp3file.tmpProperties[self.property].setText(mp3file.getProperty(self.property).upper())
-				elif self.valueBox.currentIndex() == 3:
-					mp3file.tmpProperties[self.property].setText(mp3file.getProperty(self.property).capitalize())
-				elif self.valueBox.currentIndex() == 4:
-					regexSearch = None
-					if self.parseBox.currentIndex() >= 0 and self.parseLine.text() != "":
-						try:
-							regexSearch = self.searchString(self.parseLine.text(), mp3file.getProperty(self.parseBoxItemsKeys[self.parseBox.currentIndex()]))
-						except Exception:
-							regexSearch = None
-					try:
-						propertyValue = self.subString(mp3file, self.valueLine.text(), regexSearch=regexSearch, idx=idx)
-						mp3file.tmpProperties[self.property].setText(propertyValue)
-					except Exception:
-						mp3file.tmpProperties[self.property].setText("")
+		# Compile patterns once, then apply them to each file
+		parsePattern, valueTemplate = self.compilePatterns()
+		self.refreshContext = (parsePattern, valueTemplate, self.digitsSpinBox.value(), self.startIndexSpinBox.value())
+
+		if self.isGuessTagEdit() and parsePattern is not None:
+			# User regex is evaluated by worker processes, so runaway pattern can't freeze the window
+			visibleRows = self.tableWidget.getVisibleRows()
+			rows = list(visibleRows) + [i for i in range(len(self.data)) if i not in visibleRows]
+			self.matchJob = self.matchPool.match(parsePattern.pattern, rows, [self.data[i].baseName for i in rows], priority=len(visibleRows))
+			self.matchTimer.start()
+		elif not self.isCoverEdit():
+			visibleRows = self.tableWidget.getVisibleRows()
+			self.pendingRows.extend(i for i in range(len(self.data)) if i not in visibleRows)
+			self.pendingRowsSet.update(self.pendingRows)
+			self.refreshRows(visibleRows)
+			if self.pendingRows:
+				self.idleTimer.start()
 
 		if self.tableWidget.rowCount() > 0:
 			self.finishButton.setEnabled(True)
 		else:
 			self.finishButton.setEnabled(False)
 
-	def validateChanges(self, fileNamesRelPath, fileNamesAbsPath):
-		"""Validate changes before executing the changes
+	def updateRow(self, idx):
+		"""Compute new values of one row and store them in the session
+
+		Arguments:
+			idx {int} -- Row index
+		"""
+		parsePattern, valueTemplate, digits, startIndex = self.refreshContext
+		self.pendingRowsSet.discard(idx)
+		self.session.set(idx, self.computeRow(idx, self.data[idx], parsePattern, valueTemplate, digits, startIndex))
+
+	def refreshRows(self, rows):
+		"""Compute new values of rows and show them in SortTable
+
+		Arguments:
+			rows {Iterable[int]} -- Row indices
+		"""
+		rows = list(rows)
+		for idx in rows:
+			self.updateRow(idx)
+		if rows:
+			self.model.rowsChanged(min(rows), max(rows))
+
+	def processPendingRows(self):
+		"""Compute pending rows for one time slice (called repeatedly during idle time)
+		"""
+		rows = list()
+		deadline = time.perf_counter() + self.REFRESH_SLICE
+		while self.pendingRows and time.perf_counter() < deadline:
+			idx = self.pendingRows.popleft()
+			if idx in self.pendingRowsSet:
+				self.updateRow(idx)
+				rows.append(idx)
+		if rows:
+			self.model.rowsChanged(min(rows), max(rows))
+		if not self.pendingRows:
+			self.idleTimer.stop()
+
+	def setGuessedTags(self, results):
+		"""Set guessed tags evaluated by worker processes to SortTable
 
 		Arguments:
-			fileNamesRelPath {List} -- List of relative paths of mp3files
-			fileNamesAbsPath {List} -- List of absolute paths of mp3files
+			results {Iterable[Tuple[int, Dict[str, str]]]} -- Row indices and parsed properties
+		"""
+		rows = list()
+		for idx, fields in results:
+			self.session.set(idx, self.guessedTagValues(fields))
+			rows.append(idx)
+		if rows:
+			self.model.rowsChanged(min(rows), max(rows))
+
+	def processMatchResults(self):
+		"""Collect results from worker processes (called periodically while the job is running)
+		"""
+		if self.matchJob is None:
+			self.matchTimer.stop()
+			return
+		try:
+			self.setGuessedTags(self.matchJob.collect())
+		except matcher.MatchTimeout as e:
+			self.handleMatchTimeout(e)
+			return
+		if self.matchJob.isDone():
+			self.matchTimer.stop()
+			self.matchJob = None
+
+	def handleMatchTimeout(self, error):
+		"""Handle pattern which exceeded its time budget (it's already cancelled, guessed tags are cleared)
+
+		Arguments:
+			error {MatchTimeout} -- Timeout error
+		"""
+		self.matchTimer.stop()
+		self.matchJob = None
+		self.setGuessedTags((i, {}) for i in range(len(self.data)))
+		self.showPatternError("Vyhodnocení vzoru trvalo déle než {} s, bylo zrušeno.".format(error.timeout))
+
+	def prioritizeVisibleRows(self, *args):
+		"""Compute pending rows which became visible (after scrolling) before the others
+		"""
+		if self.pendingRowsSet:
+			self.refreshRows([i for i in self.tableWidget.getVisibleRows() if i in self.pendingRowsSet])
+
+	def flushRefresh(self):
+		"""Finish all scheduled and pending computation synchronously (before saving the changes)
 
 		Returns:
-			bool -- True/False
+			bool -- True/False (False if the pattern exceeded its time budget)
+		"""
+		if self.refreshTimer.isActive():
+			self.refreshDataInTable()
+		if self.pendingRowsSet:
+			self.refreshRows(sorted(self.pendingRowsSet))
+		if self.matchJob is not None:
+			try:
+				results = self.matchJob.wait()
+			except matcher.MatchTimeout as e:
+				self.handleMatchTimeout(e)
+				return False
+			self.matchJob = None
+			self.setGuessedTags(results)
+		self.cancelRefresh()
+		return True
+
+	def validateChanges(self, paths):
+		"""Validate renames before executing the changes
+
+		Arguments:
+			paths {List[str]} -- New paths of mp3files
+
+		Returns:
+			RenamePlan -- Plan of renames (None if the files can't be renamed)
+		"""
+		plan = renamer.RenamePlan(zip([mp3file.path for mp3file in self.data], paths))
+		if plan.conflicts:
+			dst, conflict = plan.conflicts[0]
+			if conflict == plan.EMPTY:
+				message = "Nelze přejmenovat soubory, nový název souboru \"{}\" je prázdný.".format(os.path.basename(plan.sources[plan.targets.index(dst)]))
+			elif conflict == plan.DUPLICATE:
+				message = "Nelze přejmenovat soubory, přejmenováním by bylo vytvořeno více souborů s názvem \"{}\".".format(os.path.basename(dst))
+			else:
+				message = "Nelze přejmenovat soubory, soubor \"{}\" již existuje.".format(os.path.basename(dst))
+			QtWidgets.QMessageBox.warning(self, "Nelze přejmenovat soubory", message)
+			return None
+		return plan
+
+	def renameFiles(self, paths):
+		"""Rename (or move) all mp3files as one batch (swaps and cycles are allowed, failed batch is rolled back)
+
+		Arguments:
+			paths {List[str]} -- New paths of mp3files
+
+		Returns:
+			bool -- True/False (if successfull or not)
 		"""
-		if self.property == "fileName" or self.isGuessNameEdit():
-			for idx, mp3file in enumerate(self.data):
-				if not mp3file.canRenameFilename(fileNamesRelPath[idx]) or fileNamesAbsPath.count(fileNamesAbsPath[idx]) > 1:
-					QtWidgets.QMessageBox.warning(self, "NNelze přejmenovat soubory", "Nelze přejmenovat soubory, soubor \"{}\" již existuje, nebo by přejmenováním bylo vytvořeno více souborů se stejným názvem.".format(fileNamesRelPath[idx]))
-					return False
+		plan = self.validateChanges(paths)
+		if plan is None:
+			return False
+		oldPaths = [mp3file.path for mp3file in self.data]
+		try:
+			plan.execute()
+		except renamer.RenameError as e:
+			if e.rolledBack:
+				QtWidgets.QMessageBox.warning(self, "Nelze přejmenovat soubory", "Přejmenování souboru \"{}\" selhalo, všechny změny byly vráceny zpět.".format(os.path.basename(e.src)))
+			else:
+				QtWidgets.QMessageBox.critical(self, "Nelze přejmenovat soubory", "Přejmenování souboru \"{}\" selhalo a změny nebylo možné vrátit zpět.".format(os.path.basename(e.src)))
+			return False
+		for mp3file, path in zip(self.data, plan.targets):
+			mp3file.setPath(path)
+		self.mainWindow.recordChanges(self.titleLabel.text(), [journal.FileChange(i, newPath=j) for (i, j) in zip(oldPaths, plan.targets) if i != j])
+		return True
+
+	def saveTags(self, skipEmpty=False):
+		"""Save changed tags of all files in parallel as one undoable operation
+
+		Keyword Arguments:
+			skipEmpty {bool} -- If empty new values keep the current value (default: {False})
+
+		Returns:
+			bool -- True/False (if successfull or not)
+		"""
+		changes = list()
+		for idx, mp3file in enumerate(self.data):
+			values = dict()
+			for property in self.session.values:
+				old, new = mp3file.getProperty(property), self.session.get(property, idx)
+				if new != old and (new != "" or not skipEmpty):
+					values[property] = (old, new)
+			if values:
+				changes.append(journal.FileChange(mp3file.path, values))
+		errors = self.mainWindow.executeChanges(self.titleLabel.text(), changes)
+		failed = [os.path.basename(i.path) for (i, j) in zip(changes, errors) if j is not None]
+		if failed:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit data", "Tagy se nepodařilo uložit do souborů:\n{}".format("\n".join(failed)))
+			return False
 		return True
 
 	def saveChanges(self):
@@ -850,70 +1291,90 @@ class EditWindow(QtWidgets.QMainWindow):
 			bool -- True/False (if successfull or not)
 		"""
 		if self.isGuessTagEdit():
-			for idx, mp3file in enumerate(self.data):
-				for property in mp3file.tmpProperties:
-					if property in self.property_2_name:
-						value = mp3file.tmpProperties[property].text()
-						if value != "":
-							mp3file.saveTagToFile(property, value)
-		elif self.isGuessNameEdit():
-			# Rename file if needed
-			fileNamesRelPath = [mp3file.tmpProperties["fileName"].text() for mp3file in self.data]
-			fileNamesAbsPath = [os.path.join(mp3file.baseDir, mp3file.tmpProperties["fileName"].text()) for mp3file in self.data]
-			if not self.validateChanges(fileNamesRelPath, fileNamesAbsPath):
-				return False
+			return self.saveTags(skipEmpty=True)
+		elif self.isGuessNameEdit() or self.property == "fileName":
+			return self.renameFiles([os.path.join(mp3file.baseDir, self.session.get("fileName", idx)) for (idx, mp3file) in enumerate(self.data)])
+		elif self.isOrganizeEdit():
+			return self.renameFiles([os.path.join(self.organize_root, self.session.get("fileName", idx)) for (idx, mp3file) in enumerate(self.data)])
+		elif self.isCoverEdit():
+			return self.saveCover()
+		return self.saveTags()
+
+	def saveCover(self):
+		'''Write the chosen cover to all files in parallel (the image was read and decoded only once)
 
-			for mp3file in self.data:
-				value = mp3file.tmpProperties["fileName"].text()
-				if value != "":
-					mp3file.saveTagToFile("fileName", value)
-		else:
-			fileNamesRelPath = [mp3file.tmpProperties[self.property].text() for mp3file in self.data]
-			fileNamesAbsPath = [os.path.join(mp3file.baseDir, mp3file.tmpProperties[self.property].text()) for mp3file in self.data]
-			if not self.validateChanges(fileNamesRelPath, fileNamesAbsPath):
-				return False
-			for mp3file in self.data:
-				mp3file.saveTagToFile(self.property, mp3file.tmpProperties[self.property].text())
+		Returns:
+
+			bool -- True/False (if successfull or not)
+		'''
+		if self.imageBytes is None:
+			return True
+		data = self.imageBytes
+		if self.normalizeCheckBox.isChecked():
+			# Normalized once, all files of the batch share the result (MIME type is detected from the data when it's written)
+			data = images.normalizeImage(data, quality=self.qualitySpinBox.value())[0]
+			self.mainWindow.statusbar.showMessage("Obal alba byl zmenšen o {} v každém souboru.".format(images.formatSize(len(self.imageBytes) - len(data))))
+		# Old covers are read when they're replaced, the journal stores covers only of recorded changes
+		key = journal.coverKey(data)
+		errors = self.mainWindow.executeChanges(self.titleLabel.text(), [journal.FileChange(mp3file.path, cover=(journal.UNKNOWN, key)) for mp3file in self.data], {key: data})
+		failed = list()
+		for mp3file, error in zip(self.data, errors):
+			if error is None:
+				mp3file.cover.setText(self.imagePath)
+			else:
+				failed.append(mp3file.baseName)
+		if failed:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit fotku alba", "Fotku alba se nepodařilo uložit do souborů:\n{}".format("\n".join(failed)))
+			return False
 		return True
 
 	def loadCoverImageFromBytes(self, bytes=None):
-		'''Method is loading cover image (QPixmap) from bytes
+		'''Method is showing cover image from bytes (decoded at the size of the label, big images off the GUI thread)
 
 		Arguments:
 
 			bytes {BytesIO} -- Bytes containing image (loaded from file or from tags data, or whatever)
 		'''
 		if bytes is not None:
-			self.image = QtGui.QPixmap.fromImage(QtGui.QImage.fromData(bytes))
-			img = self.image
-			if (img.width() / img.height()) > (self.imageLabel.width() / self.imageLabel.height()):
-				img = img.scaledToWidth(self.imageLabel.width())
-			else:
-				img = img.scaledToHeight(self.imageLabel.height())
-			self.imageLabel.setPixmap(img)
-			self.imageLabel.show()
+			self.mainWindow.pixmapCache.load(bytes, self.imageLabel.width(), self.imageLabel.height(), lambda pixmap: self.showCoverPixmap(bytes, pixmap))
 		else:
-			self.image = None
 			self.imagePath = None
-			for mp3file in self.data:
-				mp3file.tmpProperties[self.property].setText("")
+			self.imageBytes = None
+			self.session.fill(self.property, "")
+			self.model.rowsChanged(0, len(self.session) - 1)
 			self.imageLabel.hide()
 
+	def showCoverPixmap(self, data, pixmap):
+		'''Show decoded cover image (ignored if another image was chosen meanwhile)
+
+		Arguments:
+
+			data {bytes} -- Image data of decoded cover
+			pixmap {QtGui.QPixmap} -- Pixmap scaled to the label
+		'''
+		if data is self.imageBytes:
+			self.imageLabel.setPixmap(pixmap)
+			self.imageLabel.show()
+
 	def handleChooseImageButton(self):
 		'''Handle choose image button, select path and redraw cover image
 		'''
 		path = QtWidgets.QFileDialog.getOpenFileName(self, "Select image cover", filter="images ({})".format(" ".join(["*." + i for i in self.coverExtensions])))[0]
 		if path != "":
+			try:
+				self.imageBytes, _ = covers.readCoverImage(path)
+			except (covers.CoverError, OSError) as e:
+				QtWidgets.QMessageBox.warning(self, "Nelze načíst fotku alba", str(e))
+				return
 			self.imagePath = path
-			with open(self.imagePath, "rb") as coverFile:
-				self.loadCoverImageFromBytes(coverFile.read())
-			for mp3file in self.data:
-				mp3file.tmpProperties[self.property].setText(self.imagePath)
+			self.loadCoverImageFromBytes(self.imageBytes)
+			self.session.fill(self.property, self.imagePath)
+			self.model.rowsChanged(0, len(self.session) - 1)
 
 	def handleRemoveImageButton(self):
 		'''Handle delete cover album button
 		'''
-		if self.image is not None:
+		if self.imageBytes is not None:
 			msg = "Opravdu chcete odstranit fotku alba?"
 			reply = QtWidgets.QMessageBox.question(self, 'Message', msg, QtWidgets.QMessageBox.Yes, QtWidgets.QMessageBox.No)
 
@@ -930,18 +1391,325 @@ class EditWindow(QtWidgets.QMainWindow):
 			event {[type]} -- [description]
 		'''
 		self.closed = True
+		self.cancelRefresh()
+		self.matchPool.terminate()
+
+		# Free the edit session
+		self.model.setSession(None)
+		self.session = None
+		self.data = None
 		self.mainWindow.setEnabled(True)
 		event.accept()
 
 	def handleFinishButton(self):
 		"""Handler for finish button (only if saving the changes were done successfully)
 		"""
-		if self.saveChanges():
+		if self.flushRefresh() and self.saveChanges():
 			self.mainWindow.redrawCoverImage()
 			self.mainWindow.fillLineEdits()
 			self.close()
 
+	def getRecipeStep(self):
+		"""Create recipe step from the current edit
+
+		Raises:
+			PatternError -- If the pattern can not be compiled
+
+		Returns:
+			object -- Recipe step (None if the edit can't be saved as a step)
+		"""
+		if self.isGuessTagEdit():
+			return recipes.GuessTagsStep(self.parseLine.text()) if self.parseLine.text() != "" else None
+		elif self.isGuessNameEdit():
+			return recipes.RenameStep(self.parseLine.text()) if self.parseLine.text() != "" else None
+		elif self.isCommonEdit():
+			modes = {1: "lower", 2: "upper", 3: "capitalize"}
+			if self.valueBox.currentIndex() in modes:
+				return recipes.CaseStep(self.property, modes[self.valueBox.currentIndex()])
+			elif self.valueBox.currentIndex() == 4:
+				parseProperty = self.getParseProperty() if self.parseBox.currentIndex() >= 0 and self.parseLine.text() != "" else None
+				return recipes.TemplateStep(self.property, self.valueLine.text(), parseProperty, self.parseLine.text() if parseProperty is not None else None)
+		return None
+
+	def handleRecipeButton(self):
+		"""Add the current edit as the next step of saved recipe (new recipe is created if the name doesn't exist)
+		"""
+		try:
+			step = self.getRecipeStep()
+			names = self.recipeStore.names()
+		except (patterns.PatternError, recipes.RecipeError) as e:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit recept", "Úpravu nelze uložit do receptu: {}".format(e))
+			return
+		if step is None:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit recept", "Tuto úpravu nelze uložit do receptu, nejdříve vyplňte vzor nebo zvolte úpravu hodnoty.")
+			return
+
+		name, ok = QtWidgets.QInputDialog.getItem(self, "Přidat do receptu", "Název receptu:", names, 0, True)
+		if ok and name != "":
+			recipe = self.recipeStore.get(name) if name in names else recipes.Recipe(name, [], self.startIndexSpinBox.value(), self.digitsSpinBox.value())
+			recipe.steps.append(step)
+			self.recipeStore.save(recipe)
+			self.statusbar.showMessage("Krok byl přidán do receptu \"{}\" (počet kroků: {}).".format(name, len(recipe.steps)))
+
 	def handleCancelButton(self):
 		"""Hanadle close button
 		"""
-		self.close()
\ No newline at end of file
+		self.close()
+
+
+class ReplaceModel(QtCore.QAbstractTableModel):
+	'''Model of find and replace preview containing only changed values
+
+	Changes are computed lazily in batches when the view scrolls to them (fetchMore)
+
+	Arguments:
+
+		QtCore {QAbstractTableModel} -- Base class
+	'''
+	HEADERS = ["Soubor", "Položka", "Původní", "Nový"]
+	# Number of changes computed at once
+	BATCH_SIZE = 256
+
+	def __init__(self, *args):
+		'''Initializer of ReplaceModel
+		'''
+		super().__init__(*args)
+		self.changes = list()
+		self.pending = None
+		self.property_2_name = dict()
+
+	def setChanges(self, changes):
+		"""Set changes to be previewed (the model is reset, first batch is computed immediately)
+
+		Arguments:
+			changes {Iterator[Tuple[MP3File, str, str, str]]} -- Lazily computed mp3files, property names, old and new values
+		"""
+		self.beginResetModel()
+		self.changes = list()
+		self.pending = changes
+		self.endResetModel()
+		self.fetchMore()
+
+	def rowCount(self, parent=QtCore.QModelIndex()):
+		return 0 if parent.isValid() else len(self.changes)
+
+	def columnCount(self, parent=QtCore.QModelIndex()):
+		return 0 if parent.isValid() else len(self.HEADERS)
+
+	def data(self, index, role=Qt.Qt.DisplayRole):
+		if role == Qt.Qt.DisplayRole and index.isValid():
+			mp3file, property, old, new = self.changes[index.row()]
+			return [mp3file.baseName, self.property_2_name.get(property, property), old, new][index.column()]
+		return None
+
+	def headerData(self, section, orientation, role=Qt.Qt.DisplayRole):
+		if role == Qt.Qt.DisplayRole:
+			if orientation == Qt.Qt.Horizontal:
+				return self.HEADERS[section]
+			return str(section + 1)
+		return None
+
+	def canFetchMore(self, parent=QtCore.QModelIndex()):
+		return not parent.isValid() and self.pending is not None
+
+	def fetchMore(self, parent=QtCore.QModelIndex()):
+		"""Compute next batch of changes
+
+		Keyword Arguments:
+			parent {QModelIndex} -- Parent index (default: {QtCore.QModelIndex()})
+		"""
+		if not self.canFetchMore(parent):
+			return
+		batch = list()
+		for change in self.pending:
+			batch.append(change)
+			if len(batch) == self.BATCH_SIZE:
+				break
+		else:
+			self.pending = None
+		if batch:
+			self.beginInsertRows(QtCore.QModelIndex(), len(self.changes), len(self.changes) + len(batch) - 1)
+			self.changes.extend(batch)
+			self.endInsertRows()
+
+	def isComplete(self):
+		"""If all changes were computed
+
+		Returns:
+			bool -- True/False
+		"""
+		return self.pending is None
+
+
+class ReplaceWindow(QtWidgets.QDialog):
+	'''Dialog for regex find and replace over tags of the whole loaded library
+
+	Candidate files are found using text index, so the regex runs only on files which can match
+	'''
+	# Debounce after the last change in ms
+	REFRESH_DELAY = 150
+
+	def __init__(self, *args):
+		"""Initializer
+		"""
+		super(QtWidgets.QDialog, self).__init__(*args)
+
+		# Load UI
+		forms.setupUi(self, "replace_dialog")
+
+	def setup(self, mainWindow, property_2_name):
+		"""Setup find and replace dialog
+
+		Arguments:
+
+			mainWindow {QtWidgets.QMainWindow} -- parent object
+			property_2_name {OrderedDict} -- Property names and their labels
+		"""
+		self.mainWindow = mainWindow
+		self.mp3files = list()
+		self.index = None
+		self.model = ReplaceModel(self)
+		self.model.property_2_name = property_2_name
+		self.previewTable.setModel(self.model)
+
+		# Only text tags can be replaced
+		self.properties = [i for i in property_2_name if i not in ("fileName", "cover")]
+		for property in self.properties:
+			item = QtWidgets.QListWidgetItem(property_2_name[property], self.fieldList)
+			item.setFlags(Qt.Qt.ItemIsUserCheckable | Qt.Qt.ItemIsEnabled)
+			item.setCheckState(Qt.Qt.Checked)
+
+		self.refreshTimer = QtCore.QTimer(self)
+		self.refreshTimer.setSingleShot(True)
+		self.refreshTimer.setInterval(self.REFRESH_DELAY)
+		self.refreshTimer.timeout.connect(self.refreshPreview)
+
+		# Connect
+		self.findLine.textChanged.connect(self.scheduleRefresh)
+		self.replaceLine.textChanged.connect(self.scheduleRefresh)
+		self.caseCheckBox.stateChanged.connect(self.scheduleRefresh)
+		self.fieldList.itemChanged.connect(self.scheduleRefresh)
+		self.applyButton.clicked.connect(self.handleApplyButton)
+
+	def exec(self, mp3files):
+		"""Run find and replace dialog over the mp3files
+
+		Arguments:
+
+			mp3files {List[MP3File]} -- Whole loaded library
+		"""
+		self.mp3files = mp3files
+		self.index = replacer.TextIndex((i, {j: i.getProperty(j) for j in self.properties}) for i in self.mp3files)
+		self.refreshPreview()
+		result = super().exec()
+
+		# Free the library
+		self.refreshTimer.stop()
+		self.model.setChanges(iter(()))
+		self.index = None
+		self.mp3files = list()
+		return result
+
+	def getCheckedProperties(self):
+		"""Get properties checked in field list
+
+		Returns:
+
+			List[str] -- Property names
+		"""
+		return [property for (idx, property) in enumerate(self.properties) if self.fieldList.item(idx).checkState() == Qt.Qt.Checked]
+
+	def compileFindReplace(self):
+		"""Compile find and replace from lineEdits (error is shown inline)
+
+		Returns:
+
+			FindReplace -- Compiled find and replace (None if empty or not valid)
+		"""
+		if self.findLine.text() == "":
+			self.showStatus()
+			return None
+		try:
+			findReplace = replacer.compileFindReplace(self.findLine.text(), self.replaceLine.text(), not self.caseCheckBox.isChecked())
+		except patterns.PatternError as e:
+			self.showStatus("Chybný vzor: {}".format(e), error=True)
+			return None
+		self.showStatus()
+		return findReplace
+
+	def showStatus(self, message="", error=False):
+		"""Show status message (errors are red)
+
+		Keyword Arguments:
+
+			message {str} -- Message (default: {""})
+			error {bool} -- If the message is an error (default: {False})
+		"""
+		self.findLine.setStyleSheet("QLineEdit { color: #c00000; }" if error else "")
+		self.statusLabel.setStyleSheet("QLabel { color: #c00000; }" if error else "")
+		self.statusLabel.setText(message)
+
+	def iterChanges(self, findReplace, properties, candidates):
+		"""Lazily compute changes of candidate files
+
+		Arguments:
+
+			findReplace {FindReplace} -- Compiled find and replace
+			properties {List[str]} -- Searched properties
+			candidates {List[MP3File]} -- Candidate files from the index
+
+		Yields:
+
+			Tuple[MP3File, str, str, str] -- mp3file, property name, old and new value
+		"""
+		for mp3file in candidates:
+			for property, old, new in findReplace.changes(mp3file.getProperty, properties):
+				yield (mp3file, property, old, new)
+
+	def scheduleRefresh(self, *args):
+		"""Schedule refresh of the preview (debounced)
+		"""
+		self.refreshTimer.start()
+
+	def refreshPreview(self):
+		"""Refresh the preview (only the first batch of changes is computed, the rest when it's scrolled to)
+		"""
+		self.refreshTimer.stop()
+		findReplace = self.compileFindReplace()
+		properties = self.getCheckedProperties()
+		if findReplace is None or not properties:
+			self.model.setChanges(iter(()))
+			self.applyButton.setEnabled(False)
+			return
+
+		candidates = self.index.candidates(findReplace.literal, properties)
+		self.model.setChanges(self.iterChanges(findReplace, properties, candidates))
+		changes = "{}{}".format(self.model.rowCount(), "" if self.model.isComplete() else "+")
+		self.showStatus("Prohledáno souborů: {} z {}, nalezeno změn: {}".format(len(candidates), len(self.mp3files), changes))
+		self.applyButton.setEnabled(self.model.rowCount() > 0)
+
+	def handleApplyButton(self):
+		"""Apply all changes in parallel as one undoable operation (one write per file)
+		"""
+		findReplace = self.compileFindReplace()
+		properties = self.getCheckedProperties()
+		if findReplace is None or not properties:
+			return
+
+		# Group changes by file, so every file is written once
+		values = OrderedDict()
+		for mp3file, property, old, new in self.iterChanges(findReplace, properties, self.index.candidates(findReplace.literal, properties)):
+			values.setdefault(mp3file, OrderedDict())[property] = (old, new)
+
+		errors = self.mainWindow.executeChanges("Najít a nahradit", [journal.FileChange(i.path, j) for (i, j) in values.items()])
+		failed = list()
+		for mp3file, error in zip(values, errors):
+			if error is None:
+				self.index.add(mp3file, {i: mp3file.getProperty(i) for i in self.properties})
+			else:
+				failed.append(mp3file)
+		self.refreshPreview()
+		if failed:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit data", "Nepodařilo se uložit {} z {} souborů, např. \"{}\".".format(len(failed), len(values), failed[0].baseName))
+		else:
+			self.showStatus("Upraveno souborů: {}".format(len(values)))
@@ -0,0 +1,91 @@
+'''Forms and icons of the windows
+
+Forms are compiled to Python classes and icons are packed into Qt resource module by build_ui.py.
+If the build wasn't run (or the .ui file is newer than its compiled form), .ui files are parsed at runtime and icons are loaded from the ui directory.
+Paths don't depend on the working directory.
+'''
+import os
+import importlib
+
+from PyQt5 import QtGui, uic
+
+try:
+	import mp3player.forms.resources_rc  # noqa: F401 (registers icons as :/icon/...)
+	RESOURCES = True
+except ModuleNotFoundError:
+	RESOURCES = False
+
+__all__ = ["UI_DIR", "FORMS", "setupUi", "icon"]
+
+# Directory with .ui files and icons
+UI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "ui")
+# Name of the form to class generated from it
+FORMS = {
+	"main_window": "Ui_MainWindow",
+	"group_edit": "Ui_editWindow",
+	"tag_dialog": "Ui_tagChooserDialog",
+	"replace_dialog": "Ui_replaceDialog",
+}
+
+# Icons are created once and shared
+icons = dict()
+
+
+def setupUi(widget, name):
+	'''Create widgets of the form in the widget (compiled form is used if it exists and it's up to date)
+
+	Arguments:
+
+		widget {QtWidgets.QWidget} -- Window or dialog, child widgets are set as its attributes
+		name {str} -- Name of the form (e.g. main_window)
+	'''
+	uiPath = os.path.join(UI_DIR, name + ".ui")
+	if isStale(uiPath, os.path.join(os.path.dirname(os.path.abspath(__file__)), name + "_ui.py")):
+		uic.loadUi(uiPath, widget)
+		return
+	moduleName = "{}.{}_ui".format(__name__, name)
+	try:
+		module = importlib.import_module(moduleName)
+	except ModuleNotFoundError as e:
+		if e.name != moduleName:
+			raise
+		uic.loadUi(uiPath, widget)
+		return
+	form = getattr(module, FORMS[name])()
+	form.setupUi(widget)
+	for key, value in vars(form).items():
+		setattr(widget, key, value)
+
+
+def isStale(uiPath, compiledPath):
+	'''Check if the .ui file was changed after the form was compiled
+
+	Arguments:
+
+		uiPath {str} -- Path to .ui file
+		compiledPath {str} -- Path to compiled module
+
+	Returns:
+
+		bool -- True if the .ui file is newer (False if any of the files is missing)
+	'''
+	try:
+		return os.stat(uiPath).st_mtime_ns > os.stat(compiledPath).st_mtime_ns
+	except OSError:
+		return False
+
+
+def icon(name):
+	'''Get icon by its file name (created at first use)
+
+	Arguments:
+
+		name {str} -- File name of the icon (e.g. play.png)
+
+	Returns:
+
+		QtGui.QIcon -- Icon
+	'''
+	if name not in icons:
+		icons[name] = QtGui.QIcon(":/icon/" + name if RESOURCES else os.path.join(UI_DIR, "icon", name))
+	return icons[name]
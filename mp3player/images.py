@@ -0,0 +1,253 @@
+import os
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5 import QtGui, QtCore, Qt
+
+import mp3player.core.tags as tags
+import mp3player.core.tracing as tracing
+
+__all__ = ["MAX_SIZE", "QUALITY", "normalizeImage", "formatSize", "decodeScaled", "PixmapCache", "ThumbnailCache"]
+
+# Maximal width and height of embedded cover in pixels
+MAX_SIZE = 1000
+# Quality of recompressed JPEG (0 - 100)
+QUALITY = 85
+# Images bigger than this (in bytes) are decoded in worker thread
+SYNC_DECODE_SIZE = 256 * 1024
+# Number of scaled pixmaps kept in cache
+CACHE_SIZE = 64
+# Width and height of thumbnails in the table
+THUMBNAIL_SIZE = 40
+# Directory of thumbnails persisted between sessions (file name is hash of the cover)
+THUMBNAIL_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "mp3player", "thumbnails")
+
+
+@tracing.traced("cover.normalize")
+def normalizeImage(data, maxSize=MAX_SIZE, quality=QUALITY):
+	'''Downsize the image and recompress it to JPEG (QImage is reentrant, so it can run in worker threads)
+
+	The original data are returned if the image can't be decoded or the result is not smaller
+
+	Arguments:
+
+		data {bytes} -- Image data
+
+	Keyword Arguments:
+
+		maxSize {int} -- Maximal width and height in pixels (default: {MAX_SIZE})
+		quality {int} -- JPEG quality (default: {QUALITY})
+
+	Returns:
+
+		Tuple[bytes, str] -- Image data and its MIME type
+	'''
+	original = (data, tags.coverMimeFromBytes(data) or "image/jpeg")
+	image = QtGui.QImage.fromData(data)
+	if image.isNull():
+		return original
+	if image.width() > maxSize or image.height() > maxSize:
+		image = image.scaled(maxSize, maxSize, Qt.Qt.KeepAspectRatio, Qt.Qt.SmoothTransformation)
+	if image.hasAlphaChannel():
+		# JPEG has no alpha channel, transparent parts would turn black
+		opaque = QtGui.QImage(image.size(), QtGui.QImage.Format_RGB32)
+		opaque.fill(Qt.Qt.white)
+		painter = QtGui.QPainter(opaque)
+		painter.drawImage(0, 0, image)
+		painter.end()
+		image = opaque
+
+	array = QtCore.QByteArray()
+	buffer = QtCore.QBuffer(array)
+	buffer.open(QtCore.QIODevice.WriteOnly)
+	if not image.save(buffer, "JPEG", quality):
+		return original
+	buffer.close()
+	result = bytes(array)
+	if len(result) >= len(data):
+		return original
+	return result, "image/jpeg"
+
+
+def formatSize(size):
+	'''Format size in bytes for humans
+
+	Arguments:
+
+		size {int} -- Size in bytes
+
+	Returns:
+
+		str -- Formatted size (e.g. 1.5 MB)
+	'''
+	for unit in ("B", "kB", "MB"):
+		if abs(size) < 1024:
+			return "{:.0f} {}".format(size, unit) if unit == "B" else "{:.1f} {}".format(size, unit)
+		size /= 1024
+	return "{:.1f} GB".format(size)
+
+
+@tracing.traced("cover.decode")
+def decodeScaled(data, width, height):
+	'''Decode the image directly at the size fitting into width x height (keeping aspect ratio)
+
+	Decoders which support it (e.g. JPEG) skip the full resolution, so it's also thread safe and cheap for huge covers
+
+	Arguments:
+
+		data {bytes} -- Image data
+		width {int} -- Maximal width
+		height {int} -- Maximal height
+
+	Returns:
+
+		QtGui.QImage -- Decoded image (null image if the data can't be decoded)
+	'''
+	buffer = QtCore.QBuffer()
+	buffer.setData(data)
+	buffer.open(QtCore.QIODevice.ReadOnly)
+	reader = QtGui.QImageReader(buffer)
+	size = reader.size()
+	if size.isValid() and width > 0 and height > 0:
+		reader.setScaledSize(size.scaled(width, height, Qt.Qt.KeepAspectRatio))
+	image = reader.read()
+	buffer.close()
+	return image
+
+
+class PixmapCache(QtCore.QObject):
+	'''Cache of scaled cover pixmaps keyed by (cover hash, label size), big images are decoded in worker thread
+
+	Arguments:
+
+		QtCore {QObject} -- Base class (decoded images are passed to GUI thread by queued signal)
+	'''
+	decoded = QtCore.pyqtSignal(object, object)
+
+	def __init__(self, size=CACHE_SIZE, parent=None):
+		super().__init__(parent)
+		self.size = size
+		self.pixmaps = OrderedDict()
+		self.pending = dict()
+		self.executor = ThreadPoolExecutor(max_workers=1)
+		self.decoded.connect(self.handleDecoded)
+
+	def load(self, data, width, height, callback):
+		'''Get scaled pixmap of the image, callback is called at once if it's cached (or small), otherwise after decoding
+
+		Arguments:
+
+			data {bytes} -- Image data
+			width {int} -- Width of the label
+			height {int} -- Height of the label
+			callback {Callable[[QtGui.QPixmap], None]} -- Called in GUI thread with the pixmap (null pixmap if the data can't be decoded)
+		'''
+		key = (hashlib.sha1(data).digest(), width, height)
+		if key in self.pixmaps:
+			tracing.count("cover.cacheHit")
+			self.pixmaps.move_to_end(key)
+			callback(self.pixmaps[key])
+		elif key in self.pending:
+			self.pending[key].append(callback)
+		elif len(data) <= SYNC_DECODE_SIZE:
+			self.pending[key] = [callback]
+			self.handleDecoded(key, decodeScaled(data, width, height))
+		else:
+			self.pending[key] = [callback]
+			self.executor.submit(lambda: self.decoded.emit(key, decodeScaled(data, width, height)))
+
+	def handleDecoded(self, key, image):
+		'''Store decoded image as pixmap (QPixmap can be created only in GUI thread) and call waiting callbacks
+
+		Arguments:
+
+			key {Tuple} -- Key of the request
+			image {QtGui.QImage} -- Decoded image
+		'''
+		pixmap = QtGui.QPixmap.fromImage(image)
+		self.pixmaps[key] = pixmap
+		while len(self.pixmaps) > self.size:
+			self.pixmaps.popitem(last=False)
+		for callback in self.pending.pop(key, []):
+			callback(pixmap)
+
+
+class ThumbnailCache(QtCore.QObject):
+	'''Loader of small cover thumbnails in worker threads with persistent cache on the disk (keyed by hash of the cover)
+
+	Once the thumbnail is stored, later sessions only read the cover bytes and never decode the original image
+
+	Arguments:
+
+		QtCore {QObject} -- Base class (loaded thumbnails are passed to GUI thread by queued signal)
+	'''
+	loaded = QtCore.pyqtSignal(object, object)
+
+	def __init__(self, directory=THUMBNAIL_DIR, size=THUMBNAIL_SIZE, workers=2, parent=None):
+		super().__init__(parent)
+		self.directory = directory
+		self.size = size
+		self.executor = ThreadPoolExecutor(max_workers=workers)
+
+	def pathOf(self, digest):
+		'''Get path of the thumbnail in the disk cache
+
+		Arguments:
+
+			digest {str} -- Hex hash of the cover
+
+		Returns:
+
+			str -- Path to thumbnail
+		'''
+		return os.path.join(self.directory, digest[:2], "{}-{}.png".format(digest, self.size))
+
+	@tracing.traced("cover.thumbnail")
+	def thumbnail(self, data):
+		'''Get thumbnail of the cover from the disk cache or create and store it (evaluated in worker thread)
+
+		Arguments:
+
+			data {bytes} -- Image data
+
+		Returns:
+
+			QtGui.QImage -- Thumbnail (null image if the data can't be decoded)
+		'''
+		path = self.pathOf(hashlib.sha1(data).hexdigest())
+		if os.path.exists(path):
+			image = QtGui.QImage(path)
+			if not image.isNull():
+				tracing.count("thumbnail.cacheHit")
+				return image
+		image = decodeScaled(data, self.size, self.size)
+		if not image.isNull():
+			try:
+				os.makedirs(os.path.dirname(path), exist_ok=True)
+				temporary = "{}.{}.tmp".format(path, os.getpid())
+				if image.save(temporary, "PNG"):
+					os.replace(temporary, path)
+			except OSError:
+				# Cache is only an optimization, the thumbnail is shown anyway
+				pass
+		return image
+
+	def request(self, token, read):
+		'''Load thumbnail in worker thread, `loaded` signal is emitted with the token and the image (None if there's no cover)
+
+		Arguments:
+
+			token {object} -- Identifier of the request passed back by the signal
+			read {Callable[[], bytes]} -- Function reading cover bytes (None if there's no cover), called in worker thread
+		'''
+		def load():
+			try:
+				data = read()
+				image = None if data is None else self.thumbnail(data)
+			# Mutagen errors don't share common base with OSError
+			except Exception:
+				image = None
+			self.loaded.emit(token, image)
+
+		self.executor.submit(load)
@@ -0,0 +1,40 @@
+import os
+import json
+import socket
+import tempfile
+
+__all__ = ["SOCKET_PATH", "sendToRunning"]
+
+# Local socket of the running player (one per user)
+SOCKET_PATH = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), "mp3player-{}.sock".format(os.getuid() if hasattr(os, "getuid") else os.getlogin()))
+# Timeout of connecting to the running player in seconds
+TIMEOUT = 0.5
+
+
+def sendToRunning(paths, play=True, path=SOCKET_PATH):
+	'''Hand the files to the running player (without importing Qt, so the second launch is cheap)
+
+	Arguments:
+
+		paths {List[str]} -- Paths to mp3 files (relative paths are resolved here)
+
+	Keyword Arguments:
+
+		play {bool} -- If the first file should be played, otherwise files are only enqueued (default: {True})
+		path {str} -- Path to the local socket (default: {SOCKET_PATH})
+
+	Returns:
+
+		bool -- True if the running player received the files, False if there's no running player
+	'''
+	if not hasattr(socket, "AF_UNIX"):
+		return False
+	message = json.dumps({"paths": [os.path.abspath(i) for i in paths], "play": play}) + "\n"
+	try:
+		with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+			client.settimeout(TIMEOUT)
+			client.connect(path)
+			client.sendall(message.encode("utf-8"))
+	except OSError:
+		return False
+	return True
@@ -0,0 +1,98 @@
+import json
+
+from PyQt5 import QtCore, QtNetwork
+
+import mp3player.instance as instance
+
+__all__ = ["InstanceServer", "createServer"]
+
+
+class InstanceServer(QtCore.QObject):
+	'''Local socket server of the running player, every message is JSON line with paths and play flag
+
+	Arguments:
+
+		QtCore {QObject} -- Base class
+	'''
+	filesReceived = QtCore.pyqtSignal(list, bool)
+
+	def __init__(self, parent=None):
+		super().__init__(parent)
+		self.server = QtNetwork.QLocalServer(self)
+		self.server.newConnection.connect(self.handleNewConnection)
+		self.buffers = dict()
+
+	def listen(self, path):
+		'''Start listening (stale socket of crashed player is removed)
+
+		Arguments:
+
+			path {str} -- Path to the local socket
+
+		Returns:
+
+			bool -- True if the server is listening
+		'''
+		QtNetwork.QLocalServer.removeServer(path)
+		self.server.setSocketOptions(QtNetwork.QLocalServer.UserAccessOption)
+		return self.server.listen(path)
+
+	def close(self):
+		'''Stop listening and remove the socket
+		'''
+		self.server.close()
+
+	def handleNewConnection(self):
+		'''Handle connection of another launch
+		'''
+		while self.server.hasPendingConnections():
+			connection = self.server.nextPendingConnection()
+			self.buffers[connection] = b""
+			connection.readyRead.connect(lambda connection=connection: self.handleReadyRead(connection))
+			connection.disconnected.connect(lambda connection=connection: self.handleDisconnected(connection))
+
+	def handleReadyRead(self, connection):
+		'''Read complete messages from the connection
+
+		Arguments:
+
+			connection {QtNetwork.QLocalSocket} -- Connection
+		'''
+		self.buffers[connection] += bytes(connection.readAll())
+		lines = self.buffers[connection].split(b"\n")
+		self.buffers[connection] = lines.pop()
+		for line in lines:
+			try:
+				message = json.loads(line.decode("utf-8"))
+				paths = [str(i) for i in message["paths"]]
+				play = bool(message.get("play", True))
+			except (ValueError, KeyError, TypeError):
+				continue
+			self.filesReceived.emit(paths, play)
+
+	def handleDisconnected(self, connection):
+		'''Forget closed connection
+
+		Arguments:
+
+			connection {QtNetwork.QLocalSocket} -- Connection
+		'''
+		self.handleReadyRead(connection)
+		self.buffers.pop(connection, None)
+		connection.deleteLater()
+
+
+def createServer(parent=None, path=instance.SOCKET_PATH):
+	'''Create server receiving files from later launches
+
+	Keyword Arguments:
+
+		parent {QtCore.QObject} -- Parent of the server (default: {None})
+		path {str} -- Path to the local socket (default: {instance.SOCKET_PATH})
+
+	Returns:
+
+		InstanceServer -- Listening server (None if the socket can't be created)
+	'''
+	server = InstanceServer(parent)
+	return server if server.listen(path) else None
@@ -1,17 +1,26 @@
 import os
 import math
 import threading
-from collections import OrderedDict, defaultdict
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import OrderedDict
+from typing import List
 import random
 
-import vlc
-import mutagen
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3, APIC
-from PyQt5 import QtWidgets, uic, Qt, QtGui, QtCore
-
-import mp3player.edit_window as edit_window
+from PyQt5 import QtWidgets, Qt, QtGui, QtCore
+
+import mp3player.core as core
+import mp3player.core.tags as tags
+import mp3player.core.recipes as recipes
+import mp3player.core.renamer as renamer
+import mp3player.core.covers as covers
+import mp3player.core.snapshot as snapshot
+import mp3player.core.playlists as playlists
+import mp3player.core.tabular as tabular
+import mp3player.core.journal as journal
+import mp3player.core.tracing as tracing
+import mp3player.images as images
+import mp3player.forms as forms
+import mp3player.control as control
 
 __all__ = ["MP3Tag", "MP3File", "MP3Table", "MP3Player"]
 
@@ -42,11 +51,15 @@ class MP3Tag(QtWidgets.QTableWidgetItem):
 
 
 class MP3File(object):
-	'''Initializer for MP3File class
+	'''Initializer for MP3File class (Qt adapter of core Track, tags are shown by MP3Tag items and cover as QPixmap)
 
 	Arguments:
 
 		path {str} -- path to MP3 file
+
+	Keyword Arguments:
+
+		track {Track} -- Already loaded track, e.g. by worker process (default: {None} - loaded from path)
 	'''
 	property_2_name: OrderedDict = OrderedDict({
 		"fileName": "Soubor",  # Not tag, just for general usage
@@ -81,93 +94,99 @@ class MP3File(object):
 		"COMM": "comment",
 		"APIC": "cover",
 	})
-	coverExtensions = ["jpg", "jpeg", "gif", "png"]
-
-	def __init__(self, path):
+	coverExtensions = tags.COVER_EXTENSIONS
+	# Downsize and recompress covers before embedding (switched in menu)
+	normalizeCovers = False
+	coverQuality = images.QUALITY
+	# Folder images (cover.jpg, folder.png, ...) shared by all files
+	folderCovers = covers.FolderCovers()
+
+	def __init__(self, path, track=None):
 		super(object, self).__init__()
 
-		self.path = path
-		self.baseDir = os.path.dirname(self.path)
-		self.baseName = os.path.basename(self.path)
+		# Plain record of the file (without Qt), cover is loaded when it's needed
+		self.track = core.Track.load(path, cover=False) if track is None else track
 
 		# Create tags and set empty strings as its value
 		self.initProperties()
 
-		# Load Tags from file
-		self.fillTagsFromFile()
+		# Show tags of the track
+		self.fillTagsFromTrack()
+
+	@property
+	def path(self):
+		return self.track.path
+
+	@property
+	def baseDir(self):
+		return self.track.baseDir
+
+	@property
+	def baseName(self):
+		return self.track.baseName
+
+	@property
+	def songLength(self):
+		return self.track.length
+
+	@property
+	def songBitrate(self):
+		return self.track.bitrate
 
 	def loadCoverImageFromFile(self):
-		'''Method is loading cover image (QPixmap) to `image` property from file (by path)
+		'''Method is loading cover image bytes to `imageBytes` property from file (by path)
 		'''
 		# Remove image
-		self.image = None
+		self.imageBytes = None
+		self.coverFromFolder = False
 
-		# Reload image from file
-		audio = MP3(self.path, ID3=ID3)
-		for key in audio.keys():
-			for tag in self.tag_2_property:
-				if tag in key:
-					if tag == "APIC":
-						self.loadCoverImageFromBytes(audio.tags.get(key).data)
+		# Reload image from file, use folder image if there's no embedded cover
+		if self.track.reloadCover() is not None:
+			self.loadCoverImageFromBytes(self.track.cover)
+		else:
+			image = self.folderCovers.forTrack(self.path)
+			if image is not None:
+				self.coverFromFolder = True
+				self.loadCoverImageFromBytes(image[0])
 
 	def loadCoverImageFromBytes(self, bytes):
-		'''Method is loading cover image (QPixmap) from bytes
+		'''Method is loading cover image from bytes (it's decoded at the size of the label when it's shown)
 
 		Arguments:
 
 			bytes {BytesIO} -- Bytes containing image (loaded from file or from tags data, or whatever)
 		'''
 		self.imageBytes = bytes
-		self.image = QtGui.QPixmap.fromImage(QtGui.QImage.fromData(self.imageBytes))
 
 	def removeCoverImageFromFile(self):
 		'''Removes cover image from mp3file
 		'''
-		audio = MP3(self.path, ID3=ID3)
-		keys = list(audio.keys())
-		for key in keys:
-			if "APIC" in key:
-				audio.pop(key, None)
-		audio.save(v2_version=4)
-		del audio
+		self.track.saveCover(None)
 		self.imageBytes = None
-		self.image = None
+		self.coverFromFolder = False
+		self.invalidateThumbnail()
 
 	def fillTagsFromFile(self):
-		'''Fill tags from file
+		'''Reload tags from file and show them in MP3Tag items
+		'''
+		self.track = core.Track.load(self.path, cover=False)
+		self.fillTagsFromTrack()
 
-		It's loading tags from mutagen library and saving it to MP3Tag class (which are this class properties accessed by __getattribute__)
+	def fillTagsFromTrack(self):
+		'''Show tags of the track in MP3Tag items (which are this class properties accessed by __getattribute__)
 		'''
-		# Set correct filename (individual because it's not a tag)
 		self.fileName.setText(self.baseName)
-
-		# Load whole file
-		audio = MP3(self.path, ID3=ID3)
-
-		# Set correctly all tags
-		for key in audio.keys():
-			for tag in self.tag_2_property:
-				if tag in key:
-					if tag == "APIC":
-						self.loadCoverImageFromBytes(audio.tags.get(key).data)
-					else:
-						self.__getattribute__(self.tag_2_property[tag]).setText(str(audio.tags[key].text[0]))
-
-		# Set other informations which are not editable using this editor
-		self.songLength = int(audio.info.length)
-		self.songBitrate = audio.info.bitrate
-
-		del audio
+		for key, value in self.track.values.items():
+			self.__getattribute__(key).setText(value)
 
 	def saveTagToFile(self, propertyName, propertyValue):
 		'''Save individual tag to file using property name and property value
 
 		Arguments:
 
-			propertyName {[type]} -- [description]
-			propertyValue {[type]} -- [description]
+			propertyName {str} -- Property name
+			propertyValue {str} -- Property value
 		'''
-		# TODO add validation (And proper raising)
 		# If it's fileName, process it differently
 		if propertyName == "fileName":
 			self.rename(propertyValue)
@@ -176,23 +195,22 @@ class MP3File(object):
 			self.saveCover(propertyValue)
 		# Other tags can be processed commonly
 		else:
-			audio = MP3(self.path, ID3=ID3)
-			tag = self.property_2_tag[propertyName]
-
-			# If the tag is empty, remove existing tag or don't create an empty tag
-			if propertyValue == "":
-				if tag in audio:
-					audio.pop(tag)
-			else:
-				audio[tag] = getattr(mutagen.id3, tag)(encoding=3, text=propertyValue)
-
-			# Save it
-			audio.save(v2_version=4)
-			del audio
+			self.track.save({propertyName: propertyValue})
 
 		# Finally make sure that the change is also fastforwarded to Text
 		self.__getattribute__(propertyName).setText(str(propertyValue))
 
+	def saveTagsToFile(self, values):
+		'''Save more text tags to file at once (the file is loaded and written only once)
+
+		Arguments:
+
+			values {Dict[str, str]} -- Property name to property value (without fileName and cover)
+		'''
+		self.track.save(values)
+		for propertyName, propertyValue in values.items():
+			self.__getattribute__(propertyName).setText(str(propertyValue))
+
 	def getProperty(self, propertyName):
 		"""Get property value by property name (tag value from tag key)
 
@@ -202,16 +220,19 @@ class MP3File(object):
 		Returns:
 			str -- Property value
 		"""
-		return self.__getattribute__(propertyName).text()
+		return self.track.getProperty(propertyName)
 
 	def initProperties(self):
 		'''Initialization of all tags and images
 		'''
 		self.imageBytes = None
-		self.image = None
+		self.coverFromFolder = False
 		for key in self.property_2_tag:
 			self.__setattr__(key, MP3Tag(self, key, ""))
-		self.tmpProperties: Dict = defaultdict(str)
+
+		# Thumbnail of the cover in the table (None - not loaded, request token - loading, True - loaded)
+		self.thumbnail = MP3Tag(self, "thumbnail", "")
+		self.thumbnailState = None
 
 	def canRenameFilename(self, newPath):
 		'''Check if the new name of the file can be set (check existing files and empty strings)
@@ -233,10 +254,18 @@ class MP3File(object):
 
 			newPath {str} -- New base name of a file
 		'''
-		if newPath != self.baseName:
-			os.renames(os.path.join(self.baseDir, self.baseName), os.path.join(self.baseDir, newPath))
-			self.baseName = newPath
-			self.path = os.path.join(self.baseDir, self.baseName)
+		self.track.rename(newPath)
+		self.fileName.setText(self.baseName)
+
+	def setPath(self, path):
+		'''Set new path of mp3 file (after the file was moved on the disk)
+
+		Arguments:
+
+			path {str} -- New path of a file
+		'''
+		self.track.setPath(path)
+		self.fileName.setText(self.baseName)
 
 	def hasCover(self):
 		'''Method checks if file has a cover
@@ -245,47 +274,59 @@ class MP3File(object):
 
 			bool -- True if file has a cover, False if doesn't
 		'''
-		audio = MP3(self.path, ID3=ID3)
-		for key in audio.keys():
-			if "APIC" in key:
-				return True
-		return False
+		return tags.readCover(self.path) is not None
 
 	def saveCover(self, coverPath):
 		'''Save cover image to file
 
 		Arguments:
 
-			coverPath {str} -- Path to cover image
+			coverPath {str} -- Path to cover image (empty string keeps the current cover)
 		'''
-		# Init audio
-		audio = MP3(self.path, ID3=ID3)
-
-		# Remove cover images (do not remove cover if there's cover and coverPath is not set properly)
-		if coverPath != "" or not self.hasCover():
-			keys = list(audio.keys())
-			for key in reversed(keys):
-				if "APIC" in key:
-					audio.pop(key, None)
-
-		# Change mime type and load and save image
 		if coverPath != "":
-			extension = coverPath.split(".")[-1].lower()
-			if extension == "jpg":
-				extension = "jpeg"
-			mime = "image/" + extension
-
 			with open(coverPath, "rb") as coverFile:
 				img = coverFile.read()
-				audio['APIC'] = APIC(
-					encoding=3,
-					mime=mime,
-					type=3,
-					data=img
-				)
-				self.loadCoverImageFromBytes(img)
-		audio.save(v2_version=4)
-		del audio
+			if self.normalizeCovers:
+				img, mime = images.normalizeImage(img, quality=self.coverQuality)
+			else:
+				mime = tags.coverMimeFromBytes(img) or tags.coverMimeFromPath(coverPath)
+			self.track.saveCover(img, mime)
+			self.loadCoverImageFromBytes(img)
+			self.coverFromFolder = False
+			self.invalidateThumbnail()
+
+	def readCoverBytes(self):
+		'''Read cover bytes from the file or from the folder image (doesn't touch Qt objects, so it can run in worker thread)
+
+		Returns:
+
+			bytes -- Image data (None if there's no cover)
+		'''
+		data = tags.readCover(self.path)
+		if data is None:
+			image = self.folderCovers.forTrack(self.path)
+			data = None if image is None else image[0]
+		return data
+
+	def invalidateThumbnail(self):
+		'''Forget loaded thumbnail after the cover was changed (the table loads it again if it's visible)
+		'''
+		self.thumbnailState = None
+		table = self.thumbnail.tableWidget()
+		if table is not None:
+			table.scheduleThumbnails()
+
+	def setCover(self, data):
+		'''Set cover which was already written to the file (the data are shared by all files of the batch)
+
+		Arguments:
+
+			data {bytes} -- Image data
+		'''
+		self.track.cover = data
+		self.imageBytes = data
+		self.coverFromFolder = False
+		self.invalidateThumbnail()
 
 
 class MP3Table(QtWidgets.QTableWidget):
@@ -301,6 +342,9 @@ class MP3Table(QtWidgets.QTableWidget):
 	'''
 	HEADER_CHECK_EMPTY = "[_]"
 	HEADER_CHECK_CHECKED = "[X]"
+	HEADER_THUMBNAIL = "Obal"
+	# Number of rows loaded ahead of the visible rows in the scroll direction
+	THUMBNAIL_PREFETCH = 10
 
 	def __init__(self, *args):
 		'''Initializer of MP3Table
@@ -318,9 +362,23 @@ class MP3Table(QtWidgets.QTableWidget):
 		self.mainWindow = mainWindow
 		self.createHeaders()
 
+		# Thumbnails (loaded asynchronously only for visible rows, debounced while scrolling)
+		self.thumbnails = images.ThumbnailCache(parent=self)
+		self.thumbnails.loaded.connect(self.handleThumbnailLoaded)
+		placeholder = QtGui.QPixmap(self.thumbnails.size, self.thumbnails.size)
+		placeholder.fill(Qt.Qt.lightGray)
+		self.thumbnailPlaceholder = QtGui.QIcon(placeholder)
+		self.thumbnailTimer = QtCore.QTimer(self)
+		self.thumbnailTimer.setSingleShot(True)
+		self.thumbnailTimer.setInterval(50)
+		self.thumbnailTimer.timeout.connect(self.loadVisibleThumbnails)
+		self.lastScrollValue = 0
+		self.scrollDirection = 1
+
 		# Handlers
 		self.horizontalHeader().sectionClicked.connect(self.handleHeaderClicked)
 		self.cellClicked.connect(self.handleCellClick)
+		self.verticalScrollBar().valueChanged.connect(self.handleScroll)
 
 		# Properties
 		self.lastSelectedRow = None
@@ -359,6 +417,15 @@ class MP3Table(QtWidgets.QTableWidget):
 		'''
 		return self.item(row, 1).mp3file
 
+	def getMP3Files(self):
+		'''Get all mp3 files in this table (whole loaded library)
+
+		Returns:
+
+			List[MP3File] -- List of MP3File
+		'''
+		return [self.getMP3File(i) for i in range(self.rowCount())]
+
 	def getSelectedRowFromRanges(self):
 		'''Get selected row of TableWdiget using selected ranges
 
@@ -537,6 +604,8 @@ class MP3Table(QtWidgets.QTableWidget):
 		# Check if the row is in the table
 		if row < self.rowCount():
 			self.unCheckRow(row)
+			# Pending thumbnail of removed row is ignored
+			self.item(row, self.thumbnailColumn).getMP3File().thumbnailState = None
 			self.removeRow(row)
 
 			# If the table will be empty
@@ -564,13 +633,16 @@ class MP3Table(QtWidgets.QTableWidget):
 	def createHeaders(self):
 		'''Create headers of table
 		'''
-		header_labels = [self.HEADER_CHECK_EMPTY] + [j for (i, j) in MP3File.property_2_name.items() if i != "cover"]
+		header_labels = [self.HEADER_CHECK_EMPTY] + [j for (i, j) in MP3File.property_2_name.items() if i != "cover"] + [self.HEADER_THUMBNAIL]
+		self.thumbnailColumn = len(header_labels) - 1
 		self.setColumnCount(len(header_labels))
 		self.setHorizontalHeaderLabels(header_labels)
 		self.setFocusPolicy(Qt.Qt.NoFocus)
 		self.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Fixed)
 		self.setColumnWidth(0, 20)
+		self.setColumnHidden(self.thumbnailColumn, True)
 
+	@tracing.traced("table.insert")
 	def addMP3(self, mp3file):
 		'''Add MP3 file to table
 
@@ -594,6 +666,10 @@ class MP3Table(QtWidgets.QTableWidget):
 			if key != "cover":
 				self.setItem(rowCount, idx + 1, mp3file.__getattribute__(key))
 
+		# Thumbnail is loaded when the row gets visible
+		self.setItem(rowCount, self.thumbnailColumn, mp3file.thumbnail)
+		self.scheduleThumbnails()
+
 	def reorderItemsByLastOrder(self):
 		'''Reorder items in the table again by using last order
 		'''
@@ -604,6 +680,7 @@ class MP3Table(QtWidgets.QTableWidget):
 			self.horizontalHeader().setSortIndicator(self.lastOrderedColumn, self.lastOrder)
 			self.sortItems(self.lastOrderedColumn, order=self.lastOrder)
 
+	@tracing.traced("table.sort")
 	def sortItems(self, column, order=Qt.Qt.AscendingOrder):
 		'''Overriden method of sortItems for saving last ordered column and order type, also for managing select range and index of actual media
 
@@ -624,6 +701,99 @@ class MP3Table(QtWidgets.QTableWidget):
 		if row is not None:
 			self.lastSelectedRow = row
 
+	def isThumbnailsVisible(self):
+		'''Checks if thumbnail column is shown
+
+		Returns:
+
+			bool -- True if shown, False if not
+		'''
+		return not self.isColumnHidden(self.thumbnailColumn)
+
+	def setThumbnailsVisible(self, visible):
+		'''Show or hide thumbnail column
+
+		Arguments:
+
+			visible {bool} -- If the column should be shown
+		'''
+		self.setColumnHidden(self.thumbnailColumn, not visible)
+		if visible:
+			size = self.thumbnails.size
+			self.setIconSize(QtCore.QSize(size, size))
+			self.setColumnWidth(self.thumbnailColumn, size + 8)
+			self.verticalHeader().setDefaultSectionSize(max(self.verticalHeader().defaultSectionSize(), size + 4))
+			self.scheduleThumbnails()
+
+	def scheduleThumbnails(self):
+		'''Load thumbnails of visible rows after a while (more changes are merged)
+		'''
+		if self.isThumbnailsVisible():
+			self.thumbnailTimer.start()
+
+	def handleScroll(self, value):
+		'''Handle scrolling of the table (remember direction for prefetching)
+
+		Arguments:
+
+			value {int} -- Value of vertical scrollbar
+		'''
+		if value != self.lastScrollValue:
+			self.scrollDirection = 1 if value > self.lastScrollValue else -1
+			self.lastScrollValue = value
+		self.scheduleThumbnails()
+
+	def resizeEvent(self, event):
+		'''Overriden resize event (more rows can get visible)
+
+		Arguments:
+
+			event {QtGui.QResizeEvent} -- Resize event
+		'''
+		super().resizeEvent(event)
+		self.scheduleThumbnails()
+
+	def loadVisibleThumbnails(self):
+		'''Request thumbnails of visible rows and a few rows ahead in the scroll direction
+		'''
+		if not self.isThumbnailsVisible() or self.isEmpty():
+			return
+		first = self.rowAt(0)
+		last = self.rowAt(self.viewport().height() - 1)
+		first = 0 if first < 0 else first
+		last = self.rowCount() - 1 if last < 0 else last
+		if self.scrollDirection > 0:
+			last = min(last + self.THUMBNAIL_PREFETCH, self.rowCount() - 1)
+		else:
+			first = max(first - self.THUMBNAIL_PREFETCH, 0)
+
+		for row in range(first, last + 1):
+			item = self.item(row, self.thumbnailColumn)
+			if item is None:
+				continue
+			mp3file = item.getMP3File()
+			if mp3file.thumbnailState is None:
+				token = object()
+				mp3file.thumbnailState = token
+				item.setIcon(self.thumbnailPlaceholder)
+				self.thumbnails.request((mp3file, token), mp3file.readCoverBytes)
+
+	def handleThumbnailLoaded(self, request, image):
+		'''Show loaded thumbnail (results of outdated requests are ignored)
+
+		Arguments:
+
+			request {Tuple[MP3File, object]} -- MP3 file and token of the request
+			image {QtGui.QImage} -- Thumbnail (None if there's no cover)
+		'''
+		mp3file, token = request
+		if mp3file.thumbnailState is token:
+			mp3file.thumbnailState = True
+			if image is None or image.isNull():
+				mp3file.thumbnail.setIcon(QtGui.QIcon())
+			else:
+				mp3file.thumbnail.setIcon(QtGui.QIcon(QtGui.QPixmap.fromImage(image)))
+
 	def handleHeaderClicked(self, column):
 		'''Handle header clicked (checkbox vs. sorting)
 
@@ -681,24 +851,65 @@ class MP3Player(QtWidgets.QMainWindow):
 	MUTE = 0
 	UNMUTE = 1
 
-	def __init__(self):
+	# VLC instance and player created in background thread
+	playerReady = QtCore.pyqtSignal(object, object)
+	# File of restored session or playlist was checked in background thread (mp3file, checked track, reloaded track or None if it's missing)
+	trackRevalidated = QtCore.pyqtSignal(object, object, object)
+	# Part of the playlist read in background thread (list of entries) and error of reading
+	playlistChunk = QtCore.pyqtSignal(list)
+	playlistFailed = QtCore.pyqtSignal(str)
+	# Embedded covers were re-processed in background thread (list of CoverChange)
+	coversOptimized = QtCore.pyqtSignal(list)
+	# Folder images were embedded in background thread (list of CoverChange)
+	coversEmbedded = QtCore.pyqtSignal(list)
+	# Number of playlist entries added to the table at once
+	PLAYLIST_CHUNK = 500
+	# Number of changes listed in the report of table re-import
+	REPORT_LINES = 1000
+	# Call from control server evaluated in GUI thread (future, function, arguments)
+	controlCall = QtCore.pyqtSignal(object)
+	# Timeout of waiting for GUI thread in seconds
+	CONTROL_TIMEOUT = 60
+	# Number of the slowest hot paths shown in the statusbar when the tracing is on
+	TRACE_SUMMARY_SPANS = 4
+	# Names of play states for control clients
+	STATE_NAMES = {PLAYING: "playing", STOPPED: "stopped", PAUSED: "paused"}
+
+	def __init__(self, profile=None):
 		'''Initializer
+
+		Keyword Arguments:
+
+			profile {StartupProfile} -- Timing of the startup phases (default: {None} - not measured)
 		'''
 		super(QtWidgets.QMainWindow, self).__init__()
+		self.profile = profile
 
 		# Load UI
-		uiFile = "ui/main_window.ui"
-		with open(uiFile) as f:
-			uic.loadUi(f, self)
+		forms.setupUi(self, "main_window")
+		self.markStartup("main window UI")
 
 		# Init all properties
 		self.propertyInit()
+		self.markStartup("properties")
 
 		# Connect all signals to handlers
 		self.setupHandlers()
+		self.markStartup("handlers")
 
 		# Setup custom widgets
 		self.setupCustomWidgets()
+		self.markStartup("custom widgets")
+
+	def markStartup(self, phase):
+		'''Finish startup phase if the startup is profiled
+
+		Arguments:
+
+			phase {str} -- Name of the phase
+		'''
+		if self.profile is not None:
+			self.profile.mark(phase)
 
 	def setupCustomWidgets(self):
 		'''Setup custom widgets (linking parent object to them)
@@ -706,8 +917,47 @@ class MP3Player(QtWidgets.QMainWindow):
 		self.tableWidget.setup(self)
 		self.timeSlider.setup(self)
 		self.volumeSlider.setup(self)
-		self.tagDialog.setup(self, MP3File.property_2_name, MP3File.property_2_tag)
-		self.editWindow.setup(self, MP3File.property_2_name, MP3File.property_2_tag, MP3File.coverExtensions)
+
+	@property
+	def tagDialog(self):
+		'''Tag chooser dialog (created at first use)
+		'''
+		if "tagDialog" not in self.dialogs:
+			import mp3player.edit_window as edit_window
+			dialog = edit_window.TagDialog(self)
+			dialog.setup(self, MP3File.property_2_name, MP3File.property_2_tag)
+			self.dialogs["tagDialog"] = dialog
+		return self.dialogs["tagDialog"]
+
+	@property
+	def editWindow(self):
+		'''Group edit window (created at first use)
+		'''
+		if "editWindow" not in self.dialogs:
+			import mp3player.edit_window as edit_window
+			window = edit_window.EditWindow(self)
+			window.setup(self, MP3File.property_2_name, MP3File.property_2_tag, MP3File.coverExtensions)
+			self.dialogs["editWindow"] = window
+		return self.dialogs["editWindow"]
+
+	@property
+	def journal(self):
+		'''Undo journal of tag and rename operations (created at first use)
+		'''
+		if self.undoJournal is None:
+			self.undoJournal = journal.Journal()
+		return self.undoJournal
+
+	@property
+	def replaceWindow(self):
+		'''Find and replace dialog (created at first use)
+		'''
+		if "replaceWindow" not in self.dialogs:
+			import mp3player.edit_window as edit_window
+			dialog = edit_window.ReplaceWindow(self)
+			dialog.setup(self, MP3File.property_2_name)
+			self.dialogs["replaceWindow"] = dialog
+		return self.dialogs["replaceWindow"]
 
 	def propertyInit(self):
 		'''Property initializer
@@ -720,11 +970,27 @@ class MP3Player(QtWidgets.QMainWindow):
 		# MP3file
 		self.mp3file = None
 
-		# VLC player
+		# Scaled cover images (shared with edit window)
+		self.pixmapCache = images.PixmapCache(self)
+		self.coverData = None
+
+		# VLC player (created after the window is shown)
 		self.media = None
-		self.vlcInstance = vlc.Instance()
-		self.vlcPlayer = self.vlcInstance.media_player_new()
-		self.vlcPlayer.audio_set_volume(100)
+		self.vlcInstance = None
+		self.vlcPlayer = None
+		self.playerStarted = False
+		self.playerReady.connect(self.handlePlayerReady)
+
+		# Position of restored session applied when the playback starts
+		self.resumePosition = None
+
+		# Tracks of restored session and playlists are shown at once and loaded in background (one after another)
+		self.trackLoader = ThreadPoolExecutor(max_workers=1)
+		self.trackRevalidated.connect(self.handleTrackRevalidated)
+		self.playlistChunk.connect(self.handlePlaylistChunk)
+		self.playlistFailed.connect(self.handlePlaylistFailed)
+		self.coversOptimized.connect(self.handleCoversOptimized)
+		self.coversEmbedded.connect(self.handleCoversEmbedded)
 
 		# Init sliders
 		self.volume = 100
@@ -734,15 +1000,30 @@ class MP3Player(QtWidgets.QMainWindow):
 		self.updateVolume(100)
 		self.updateTimes(self.currentSeconds, self.songLength)
 
-		# Dialogs and other managed windows
-		self.tagDialog = edit_window.TagDialog(self)
-		self.editWindow = edit_window.EditWindow(self)
+		# Dialogs and other managed windows (created at first use)
+		self.dialogs = dict()
+		self.recipeStore = recipes.RecipeStore()
+
+		# Undo journal of batch operations (created at first use)
+		self.undoJournal = None
+
+		# Local control server (started by startControlServer), last published player state
+		self.controlServer = None
+		self.controlState = None
+		self.controlCall.connect(self.handleControlCall)
 
 		self.timer = QtCore.QTimer(self)
 		self.timer.setSingleShot(False)
 		self.timer.timeout.connect(self.updatingPlayerState)
 		self.timer.start(200)
 
+		# Live aggregates of hot path timing (updated only when the tracing is on)
+		self.traceLabel = QtWidgets.QLabel(self)
+		self.traceLabel.hide()
+		self.statusbar.addPermanentWidget(self.traceLabel)
+		self.traceTimer = QtCore.QTimer(self)
+		self.traceTimer.timeout.connect(self.showTraceSummary)
+
 	def setupHandlers(self):
 		'''Setup handlers to the signals and shortcuts also
 		'''
@@ -760,6 +1041,30 @@ class MP3Player(QtWidgets.QMainWindow):
 		self.previousButton.clicked.connect(self.handlePreviousButton)
 		self.shuffleButton.clicked.connect(self.handleShuffleButton)
 		self.muteButton.clicked.connect(self.handleMuteButton)
+		self.undoAction = self.menuFile.addAction("Zpět", self.handleUndoAction, QtGui.QKeySequence("Ctrl+Z"))
+		self.redoAction = self.menuFile.addAction("Znovu", self.handleRedoAction, QtGui.QKeySequence("Ctrl+Shift+Z"))
+		self.updateUndoActions()
+		self.menuFile.addAction("Importovat playlist...", self.handleImportPlaylistAction)
+		self.menuFile.addAction("Exportovat playlist...", self.handleExportPlaylistAction)
+		self.menuFile.addAction("Exportovat tabulku tagů...", self.handleExportTableAction)
+		self.menuFile.addAction("Importovat úpravy tagů z tabulky...", self.handleImportTableAction)
+		self.menuFile.addAction("Uspořádat soubory do složek...", self.handleOrganizeAction)
+		self.menuFile.addAction("Najít a nahradit v tagách...", self.handleReplaceAction, QtGui.QKeySequence("Ctrl+H"))
+		self.menuFile.addAction("Spustit recept...", self.handleRecipeAction)
+		self.menuFile.addAction("Optimalizovat obaly alb...", self.handleOptimizeCoversAction)
+		self.menuFile.addAction("Vložit obaly alb ze složek", self.handleEmbedFolderCoversAction)
+		thumbnailsAction = self.menuFile.addAction("Zobrazit náhledy obalů alb")
+		thumbnailsAction.setCheckable(True)
+		thumbnailsAction.toggled.connect(self.tableWidget.setThumbnailsVisible)
+		normalizeAction = self.menuFile.addAction("Zmenšovat vkládané obaly alb")
+		normalizeAction.setCheckable(True)
+		normalizeAction.setChecked(MP3File.normalizeCovers)
+		normalizeAction.toggled.connect(self.handleNormalizeCoversAction)
+		traceAction = self.menuFile.addAction("Měřit výkon")
+		traceAction.setCheckable(True)
+		traceAction.toggled.connect(self.handleTraceAction)
+		traceAction.setChecked(tracing.TRACER.enabled)
+		self.menuFile.addAction("Exportovat záznam výkonu...", self.handleExportTraceAction)
 		QtWidgets.QShortcut(QtGui.QKeySequence("Ctrl+A"), self).activated.connect(self.handleSelectAll)
 		QtWidgets.QShortcut(QtGui.QKeySequence("Ctrl+D"), self).activated.connect(self.handleUnSelectAll)
 		QtWidgets.QShortcut(QtGui.QKeySequence("Ctrl+O"), self).activated.connect(self.handleOpenFileButton)
@@ -829,8 +1134,497 @@ class MP3Player(QtWidgets.QMainWindow):
 			event {[type]} -- [description]
 		'''
 		self.closed = True
+		self.saveSession()
+		self.stopControlServer()
+		if self.undoJournal is not None:
+			self.undoJournal.close()
 		event.accept()
 
+	def saveSession(self, path=snapshot.DEFAULT_PATH):
+		'''Save loaded files and player state to the snapshot (restored at the next start)
+
+		Keyword Arguments:
+
+			path {str} -- Path to snapshot (default: {snapshot.DEFAULT_PATH})
+		'''
+		table = self.tableWidget
+		state = {
+			"sortColumn": table.lastOrderedColumn,
+			"sortOrder": None if table.lastOrder is None else int(table.lastOrder),
+			"checked": sorted(i.row() for i in table.checkedRows),
+			"current": table.lastSelectedRow,
+			"position": self.currentSeconds,
+			"volume": self.volume,
+			"shuffle": self.isShuffleOn(),
+		}
+		try:
+			snapshot.writeSnapshot([i.track for i in table.getMP3Files()], state, path)
+		except (OSError, ValueError) as e:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit relaci", str(e))
+
+	def restoreSession(self, path=snapshot.DEFAULT_PATH):
+		'''Restore files and player state from the snapshot, files are checked for changes in background afterwards
+
+		Keyword Arguments:
+
+			path {str} -- Path to snapshot (default: {snapshot.DEFAULT_PATH})
+		'''
+		try:
+			tracks, state = snapshot.readSnapshot(path)
+		except snapshot.SnapshotError:
+			return
+
+		table = self.tableWidget
+		mp3files = [MP3File(track.path, track) for track in tracks]
+		for mp3file in mp3files:
+			table.addMP3(mp3file)
+		for row in state.get("checked", []):
+			if 0 <= row < table.rowCount():
+				table.checkRow(row)
+
+		# Rows were saved sorted, only the indicator is restored
+		if state.get("sortColumn") is not None and state.get("sortOrder") is not None:
+			table.lastOrderedColumn = state["sortColumn"]
+			table.lastOrder = Qt.Qt.SortOrder(state["sortOrder"])
+			table.horizontalHeader().setSortIndicatorShown(True)
+			table.horizontalHeader().setSortIndicator(table.lastOrderedColumn, table.lastOrder)
+
+		self.updateVolume(state.get("volume", self.volume))
+		if state.get("shuffle"):
+			self.shuffle()
+		current = state.get("current")
+		if current is not None and 0 <= current < table.rowCount():
+			table.activateRow(current)
+			self.updateTimes(currentSeconds=state.get("position", 0))
+			self.resumePosition = state.get("position") or None
+		self.markStartup("restore session")
+
+		self.trackLoader.submit(self.revalidateTracks, [(i, i.track) for i in mp3files])
+
+	def revalidateTracks(self, items):
+		'''Reload tracks changed since the snapshot (evaluated in background thread, results are passed by trackRevalidated signal)
+
+		Arguments:
+
+			items {List[Tuple[MP3File, Track]]} -- Restored mp3 files and their tracks
+		'''
+		for mp3file, track in items:
+			if self.closed:
+				return
+			try:
+				if not track.isModified():
+					continue
+				newTrack = core.Track.load(track.path, cover=False)
+			except FileNotFoundError:
+				newTrack = None
+			# Unreadable file is kept as it was restored
+			except Exception:
+				continue
+			self.trackRevalidated.emit(mp3file, track, newTrack)
+
+	def handleImportPlaylistAction(self):
+		'''Handle import playlist action (entries are shown at once with hints from the playlist, tags are loaded in background)
+		'''
+		path = QtWidgets.QFileDialog.getOpenFileName(self, "Importovat playlist", filter="Playlisty ({})".format(" ".join("*." + i for i in playlists.PLAYLIST_EXTENSIONS)))[0]
+		if path != "":
+			threading.Thread(target=self.readPlaylist, args=(path,), daemon=True).start()
+
+	def readPlaylist(self, path):
+		'''Stream the playlist in chunks (evaluated in background thread, chunks are passed by playlistChunk signal)
+
+		Arguments:
+
+			path {str} -- Path to playlist
+		'''
+		chunk = list()
+		try:
+			for entry in playlists.iterPlaylist(path):
+				chunk.append(entry)
+				if len(chunk) >= self.PLAYLIST_CHUNK:
+					self.playlistChunk.emit(chunk)
+					chunk = list()
+		except (OSError, ValueError) as e:
+			self.playlistFailed.emit(str(e))
+		if chunk:
+			self.playlistChunk.emit(chunk)
+
+	def handlePlaylistChunk(self, entries):
+		'''Add entries of the playlist to the table (title and duration hints are shown until the tags are loaded)
+
+		Arguments:
+
+			entries {List[PlaylistEntry]} -- Entries
+		'''
+		mp3files = list()
+		for entry in entries:
+			artist, separator, songName = (entry.title or "").partition(" - ")
+			values = {"artist": artist, "songName": songName} if separator else {"songName": entry.title or ""}
+			# Unknown modification time, so the track is always reloaded
+			mp3files.append(MP3File(entry.path, core.Track(entry.path, values, length=entry.duration or 0)))
+
+		self.tableWidget.setUpdatesEnabled(False)
+		for mp3file in mp3files:
+			self.tableWidget.addMP3(mp3file)
+		self.tableWidget.setUpdatesEnabled(True)
+		self.trackLoader.submit(self.revalidateTracks, [(i, i.track) for i in mp3files])
+
+	def handlePlaylistFailed(self, message):
+		'''Report error of reading the playlist
+
+		Arguments:
+
+			message {str} -- Error message
+		'''
+		QtWidgets.QMessageBox.warning(self, "Nelze načíst playlist", message)
+
+	def handleExportPlaylistAction(self):
+		'''Handle export playlist action (all files in the order of the table or checked files)
+		'''
+		if self.tableWidget.isEmpty():
+			QtWidgets.QMessageBox.warning(self, "Není načtený soubor", "Nebyl načten žádný hudební soubor, nelze exportovat playlist.")
+			return
+		scopes = ["Všechny soubory v pořadí tabulky", "Zaškrtnuté soubory"]
+		scope, ok = QtWidgets.QInputDialog.getItem(self, "Exportovat playlist", "Soubory:", scopes, 1 if self.tableWidget.checkedRowsCount() > 0 else 0, False)
+		if not ok:
+			return
+		path = QtWidgets.QFileDialog.getSaveFileName(self, "Exportovat playlist", filter="Playlisty ({})".format(" ".join("*." + i for i in playlists.PLAYLIST_EXTENSIONS)))[0]
+		if path == "":
+			return
+		if os.path.splitext(path)[1] == "":
+			path += ".m3u8"
+		reply = QtWidgets.QMessageBox.question(self, "Exportovat playlist", "Uložit cesty relativně k umístění playlistu?", QtWidgets.QMessageBox.Yes, QtWidgets.QMessageBox.No)
+
+		if scope == scopes[0]:
+			mp3files = self.tableWidget.getMP3Files()
+		else:
+			rows = sorted(i.row() for i in self.tableWidget.checkedRows)
+			mp3files = [self.tableWidget.getMP3File(i) for i in rows]
+		entries = (playlists.PlaylistEntry(i.path, i.songLength or None, " - ".join(j for j in (i.getProperty("artist"), i.getProperty("songName")) if j) or None) for i in mp3files)
+		try:
+			count = playlists.writePlaylist(path, entries, relative=reply == QtWidgets.QMessageBox.Yes)
+		except (OSError, ValueError) as e:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit playlist", str(e))
+			return
+		self.statusbar.showMessage("Playlist byl uložen ({} souborů).".format(count))
+
+	def executeChanges(self, name, changes, covers=None):
+		'''Apply changes of files in parallel and record them in the undo journal
+
+		Arguments:
+
+			name {str} -- Name of the operation shown in the menu
+			changes {List[FileChange]} -- Changes of files in the table
+
+		Keyword Arguments:
+
+			covers {Dict[str, bytes]} -- Image data of new covers by hash (default: {None})
+
+		Raises:
+
+			FileExistsError -- If the renames are in conflict (nothing was written)
+			RenameError -- If the batch rename failed (written tags are kept)
+
+		Returns:
+
+			List[Exception] -- Error for each change (None if it was successful)
+		'''
+		mp3files = self.mp3filesByPath()
+		journalError = None
+		QtWidgets.QApplication.setOverrideCursor(Qt.Qt.WaitCursor)
+		try:
+			errors = self.journal.execute(name, changes, covers)
+		except (FileExistsError, renamer.RenameError) as e:
+			# Only changes which were actually written are shown
+			if getattr(e, "errors", None) is not None:
+				self.refreshChanges(mp3files, changes, e.errors, True)
+			raise
+		except OSError as e:
+			# Files were changed, only the undo journal failed
+			if getattr(e, "errors", None) is None:
+				raise
+			errors = e.errors
+			journalError = e
+		finally:
+			QtWidgets.QApplication.restoreOverrideCursor()
+			self.updateUndoActions()
+		self.refreshChanges(mp3files, changes, errors, True)
+		if journalError is not None:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit historii změn", "Změny byly uloženy, ale nepůjde je vrátit zpět: {}".format(journalError))
+		return errors
+
+	def warnRenameFailed(self, error):
+		'''Show why the renames of executed changes failed
+
+		Arguments:
+
+			error {Exception} -- FileExistsError or RenameError from executeChanges
+		'''
+		if getattr(error, "errors", None) is None:
+			QtWidgets.QMessageBox.warning(self, "Nelze přejmenovat soubory", "Soubory nelze přejmenovat, nic nebylo uloženo: {}".format(error))
+		else:
+			QtWidgets.QMessageBox.warning(self, "Nelze přejmenovat soubory", "Tagy byly uloženy, ale přejmenování souborů selhalo: {}".format(error))
+
+	def recordChanges(self, name, changes, covers=None):
+		'''Record already applied changes of files in the undo journal
+
+		Arguments:
+
+			name {str} -- Name of the operation shown in the menu
+			changes {List[FileChange]} -- Successful changes of files
+
+		Keyword Arguments:
+
+			covers {Dict[str, bytes]} -- Image data of covers referenced by the changes by hash (default: {None})
+
+		Returns:
+
+			bool -- True if the changes were recorded (failure is shown to the user)
+		'''
+		try:
+			self.journal.record(name, changes, covers)
+		except OSError as e:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit historii změn", "Změny byly uloženy, ale nepůjde je vrátit zpět: {}".format(e))
+			return False
+		finally:
+			self.updateUndoActions()
+		return True
+
+	def recordCoverChanges(self, name, results):
+		'''Record covers which were already written to the files in the undo journal and show them in the table
+
+		Arguments:
+
+			name {str} -- Name of the operation shown in the menu
+			results {List[CoverChange]} -- Results of re-processing the covers
+
+		Returns:
+
+			List[CoverChange] -- Results of files with replaced cover
+		'''
+		changed = [i for i in results if i.data is not None]
+		coverData = dict()
+		changes = list()
+		for result in changed:
+			cover = (journal.coverKey(result.original), journal.coverKey(result.data))
+			coverData.update(zip(cover, (result.original, result.data)))
+			changes.append(journal.FileChange(result.path, cover=cover))
+		# Covers of the table are read from the journal
+		if not self.recordChanges(name, changes, coverData):
+			return changed
+		self.refreshChanges(self.mp3filesByPath(), changes, [None] * len(changes), True)
+		return changed
+
+	def mp3filesByPath(self):
+		'''Get files of the table by their paths
+
+		Returns:
+
+			Dict[str, MP3File] -- Absolute path to mp3file
+		'''
+		return {os.path.abspath(i.path): i for i in self.tableWidget.getMP3Files()}
+
+	def refreshChanges(self, mp3files, changes, errors, forward):
+		'''Show applied (or reverted) changes in the table without reading the files again
+
+		Arguments:
+
+			mp3files {Dict[str, MP3File]} -- Files of the table by paths before the changes
+			changes {List[FileChange]} -- Changes
+			errors {List[Exception]} -- Error for each change (failed files are skipped)
+			forward {bool} -- If the changes were applied, otherwise they were reverted
+		'''
+		# Files of the batch share the same cover bytes
+		coverData = dict()
+		for change, error in zip(changes, errors):
+			# Files removed from the table are changed only on the disk
+			mp3file = mp3files.get(os.path.abspath(change.pathBefore(forward)))
+			if error is not None or mp3file is None:
+				continue
+			if change.pathAfter(forward) != mp3file.path:
+				mp3file.setPath(change.pathAfter(forward))
+			if change.values or change.cover is not None:
+				mp3file.track.values.update(change.valuesAfter(forward))
+				mp3file.track.updateStat()
+				mp3file.fillTagsFromTrack()
+			if change.cover is not None:
+				key = change.coverAfter(forward)
+				if key not in coverData:
+					coverData[key] = self.journal.readCover(key)
+				data = coverData[key]
+				if data is not None:
+					mp3file.setCover(data)
+				else:
+					mp3file.track.cover = None
+					mp3file.loadCoverImageFromFile()
+					mp3file.invalidateThumbnail()
+		self.fillLineEdits()
+		self.redrawCoverImage()
+
+	def updateUndoActions(self):
+		'''Show names of operations which can be undone and redone in the menu
+		'''
+		undoName = self.undoJournal.undoName() if self.undoJournal is not None else None
+		redoName = self.undoJournal.redoName() if self.undoJournal is not None else None
+		self.undoAction.setEnabled(undoName is not None)
+		self.undoAction.setText("Zpět" if undoName is None else "Zpět: {}".format(undoName))
+		self.redoAction.setEnabled(redoName is not None)
+		self.redoAction.setText("Znovu" if redoName is None else "Znovu: {}".format(redoName))
+
+	def handleUndoAction(self):
+		'''Handle undo action (the last batch operation is reverted)
+		'''
+		self.runJournalStep(self.journal.undo, False)
+
+	def handleRedoAction(self):
+		'''Handle redo action (the last reverted batch operation is applied again)
+		'''
+		self.runJournalStep(self.journal.redo, True)
+
+	def runJournalStep(self, step, forward):
+		'''Run undo or redo step of the journal and show its result
+
+		Arguments:
+
+			step {Callable} -- Journal.undo or Journal.redo
+			forward {bool} -- If the step applies changes, otherwise it reverts them
+		'''
+		if (forward and not self.journal.canRedo()) or (not forward and not self.journal.canUndo()):
+			return
+		mp3files = self.mp3filesByPath()
+		QtWidgets.QApplication.setOverrideCursor(Qt.Qt.WaitCursor)
+		try:
+			operation, changes, errors = step()
+		except (FileExistsError, renamer.RenameError) as e:
+			QtWidgets.QMessageBox.warning(self, "Nelze přejmenovat soubory", str(e))
+			return
+		except OSError as e:
+			QtWidgets.QMessageBox.warning(self, "Nelze načíst historii změn", str(e))
+			return
+		finally:
+			QtWidgets.QApplication.restoreOverrideCursor()
+			self.updateUndoActions()
+
+		self.refreshChanges(mp3files, changes, errors, forward)
+		failed = [i for (i, j) in zip(changes, errors) if j is not None]
+		self.statusbar.showMessage("{}: {} ({} souborů).".format("Znovu provedeno" if forward else "Vráceno zpět", operation.name, len(changes) - len(failed)))
+		if failed:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit data", "Změny se nepodařilo uložit do {} z {} souborů, např. \"{}\".".format(len(failed), len(changes), os.path.basename(failed[0].path)))
+
+	def handleExportTableAction(self):
+		'''Handle export table action (tags and audio informations of all files in the order of the table as CSV or JSON lines)
+		'''
+		if self.tableWidget.isEmpty():
+			QtWidgets.QMessageBox.warning(self, "Není načtený soubor", "Nebyl načten žádný hudební soubor, nelze exportovat tabulku.")
+			return
+		path = QtWidgets.QFileDialog.getSaveFileName(self, "Exportovat tabulku tagů", filter="CSV (*.csv);;JSON lines (*.jsonl)")[0]
+		if path == "":
+			return
+		if os.path.splitext(path)[1] == "":
+			path += ".csv"
+		try:
+			count = tabular.writeTable(path, (tabular.trackRow(i.track) for i in self.tableWidget.getMP3Files()))
+		except (OSError, ValueError) as e:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit tabulku", str(e))
+			return
+		self.statusbar.showMessage("Tabulka byla uložena ({} souborů).".format(count))
+
+	def handleImportTableAction(self):
+		'''Handle import table action (only changed cells are written, the report of changes is shown before)
+		'''
+		path = QtWidgets.QFileDialog.getOpenFileName(self, "Importovat úpravy tagů z tabulky", filter="Tabulky (*.csv *.jsonl)")[0]
+		if path == "":
+			return
+		mp3files = self.mp3filesByPath()
+
+		def current(path):
+			mp3file = mp3files.get(path)
+			if mp3file is None:
+				return None
+			return {i: mp3file.getProperty(i) for i in tabular.EDITABLE_COLUMNS}
+
+		QtWidgets.QApplication.setOverrideCursor(Qt.Qt.WaitCursor)
+		try:
+			edits = list(tabular.diffTable(tabular.iterTable(path), current))
+			# Conflicts of renames are found before anything is written
+			tabular.checkRenames(edits)
+		except (OSError, ValueError) as e:
+			QtWidgets.QMessageBox.warning(self, "Nelze načíst tabulku", str(e))
+			return
+		finally:
+			QtWidgets.QApplication.restoreOverrideCursor()
+
+		if not edits:
+			self.statusbar.showMessage("Tabulka neobsahuje žádné změny.")
+			return
+		valid = [i for i in edits if i.error is None]
+		invalid = [i for i in edits if i.error is not None]
+		if not self.confirmEdits(valid, invalid):
+			return
+
+		# Written by the undo journal, so the whole import can be reverted
+		changes = [journal.FileChange(i.path, {j: (i.before[j], k) for (j, k) in i.values.items()}, newPath=None if i.newPath == i.path else i.newPath) for i in valid]
+		try:
+			errors = self.executeChanges("Import tabulky", changes)
+		except (FileExistsError, renamer.RenameError) as e:
+			self.warnRenameFailed(e)
+			return
+
+		failed = [i for (i, j) in zip(changes, errors) if j is not None]
+		self.statusbar.showMessage("Změny z tabulky byly uloženy do {} souborů.".format(len(changes) - len(failed)))
+		if failed:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit data", "Změny se nepodařilo uložit do {} z {} souborů, např. \"{}\".".format(len(failed), len(changes), os.path.basename(failed[0].path)))
+
+	def confirmEdits(self, valid, invalid):
+		'''Show the report of changes found in the table and ask for confirmation
+
+		Arguments:
+
+			valid {List[TableEdit]} -- Edits which will be written
+			invalid {List[TableEdit]} -- Rows which can't be used (unknown files, invalid names)
+
+		Returns:
+
+			bool -- True if the changes should be written
+		'''
+		lines = list()
+		for edit in valid:
+			for property, value in edit.changes.items():
+				lines.append("{}: {}: \"{}\" → \"{}\"".format(os.path.basename(edit.path), MP3File.property_2_name[property], edit.before[property], value))
+		lines.extend("{}: {}".format(i.path, i.error) for i in invalid)
+		if len(lines) > self.REPORT_LINES:
+			lines = lines[:self.REPORT_LINES] + ["... a {} dalších".format(len(lines) - self.REPORT_LINES)]
+
+		text = "Tabulka mění {} hodnot v {} souborech.".format(sum(len(i.changes) for i in valid), len(valid))
+		if invalid:
+			text += " {} řádků nelze použít.".format(len(invalid))
+		dialog = QtWidgets.QMessageBox(QtWidgets.QMessageBox.Question, "Importovat úpravy tagů z tabulky", text, QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No, self)
+		dialog.setInformativeText("Uložit změny do souborů?" if valid else "Žádnou změnu nelze uložit.")
+		dialog.setDetailedText("\n".join(lines))
+		return dialog.exec() == QtWidgets.QMessageBox.Yes and bool(valid)
+
+	def handleTrackRevalidated(self, mp3file, track, newTrack):
+		'''Update (or remove) the file changed since the snapshot
+
+		Arguments:
+
+			mp3file {MP3File} -- Restored mp3 file
+			track {Track} -- Track which was checked
+			newTrack {Track} -- Reloaded track (None if the file doesn't exist any more)
+		'''
+		# The file was changed or reloaded in the meantime
+		if mp3file.track is not track:
+			return
+		if newTrack is None:
+			row = mp3file.fileName.row()
+			if row >= 0:
+				self.tableWidget.removeMP3(row)
+			return
+		mp3file.track = newTrack
+		mp3file.fillTagsFromTrack()
+		mp3file.invalidateThumbnail()
+		if mp3file is self.mp3file:
+			self.fillLineEdits()
+
 	def setEnabled(self, enabled):
 		"""Set enabled (pause the music if another modal window have appeared)
 
@@ -849,6 +1643,46 @@ class MP3Player(QtWidgets.QMainWindow):
 		# self.updatingPlayerState()
 
 		super().show(*args, **kwargs)
+		self.markStartup("show")
+
+		# Player is created when the event loop is running (after the first paint)
+		if not self.playerStarted:
+			self.playerStarted = True
+			QtCore.QTimer.singleShot(0, self.startPlayer)
+
+	def startPlayer(self):
+		'''Import VLC and create the player in background thread
+		'''
+		self.markStartup("first paint")
+		threading.Thread(target=self.createPlayer, daemon=True).start()
+
+	def createPlayer(self):
+		'''Create VLC instance and player (evaluated in background thread, result is passed by playerReady signal)
+		'''
+		import vlc
+
+		instance = vlc.Instance()
+		self.playerReady.emit(instance, instance.media_player_new())
+
+	def handlePlayerReady(self, instance, player):
+		'''Start using created VLC player (file chosen in the meantime is loaded and played)
+
+		Arguments:
+
+			instance {vlc.Instance} -- VLC instance
+			player {vlc.MediaPlayer} -- VLC media player
+		'''
+		self.vlcInstance = instance
+		self.vlcPlayer = player
+		self.vlcPlayer.audio_set_volume(self.volume)
+		if self.mp3file is not None:
+			self.media = self.vlcInstance.media_new(self.mp3file.path)
+			self.vlcPlayer.set_media(self.media)
+			if self.isPlaying():
+				self.vlcPlayer.play()
+		self.markStartup("VLC player")
+		if self.profile is not None:
+			self.profile.report()
 
 	def handleSelectAll(self):
 		'''Handle select all
@@ -882,17 +1716,25 @@ class MP3Player(QtWidgets.QMainWindow):
 	def redrawCoverImage(self):
 		'''Redraw cover image
 		'''
-		if self.mp3file is not None and self.mp3file.image is not None:
-			img = self.mp3file.image
-			if (img.width() / img.height()) > (self.labelImage.width() / self.labelImage.height()):
-				img = img.scaledToWidth(self.labelImage.width())
-			else:
-				img = img.scaledToHeight(self.labelImage.height())
-			self.labelImage.setPixmap(img)
-			self.labelImage.show()
+		if self.mp3file is not None and self.mp3file.imageBytes is not None:
+			data = self.coverData = self.mp3file.imageBytes
+			self.pixmapCache.load(data, self.labelImage.width(), self.labelImage.height(), lambda pixmap: self.showCoverPixmap(data, pixmap))
 		else:
+			self.coverData = None
 			self.labelImage.hide()
 
+	def showCoverPixmap(self, data, pixmap):
+		'''Show decoded cover image (outdated images decoded after the track was switched are ignored)
+
+		Arguments:
+
+			data {bytes} -- Image data of decoded cover
+			pixmap {QtGui.QPixmap} -- Pixmap scaled to the label
+		'''
+		if data is self.coverData:
+			self.labelImage.setPixmap(pixmap)
+			self.labelImage.show()
+
 	def setMediaFileFromRow(self, row):
 		'''Set media file from row from tableWidget
 
@@ -908,6 +1750,7 @@ class MP3Player(QtWidgets.QMainWindow):
 		self.setMediaFileFromMP3File(self.mp3file)
 		self.tableWidget.setRangeSelectionByRow(row)
 
+	@tracing.traced("player.setMedia")
 	def setMediaFileFromMP3File(self, mp3file):
 		'''Reload MP3File and if player should be playing, play
 
@@ -915,12 +1758,14 @@ class MP3Player(QtWidgets.QMainWindow):
 
 			mp3file {MP3File} -- MP3File to be played
 		'''
+		self.resumePosition = None
 		if mp3file is not None:
-			# Load media file to vlc media and if it should be playing and it is not, hit play
-			self.media = self.vlcInstance.media_new(mp3file.path)
-			self.vlcPlayer.set_media(self.media)
-			if self.isPlaying() and not self.vlcPlayer.is_playing():
-				self.vlcPlayer.play()
+			# Load media file to vlc media and if it should be playing and it is not, hit play (later if VLC isn't ready yet)
+			if self.vlcPlayer is not None:
+				self.media = self.vlcInstance.media_new(mp3file.path)
+				self.vlcPlayer.set_media(self.media)
+				if self.isPlaying() and not self.vlcPlayer.is_playing():
+					self.vlcPlayer.play()
 
 			# Update correct informations
 			self.songBitRateLabel.setText(str(self.mp3file.songBitrate))
@@ -946,6 +1791,15 @@ class MP3Player(QtWidgets.QMainWindow):
 	def updatingPlayerState(self):
 		'''Update mp3 player state periodically
 		'''
+		self.publishPlayerState()
+		if self.vlcPlayer is None:
+			return
+
+		# Position of restored session can be set only after the playback has started
+		if self.resumePosition is not None and self.vlcPlayer.is_playing():
+			self.vlcPlayer.set_time(self.resumePosition * 1000)
+			self.resumePosition = None
+
 		if self.isPlaying() and self.vlcPlayer.get_time() >= self.songLength * 1000:
 			self.nextSong()
 			# threading.Timer(0.2, self.updatingPlayerState).start()
@@ -974,10 +1828,232 @@ class MP3Player(QtWidgets.QMainWindow):
 		'''Handle open file button, create mp3 file and add it to table
 		'''
 		paths = QtWidgets.QFileDialog.getOpenFileNames(self, "Select MP3 files", filter="mp3(*.mp3)")[0]
-		for path in paths:
-			mp3file = MP3File(path)
+		# Tracks are loaded without Qt, so many files can be loaded by worker processes
+		for path, track in zip(paths, core.loadTracks(paths)):
+			mp3file = MP3File(path, track)
 			self.tableWidget.addMP3(mp3file)
 
+	def openFiles(self, paths, play=False):
+		'''Add files from command line or from another launch (window is raised, unreadable files are reported)
+
+		Arguments:
+
+			paths {List[str]} -- Paths to mp3 files
+
+		Keyword Arguments:
+
+			play {bool} -- If the first added file should be played (default: {False})
+		'''
+		if self.isMinimized():
+			self.showNormal()
+		self.raise_()
+		self.activateWindow()
+
+		firstRow = self.tableWidget.rowCount()
+		failed = list()
+		for path in paths:
+			try:
+				self.tableWidget.addMP3(MP3File(path))
+			# Mutagen errors don't share common base with OSError
+			except Exception:
+				failed.append(os.path.basename(path))
+		if failed:
+			QtWidgets.QMessageBox.warning(self, "Nelze otevřít soubory", "Soubory se nepodařilo otevřít:\n{}".format("\n".join(failed)))
+
+		if play and self.tableWidget.rowCount() > firstRow:
+			self.tableWidget.activateRow(firstRow)
+			self.play()
+
+	def startControlServer(self, path=control.CONTROL_PATH):
+		'''Start local control server (JSON-RPC over Unix socket) for scripting the player
+
+		Keyword Arguments:
+
+			path {str} -- Path to the socket (default: {control.CONTROL_PATH})
+
+		Returns:
+
+			bool -- True if the server is listening
+		'''
+		server = control.ControlServer(path)
+		server.register("player.enqueue", self.controlEnqueue)
+		server.register("player.status", lambda params: self.callInGui(self.playerStatus))
+		for name, function in [("play", self.play), ("pause", self.pause), ("toggle", self.togglePlayPause), ("stop", self.stop), ("next", self.nextSong), ("previous", self.previousSong)]:
+			server.register("player." + name, lambda params, function=function: self.callInGui(function) or True)
+		server.register("tags.read", self.controlReadTags, bulk=True)
+		server.register("tags.write", self.controlWriteTags, bulk=True)
+		if not server.start():
+			return False
+		self.controlServer = server
+		return True
+
+	def stopControlServer(self):
+		'''Stop local control server
+		'''
+		if self.controlServer is not None:
+			self.controlServer.stop()
+			self.controlServer = None
+
+	def callInGui(self, function, *args):
+		'''Evaluate the function in GUI thread and wait for the result (called from worker threads of control server)
+
+		Arguments:
+
+			function {Callable} -- Function
+
+		Returns:
+
+			object -- Result of the function
+		'''
+		future = Future()
+		self.controlCall.emit((future, function, args))
+		return future.result(self.CONTROL_TIMEOUT)
+
+	def handleControlCall(self, call):
+		'''Evaluate the call of control server
+
+		Arguments:
+
+			call {Tuple[Future, Callable, Tuple]} -- Future of the result, function and its arguments
+		'''
+		future, function, args = call
+		if not future.set_running_or_notify_cancel():
+			return
+		try:
+			future.set_result(function(*args))
+		except Exception as e:
+			future.set_exception(e)
+
+	def playerStatus(self):
+		'''Get state of the player for control clients
+
+		Returns:
+
+			Dict -- State, current file with its tags, position and length in seconds, volume
+		'''
+		status = {"state": self.STATE_NAMES[self.playState], "path": None, "tags": None, "position": self.currentSeconds, "length": self.songLength, "volume": self.volume}
+		if self.mp3file is not None:
+			status["path"] = self.mp3file.path
+			status["tags"] = dict(self.mp3file.track.values)
+		return status
+
+	def publishPlayerState(self):
+		'''Push changes of play state and current file to control clients
+		'''
+		if self.controlServer is None:
+			return
+		state = (self.playState, None if self.mp3file is None else self.mp3file.path)
+		if state == self.controlState:
+			return
+		if self.controlState is None or state[1] != self.controlState[1]:
+			self.controlServer.publish("track", {"path": state[1], "tags": None if self.mp3file is None else dict(self.mp3file.track.values)})
+		if self.controlState is None or state[0] != self.controlState[0]:
+			self.controlServer.publish("state", {"state": self.STATE_NAMES[state[0]], "path": state[1]})
+		self.controlState = state
+
+	def controlEnqueue(self, params):
+		'''Add files to the table (control method, tracks are loaded in worker threads)
+
+		Arguments:
+
+			params {Dict} -- Paths and play flag (if the first added file should be played)
+
+		Returns:
+
+			Dict -- Number of added files and paths which can't be opened
+		'''
+		paths = [os.path.abspath(str(i)) for i in params["paths"]]
+
+		def load(path):
+			try:
+				return core.Track.load(path, cover=False)
+			# Mutagen errors don't share common base with OSError
+			except Exception:
+				return None
+
+		with ThreadPoolExecutor(max_workers=covers.WORKERS) as executor:
+			tracks = list(executor.map(load, paths))
+		loaded = [i for i in tracks if i is not None]
+
+		def add():
+			firstRow = self.tableWidget.rowCount()
+			for track in loaded:
+				self.tableWidget.addMP3(MP3File(track.path, track))
+			if params.get("play", False) and loaded:
+				self.tableWidget.activateRow(firstRow)
+				self.play()
+
+		self.callInGui(add)
+		return {"added": len(loaded), "failed": [i for (i, j) in zip(paths, tracks) if j is None]}
+
+	def controlReadTags(self, calls):
+		'''Read tags of many files at once (control bulk method, files in the table are not read again)
+
+		Arguments:
+
+			calls {List[Dict]} -- Params of calls (path)
+
+		Returns:
+
+			List -- Tags, length and bitrate for each call (exception if it failed)
+		'''
+		paths = [os.path.abspath(str(i["path"])) if isinstance(i, dict) and "path" in i else None for i in calls]
+		wanted = set(paths)
+		known = self.callInGui(lambda: {i: j.track for (i, j) in self.mp3filesByPath().items() if i in wanted})
+
+		def read(path):
+			if path is None:
+				return ValueError("Missing path")
+			track = known.get(path)
+			try:
+				if track is None:
+					track = core.Track.load(path, cover=False)
+			# Mutagen errors don't share common base with OSError
+			except Exception as e:
+				return e
+			return {"path": path, "tags": dict(track.values), "length": track.length, "bitrate": track.bitrate}
+
+		with ThreadPoolExecutor(max_workers=covers.WORKERS) as executor:
+			return list(executor.map(read, paths))
+
+	def controlWriteTags(self, calls):
+		'''Write tags of many files as one undoable operation (control bulk method, unchanged values are not written)
+
+		Arguments:
+
+			calls {List[Dict]} -- Params of calls (path and tags by property name)
+
+		Returns:
+
+			List -- Changed properties for each call (exception if it failed)
+		'''
+		results = self.controlReadTags(calls)
+		changes = list()
+		seen = set()
+		for idx, (params, current) in enumerate(zip(calls, results)):
+			if isinstance(current, Exception):
+				continue
+			# Every file is written once
+			if current["path"] in seen:
+				results[idx] = ValueError("File is in the batch more than once")
+				continue
+			seen.add(current["path"])
+			values = params.get("tags")
+			if not isinstance(values, dict) or any(i not in tags.TEXT_TAGS for i in values):
+				results[idx] = ValueError("Tags must be object with properties {}".format(", ".join(tags.TEXT_TAGS)))
+				continue
+			change = journal.FileChange(current["path"], {i: (current["tags"][i], str(j)) for (i, j) in values.items() if current["tags"][i] != str(j)})
+			results[idx] = change
+			if change.values:
+				changes.append(change)
+
+		errors = dict(zip(map(id, changes), self.callInGui(self.executeChanges, "Ovládání: zápis tagů", changes))) if changes else dict()
+		for idx, result in enumerate(results):
+			if isinstance(result, journal.FileChange):
+				error = errors.get(id(result))
+				results[idx] = error if error is not None else {"path": result.path, "changed": list(result.values)}
+		return results
+
 	def convertSecsToString(self, secs, hours_digits=0, long_format=False):
 		'''Convert seconds to human readable format
 
@@ -1060,7 +2136,7 @@ class MP3Player(QtWidgets.QMainWindow):
 			self.timeSlider.setSliderPosition(self.currentSeconds)
 			self.timeSlider.setMaximum(self.songLength)
 
-		if int(self.vlcPlayer.get_time() * 0.001) != self.currentSeconds:
+		if self.vlcPlayer is not None and int(self.vlcPlayer.get_time() * 0.001) != self.currentSeconds:
 			self.vlcPlayer.set_time(self.currentSeconds * 1000)
 
 	def updateVolumeFromSlider(self):
@@ -1083,17 +2159,18 @@ class MP3Player(QtWidgets.QMainWindow):
 		self.volume = volume
 		if self.volume > 0:
 			self.muteState = self.UNMUTE
-			self.muteButton.setIcon(QtGui.QIcon("ui/icon/unmute.png"))
+			self.muteButton.setIcon(forms.icon("unmute.png"))
 			self.muteButton.setToolTip("Mute")
 		else:
 			self.muteState = self.MUTE
-			self.muteButton.setIcon(QtGui.QIcon("ui/icon/mute.png"))
+			self.muteButton.setIcon(forms.icon("mute.png"))
 			self.muteButton.setToolTip("UnMute")
 
 		if recurse:
 			self.volumeSlider.setSliderPosition(self.volume)
 
-		self.vlcPlayer.audio_set_volume(self.volume)
+		if self.vlcPlayer is not None:
+			self.vlcPlayer.audio_set_volume(self.volume)
 
 	def mute(self):
 		'''Mute player
@@ -1120,29 +2197,32 @@ class MP3Player(QtWidgets.QMainWindow):
 		'''Play the song
 		'''
 		self.playState = self.PLAYING
-		self.playButton.setIcon(QtGui.QIcon("ui/icon/pause.png"))
+		self.playButton.setIcon(forms.icon("pause.png"))
 		self.playButton.setToolTip("Pause")
 
-		self.vlcPlayer.play()
+		if self.vlcPlayer is not None:
+			self.vlcPlayer.play()
 
 	def stop(self):
 		'''Stop the song
 		'''
 		self.playState = self.STOPPED
-		self.playButton.setIcon(QtGui.QIcon("ui/icon/play.png"))
+		self.playButton.setIcon(forms.icon("play.png"))
 		self.stopButton.setToolTip("Stop")
 
 		self.updateTimes(currentSeconds=0)
-		self.vlcPlayer.stop()
+		if self.vlcPlayer is not None:
+			self.vlcPlayer.stop()
 
 	def pause(self):
 		'''Pause the song
 		'''
 		self.playState = self.PAUSED
-		self.playButton.setIcon(QtGui.QIcon("ui/icon/play.png"))
+		self.playButton.setIcon(forms.icon("play.png"))
 		self.playButton.setToolTip("Play")
 
-		self.vlcPlayer.pause()
+		if self.vlcPlayer is not None:
+			self.vlcPlayer.pause()
 
 	def nextSong(self):
 		'''Play next song
@@ -1158,14 +2238,14 @@ class MP3Player(QtWidgets.QMainWindow):
 		'''Set shuffle on
 		'''
 		self.shuffleState = self.SHUFFLE
-		self.shuffleButton.setIcon(QtGui.QIcon("ui/icon/unshuffle.png"))
+		self.shuffleButton.setIcon(forms.icon("unshuffle.png"))
 		self.shuffleButton.setToolTip("Switch shuffle off")
 
 	def unshuffle(self):
 		'''Set shuffle off
 		'''
 		self.shuffleState = self.UNSHUFFLE
-		self.shuffleButton.setIcon(QtGui.QIcon("ui/icon/shuffle.png"))
+		self.shuffleButton.setIcon(forms.icon("shuffle.png"))
 		self.shuffleButton.setToolTip("Switch shuffle on")
 
 	def handleRemoveFileButton(self):
@@ -1241,7 +2321,7 @@ class MP3Player(QtWidgets.QMainWindow):
 	def handleDeleteCoverButton(self):
 		'''Handle delete cover album button
 		'''
-		if self.mp3file is not None and self.mp3file.image is not None:
+		if self.mp3file is not None and self.mp3file.imageBytes is not None and not self.mp3file.coverFromFolder:
 			msg = "Opravdu chcete odstranit fotku alba?"
 			reply = QtWidgets.QMessageBox.question(self, 'Message', msg, QtWidgets.QMessageBox.Yes, QtWidgets.QMessageBox.No)
 
@@ -1277,6 +2357,188 @@ class MP3Player(QtWidgets.QMainWindow):
 		else:
 			QtWidgets.QMessageBox.warning(self, "Nevybrané žádné soubory", "Nebyly vybrány žádné soubory pro hromadné úpravy.")
 
+	def handleOrganizeAction(self):
+		'''Handle organize action (move checked files to library directories using path template)
+		'''
+		if self.tableWidget.checkedRowsCount() > 0:
+			mp3files = self.tableWidget.getCheckedMP3Files()
+			root = QtWidgets.QFileDialog.getExistingDirectory(self, "Select library directory", os.path.commonpath([i.baseDir for i in mp3files]))
+			if root != "":
+				self.editWindow.exec(mp3files, None, False, False, root)
+		else:
+			QtWidgets.QMessageBox.warning(self, "Nevybrané žádné soubory", "Nebyly vybrány žádné soubory pro uspořádání.")
+
+	def handleReplaceAction(self):
+		'''Handle find and replace action (over tags of all loaded files)
+		'''
+		if not self.tableWidget.isEmpty():
+			self.replaceWindow.exec(self.tableWidget.getMP3Files())
+		else:
+			QtWidgets.QMessageBox.warning(self, "Není načtený soubor", "Nebyl načten žádný hudební soubor, nelze hledat v tagách.")
+
+	def handleNormalizeCoversAction(self, checked):
+		'''Handle switching of cover normalization (downsize and recompress covers before embedding)
+
+		Arguments:
+
+			checked {bool} -- If the normalization is on
+		'''
+		MP3File.normalizeCovers = checked
+
+	def handleTraceAction(self, checked):
+		'''Handle switching of hot path tracing (aggregates are shown in the statusbar)
+
+		Arguments:
+
+			checked {bool} -- If the tracing is on
+		'''
+		tracing.TRACER.enable(checked)
+		if checked:
+			self.traceTimer.start(1000)
+			self.showTraceSummary()
+			self.traceLabel.show()
+		else:
+			self.traceTimer.stop()
+			self.traceLabel.hide()
+
+	def showTraceSummary(self):
+		'''Show the slowest hot paths (by total time) and counters in the statusbar
+		'''
+		spans, counters = tracing.TRACER.summary()
+		parts = ["{} {}× {:.0f} ms (max {:.1f} ms)".format(name, count, total, maximum) for (name, count, total, maximum) in spans[:self.TRACE_SUMMARY_SPANS]]
+		parts.extend("{} {}".format(i, j) for (i, j) in sorted(counters.items()))
+		self.traceLabel.setText(" | ".join(parts) if parts else "Měření výkonu je zapnuté")
+
+	def handleExportTraceAction(self):
+		'''Handle export trace action (recorded spans are saved for chrome://tracing or ui.perfetto.dev)
+		'''
+		path = QtWidgets.QFileDialog.getSaveFileName(self, "Exportovat záznam výkonu", filter="Chrome trace (*.json)")[0]
+		if path == "":
+			return
+		if os.path.splitext(path)[1] == "":
+			path += ".json"
+		try:
+			count = tracing.TRACER.exportTrace(path)
+		except OSError as e:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit záznam výkonu", str(e))
+			return
+		self.statusbar.showMessage("Záznam výkonu byl uložen ({} událostí).".format(count))
+
+	def handleOptimizeCoversAction(self):
+		'''Handle optimize covers action (re-process embedded covers of checked files in parallel)
+		'''
+		if self.tableWidget.checkedRowsCount() == 0:
+			QtWidgets.QMessageBox.warning(self, "Nevybrané žádné soubory", "Nebyly vybrány žádné soubory pro optimalizaci obalů alb.")
+			return
+		quality, ok = QtWidgets.QInputDialog.getInt(self, "Optimalizovat obaly alb", "Kvalita JPEG (obrázky jsou zmenšeny na {} px):".format(images.MAX_SIZE), MP3File.coverQuality, 10, 100)
+		if not ok:
+			return
+		MP3File.coverQuality = quality
+
+		self.statusbar.showMessage("Optimalizují se obaly alb...")
+		self.trackLoader.submit(self.optimizeCovers, [i.path for i in self.tableWidget.getCheckedMP3Files()], quality)
+
+	def optimizeCovers(self, paths, quality):
+		'''Re-process embedded covers (evaluated in background thread, results are passed by coversOptimized signal)
+
+		Arguments:
+
+			paths {List[str]} -- Paths to mp3 files
+			quality {int} -- JPEG quality
+		'''
+		self.coversOptimized.emit(covers.normalizeCovers(paths, lambda data: images.normalizeImage(data, quality=quality)))
+
+	def handleCoversOptimized(self, results):
+		'''Record optimized covers in the undo journal and show the result
+
+		Arguments:
+
+			results {List[CoverChange]} -- Result for each file
+		'''
+		changed = self.recordCoverChanges("Optimalizace obalů alb", results)
+		self.statusbar.showMessage("Obaly alb byly zmenšeny v {} z {} souborů, ušetřeno {}.".format(len(changed), len(results), images.formatSize(sum(i.saved for i in changed))))
+		failed = [i for i in results if i.error is not None]
+		if failed:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit data", "Obal alba se nepodařilo optimalizovat v {} z {} souborů, např. \"{}\".".format(len(failed), len(results), os.path.basename(failed[0].path)))
+
+	def handleEmbedFolderCoversAction(self):
+		'''Handle embed folder covers action (folder images are embedded into checked files without cover in parallel)
+		'''
+		if self.tableWidget.checkedRowsCount() == 0:
+			QtWidgets.QMessageBox.warning(self, "Nevybrané žádné soubory", "Nebyly vybrány žádné soubory pro vložení obalů alb.")
+			return
+
+		self.statusbar.showMessage("Vkládají se obaly alb ze složek...")
+		self.trackLoader.submit(self.embedFolderCovers, [i.path for i in self.tableWidget.getCheckedMP3Files()])
+
+	def embedFolderCovers(self, paths):
+		'''Embed folder images (evaluated in background thread, results are passed by coversEmbedded signal)
+
+		Arguments:
+
+			paths {List[str]} -- Paths to mp3 files
+		'''
+		self.coversEmbedded.emit(covers.embedFolderCovers(paths, MP3File.folderCovers))
+
+	def handleCoversEmbedded(self, results):
+		'''Record embedded folder images in the undo journal and show the result
+
+		Arguments:
+
+			results {List[CoverChange]} -- Result for each file
+		'''
+		embedded = self.recordCoverChanges("Vložení obalů alb ze složek", results)
+		self.statusbar.showMessage("Obal alba ze složky byl vložen do {} z {} souborů.".format(len(embedded), len(results)))
+		failed = [i for i in results if i.error is not None]
+		if failed:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit data", "Obal alba se nepodařilo vložit do {} z {} souborů, např. \"{}\".".format(len(failed), len(results), os.path.basename(failed[0].path)))
+
+	def handleRecipeAction(self):
+		'''Handle recipe action (run saved chain of edits over checked files, one write per file)
+		'''
+		if self.tableWidget.checkedRowsCount() == 0:
+			QtWidgets.QMessageBox.warning(self, "Nevybrané žádné soubory", "Nebyly vybrány žádné soubory pro spuštění receptu.")
+			return
+		try:
+			names = self.recipeStore.names()
+		except (recipes.RecipeError, OSError) as e:
+			QtWidgets.QMessageBox.warning(self, "Nelze načíst recepty", str(e))
+			return
+		if not names:
+			QtWidgets.QMessageBox.warning(self, "Žádné recepty", "Nejsou uložené žádné recepty, vytvořte je v okně hromadných úprav.")
+			return
+
+		name, ok = QtWidgets.QInputDialog.getItem(self, "Spustit recept", "Recept:", names, 0, False)
+		if not ok:
+			return
+		try:
+			recipe = self.recipeStore.get(name)
+		except (recipes.RecipeError, OSError) as e:
+			QtWidgets.QMessageBox.warning(self, "Nelze načíst recepty", str(e))
+			return
+		properties = [i for i in MP3File.property_2_name if i != "cover"]
+		# Values before the recipe (for the undo journal)
+		before = dict()
+
+		def read(mp3file):
+			before[mp3file] = {i: mp3file.getProperty(i) for i in properties}
+			return before[mp3file]
+
+		# Values are in memory, so changes are only computed here and the undo journal writes them in parallel
+		# (conflicts of renames are checked before anything is written)
+		results = list(recipes.runRecipe(recipe, self.tableWidget.getCheckedMP3Files(), read=read, write=None, pathOf=lambda mp3file: mp3file.path, dryRun=True))
+		valid = [i for i in results if i.error is None]
+		changes = [journal.FileChange(i.item.path, {j: (before[i.item].get(j, ""), k) for (j, k) in i.changes.items()}, newPath=None if i.path == i.item.path else i.path) for i in valid]
+		try:
+			errors = self.executeChanges("Recept {}".format(name), changes)
+		except (FileExistsError, renamer.RenameError) as e:
+			self.warnRenameFailed(e)
+			return
+
+		failed = [i.item.baseName for i in results if i.error is not None] + [os.path.basename(i.path) for (i, j) in zip(changes, errors) if j is not None]
+		if failed:
+			QtWidgets.QMessageBox.warning(self, "Nelze uložit data", "Recept se nepodařilo použít na {} z {} souborů, např. \"{}\".".format(len(failed), len(results), failed[0]))
+
 	def handlePlayButton(self):
 		'''Handle play button
 		'''
@@ -0,0 +1,42 @@
+import sys
+import time
+
+__all__ = ["StartupProfile"]
+
+
+class StartupProfile(object):
+	'''Phase by phase timing of the startup (enabled by --profile-startup)
+
+	Keyword Arguments:
+
+		output {TextIO} -- Output of the report (default: {sys.stderr})
+	'''
+	def __init__(self, output=sys.stderr):
+		self.output = output
+		self.start = time.perf_counter()
+		self.last = self.start
+		self.phases = list()
+		self.reported = False
+
+	def mark(self, phase):
+		'''Finish the phase (it lasted since the previous mark)
+
+		Arguments:
+
+			phase {str} -- Name of the phase
+		'''
+		now = time.perf_counter()
+		self.phases.append((phase, now - self.last))
+		self.last = now
+
+	def report(self):
+		'''Print the timing of all phases (only once)
+		'''
+		if self.reported:
+			return
+		self.reported = True
+		width = max([len(i) for (i, j) in self.phases] + [5])
+		for phase, duration in self.phases:
+			self.output.write("{:<{}} {:8.1f} ms\n".format(phase, width, duration * 1000))
+		self.output.write("{:<{}} {:8.1f} ms\n".format("total", width, (self.last - self.start) * 1000))
+		self.output.flush()